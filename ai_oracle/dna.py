@@ -0,0 +1,95 @@
+import numpy as np
+
+# 2-bit base codes; four bases per byte, first base in the high bits
+BASES = 'ACGT'
+_CODES = np.full(256, 255, dtype=np.uint8)
+_CODES[np.frombuffer(BASES.encode('ascii'), dtype=np.uint8)] = np.arange(4, dtype=np.uint8)
+_SHIFTS = np.array([6, 4, 2, 0], dtype=np.uint8)
+
+CROSSOVER_METHODS = ('single_point', 'two_point', 'uniform')
+
+def encode(sequence):
+    """Base string or list of bases -> uint8 codes 0-3"""
+    codes = _CODES[np.frombuffer(''.join(sequence).upper().encode('ascii'), dtype=np.uint8)]
+    if (codes == 255).any():
+        raise ValueError(f"DNA may only contain the bases {BASES}")
+    return codes
+
+def decode(codes):
+    return ''.join(BASES[code] for code in np.asarray(codes).ravel())
+
+def packed_size(length):
+    return (length + 3) // 4
+
+def pack(codes):
+    """(..., length) codes -> (..., ceil(length / 4)) packed uint8"""
+    codes = np.asarray(codes, dtype=np.uint8)
+    length = codes.shape[-1]
+    padded = np.zeros(codes.shape[:-1] + (packed_size(length) * 4,), dtype=np.uint8)
+    padded[..., :length] = codes
+    grouped = padded.reshape(codes.shape[:-1] + (-1, 4)) << _SHIFTS
+    return np.bitwise_or.reduce(grouped, axis=-1)
+
+def unpack(packed, length):
+    """Inverse of pack; length drops the padding bases of the last byte"""
+    packed = np.asarray(packed, dtype=np.uint8)
+    codes = (packed[..., np.newaxis] >> _SHIFTS) & 3
+    return codes.reshape(packed.shape[:-1] + (-1,))[..., :length]
+
+def random_population(size, length, rng=None):
+    rng = rng if rng is not None else np.random.default_rng()
+    return pack(rng.integers(0, 4, size=(size, length), dtype=np.uint8))
+
+def crossover(parents_a, parents_b, length, method='single_point', rng=None):
+    """
+    Recombine two packed populations row by row in one pass:
+    - single_point: prefix from a, suffix from b, cut in [1, length)
+    - two_point: the segment between two cuts comes from b
+    - uniform: each base from either parent with equal probability
+    """
+    parents_a, parents_b = _check_populations(parents_a, parents_b, length)
+    rng = rng if rng is not None else np.random.default_rng()
+    size = parents_a.shape[0]
+    positions = np.arange(length)
+
+    if method == 'single_point':
+        cuts = rng.integers(1, max(length, 2), size=size)
+        from_b = positions >= cuts[:, np.newaxis]
+    elif method == 'two_point':
+        cuts = np.sort(rng.integers(0, length + 1, size=(size, 2)), axis=1)
+        from_b = (positions >= cuts[:, :1]) & (positions < cuts[:, 1:])
+    elif method == 'uniform':
+        from_b = rng.random((size, length)) < 0.5
+    else:
+        raise ValueError(f"Unknown crossover method '{method}', expected one of {CROSSOVER_METHODS}")
+
+    # Both bits of a base follow the same parent
+    mask = pack(from_b.astype(np.uint8) * 3)
+    return (parents_a & ~mask) | (parents_b & mask)
+
+def point_mutation(population, length, rate, rng=None):
+    """Replace each base with a different base with probability rate"""
+    population = np.asarray(population, dtype=np.uint8)
+    rng = rng if rng is not None else np.random.default_rng()
+    shape = population.shape[:-1] + (length,)
+    mutated = rng.random(shape) < rate
+    # XOR with a non-zero 2-bit delta always changes the base
+    delta = np.where(mutated, rng.integers(1, 4, size=shape, dtype=np.uint8), 0).astype(np.uint8)
+    return population ^ pack(delta)
+
+def recombine_population(parents_a, parents_b, length, method='single_point', mutation_rate=0.01, rng=None):
+    """One generation: crossover of paired parents followed by point mutation"""
+    rng = rng if rng is not None else np.random.default_rng()
+    children = crossover(parents_a, parents_b, length, method, rng)
+    if mutation_rate > 0:
+        children = point_mutation(children, length, mutation_rate, rng)
+    return children
+
+def _check_populations(parents_a, parents_b, length):
+    parents_a = np.atleast_2d(np.asarray(parents_a, dtype=np.uint8))
+    parents_b = np.atleast_2d(np.asarray(parents_b, dtype=np.uint8))
+    if parents_a.shape != parents_b.shape:
+        raise ValueError(f"Parent populations differ in shape: {parents_a.shape} vs {parents_b.shape}")
+    if parents_a.shape[-1] != packed_size(length):
+        raise ValueError(f"Packed rows hold {parents_a.shape[-1]} bytes, expected {packed_size(length)} for {length} bases")
+    return parents_a, parents_b
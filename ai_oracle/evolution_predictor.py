@@ -1,7 +1,14 @@
+import threading
+from collections import deque
+
+import numpy as np
+
 class EvolutionaryPredictor:
-    def __init__(self, blockchain_interface):
+    FEATURES = ('burn_rate', 'survival_rate', 'pressure')
+
+    def __init__(self, blockchain_interface, lstm_model=None):
         self.blockchain = blockchain_interface
-        self.lstm_model = load_keras_model('evolution_lstm.h5')
+        self.lstm_model = lstm_model if lstm_model is not None else load_keras_model('evolution_lstm.h5')
         
     def predict_next_mutation(self):
         # Fetch last 10 mutations data
@@ -15,14 +22,111 @@ class EvolutionaryPredictor:
         
         # Predict next cycle parameters using LSTM
         prediction = self.lstm_model.predict(np.expand_dims(sequence, axis=0))
-        
+        return self._to_result(prediction[0])
+
+    def _to_result(self, row):
         return {
-            'predicted_burn_rate': prediction[0][0],
-            'predicted_survival': prediction[0][1],
-            'mutation_trend': self._interpret_trend(prediction[0][2])
+            'predicted_burn_rate': row[0],
+            'predicted_survival': row[1],
+            'mutation_trend': self._interpret_trend(row[2])
         }
     
     def _interpret_trend(self, trend_value):
         if trend_value > 0.7: return 'aggressive'
         if trend_value < 0.3: return 'defensive'
-        return 'neutral' 
\ No newline at end of file
+        return 'neutral'
+
+class StreamingPredictor(EvolutionaryPredictor):
+    """
+    Serves predictions from a local sliding window:
+    - The chain is read once to seed a fixed-size ring buffer, on the
+      first prediction; mutations observed before that are replayed on top
+    - observe() appends mutations as they land, evicting the oldest
+    - One model call per head; repeat requests hit the cached result
+    - predict_batch() scores many hypothetical windows in one call
+    """
+    def __init__(self, blockchain_interface, lstm_model=None, window=10):
+        super().__init__(blockchain_interface, lstm_model)
+        self.window = window
+        self._buffer = np.zeros((window, len(self.FEATURES)))
+        self._start = 0
+        self._count = 0
+        self.head = None
+        self._cached = None
+        self._seeded = False
+        # Observed before the window was seeded, newest window only
+        self._pending = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def observe(self, mutation):
+        """Append one new mutation. Its 'block' (or a running count) becomes the head."""
+        with self._lock:
+            if self._seeded:
+                self._append(mutation)
+            else:
+                self._pending.append(mutation)
+
+    def predict_next_mutation(self):
+        with self._lock:
+            self._seed()
+            if self._cached is not None and self._cached[0] == self.head:
+                return self._cached[1]
+
+            prediction = self.lstm_model.predict(self.sequence()[np.newaxis])
+            result = self._to_result(prediction[0])
+            self._cached = (self.head, result)
+            return result
+
+    def predict_batch(self, sequences):
+        # sequences: (n, window, features) array, scored in one model call
+        sequences = np.asarray(sequences, dtype=np.float64)
+        if sequences.ndim != 3 or sequences.shape[2] != len(self.FEATURES):
+            raise ValueError(f"Expected (n, steps, {len(self.FEATURES)}) sequences, got {sequences.shape}")
+        return [self._to_result(row) for row in self.lstm_model.predict(sequences)]
+
+    def what_if_burn_rates(self, burn_rates):
+        """Predict the step after each hypothetical next burn rate"""
+        with self._lock:
+            self._seed()
+            current = self.sequence()
+        if len(current) == 0:
+            raise ValueError("No mutation history observed yet")
+
+        # Slide the window one step, keeping the latest survival and pressure
+        next_steps = np.repeat(current[-1:], len(burn_rates), axis=0)
+        next_steps[:, 0] = burn_rates
+        kept = current[1:] if len(current) == self.window else current
+        hypotheses = np.concatenate([
+            np.repeat(kept[np.newaxis], len(burn_rates), axis=0),
+            next_steps[:, np.newaxis]
+        ], axis=1)
+        return self.predict_batch(hypotheses)
+
+    def sequence(self):
+        # Oldest-to-newest copy of the window
+        order = (np.arange(self._count) + self._start) % self.window
+        return self._buffer[order]
+
+    def _seed(self):
+        # Caller holds the lock
+        if self._seeded:
+            return
+        history = list(self.blockchain.get_mutation_history(self.window))
+        blocks = [mutation['block'] for mutation in self._pending if 'block' in mutation]
+        if blocks:
+            # The chain may already include observed mutations; the observed copies win
+            history = [mutation for mutation in history if mutation.get('block', -1) < min(blocks)]
+        for mutation in history + list(self._pending):
+            self._append(mutation)
+        self._pending.clear()
+        self._seeded = True
+
+    def _append(self, mutation):
+        if self._count < self.window:
+            slot = (self._start + self._count) % self.window
+            self._count += 1
+        else:
+            slot = self._start
+            self._start = (self._start + 1) % self.window
+        self._buffer[slot] = [mutation[feature] for feature in self.FEATURES]
+        self.head = mutation.get('block', (self.head or 0) + 1)
@@ -1,3 +1,5 @@
+from ai_oracle.instrumentation import METRICS
+
 class AdaptiveFitnessCalculator:
     def __init__(self, market_analyzer):
         self.market = market_analyzer
@@ -12,7 +14,26 @@ class AdaptiveFitnessCalculator:
     def calculate(self, gene):
         # Get real-time market data
         market_state = self.market.current_state()
-        
+        return self._score(gene, market_state)
+
+    @METRICS.timed('fitness_batch_seconds', scorer='adaptive')
+    def calculate_population(self, genes):
+        # One market read shared by every gene in the generation
+        market_state = self.market.current_state()
+        return [self._score(gene, market_state) for gene in genes]
+
+    def linear_form(self):
+        """
+        (factors, weights, scale) for the current market, such that
+        calculate(gene) == scale * sum(gene[f] * w for f, w in zip(factors, weights));
+        lets a whole population be scored as one matrix product without the analyzer
+        """
+        market_state = self.market.current_state()
+        adjusted_weights = self._adapt_weights(market_state)
+        factors = tuple(adjusted_weights)
+        return factors, [adjusted_weights[factor] for factor in factors], self._environmental_factor(market_state)
+
+    def _score(self, gene, market_state):
         # Adjust weights dynamically
         adjusted_weights = self._adapt_weights(market_state)
         
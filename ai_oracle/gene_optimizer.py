@@ -1,7 +1,129 @@
+import math
+from collections import defaultdict, deque
+from numbers import Integral, Real
+
+import numpy as np
+
+from ai_oracle.similarity_index import mutation_shingles
+
+class GeneView:
+    """Read-only row view into a GenePool slot"""
+    __slots__ = ('_pool', '_slot')
+
+    def __init__(self, pool, slot):
+        self._pool = pool
+        self._slot = slot
+
+    @property
+    def id(self):
+        return int(self._pool.ids[self._slot])
+
+    @property
+    def burn_rate(self):
+        return float(self._pool.burn_rates[self._slot])
+
+    @property
+    def mutation_rate(self):
+        return float(self._pool.mutation_rates[self._slot])
+
+    def __getitem__(self, field):
+        if field not in GenePool.FIELDS:
+            raise KeyError(field)
+        return getattr(self, field)
+
+    def to_dict(self):
+        return {field: getattr(self, field) for field in GenePool.FIELDS}
+
+class GenePool:
+    """
+    Fixed-capacity gene pool stored as typed columns:
+    - id (int64), burn_rate and mutation_rate (float64)
+    - Ring buffer: appending past capacity overwrites the oldest gene in O(1)
+    - columns() exposes zero-copy NumPy views for batch scoring
+    """
+    FIELDS = ('id', 'burn_rate', 'mutation_rate')
+
+    def __init__(self, capacity=100):
+        if capacity <= 0:
+            raise ValueError("Gene pool capacity must be positive")
+        self.capacity = capacity
+        self.ids = np.zeros(capacity, dtype=np.int64)
+        self.burn_rates = np.zeros(capacity, dtype=np.float64)
+        self.mutation_rates = np.zeros(capacity, dtype=np.float64)
+        self._start = 0
+        self._size = 0
+        self._next_id = 0
+
+    def __len__(self):
+        return self._size
+
+    def __iter__(self):
+        for index in range(self._size):
+            yield GeneView(self, self._slot(index))
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += self._size
+        if not 0 <= index < self._size:
+            raise IndexError("gene pool index out of range")
+        return GeneView(self, self._slot(index))
+
+    def append(self, genes):
+        """Add a gene, evicting the oldest one when full. Returns the evicted id or None."""
+        gene_id, burn_rate, mutation_rate = self._validate(genes)
+        self._next_id = max(self._next_id, gene_id + 1)
+
+        evicted = None
+        if self._size == self.capacity:
+            slot = self._start
+            evicted = int(self.ids[slot])
+            self._start = (self._start + 1) % self.capacity
+        else:
+            slot = self._slot(self._size)
+            self._size += 1
+
+        self.ids[slot] = gene_id
+        self.burn_rates[slot] = burn_rate
+        self.mutation_rates[slot] = mutation_rate
+        return evicted
+
+    def _validate(self, genes):
+        # Checked before any slot changes, so a bad gene leaves the pool untouched
+        gene_id = genes.get('id', self._next_id)
+        if isinstance(gene_id, bool) or not isinstance(gene_id, Integral) or not -2 ** 63 <= gene_id < 2 ** 63:
+            raise ValueError(f"Gene field 'id' must be a 64-bit integer, got {gene_id!r}")
+        rates = []
+        for field in ('burn_rate', 'mutation_rate'):
+            if field not in genes:
+                raise ValueError(f"Gene is missing field '{field}'")
+            value = genes[field]
+            if isinstance(value, bool) or not isinstance(value, Real) or not math.isfinite(value):
+                raise ValueError(f"Gene field '{field}' must be a finite number, got {value!r}")
+            rates.append(float(value))
+        return int(gene_id), *rates
+
+    def columns(self):
+        """
+        Zero-copy views of the filled slots, in storage order.
+        The views alias the live buffers and change with later appends.
+        """
+        return {
+            'id': self.ids[:self._size],
+            'burn_rate': self.burn_rates[:self._size],
+            'mutation_rate': self.mutation_rates[:self._size]
+        }
+
+    def oldest_first(self):
+        # Storage-order index that lists genes from oldest to newest
+        return (np.arange(self._size) + self._start) % self.capacity
+
+    def _slot(self, index):
+        return (self._start + index) % self.capacity
+
 class AdaptiveGeneOptimizer:
-    def __init__(self, market_analyzer):
+    def __init__(self, market_analyzer, pool_capacity=100):
         self.analyzer = market_analyzer
-        self.genetic_pool = []
+        self.genetic_pool = GenePool(pool_capacity)
         
     def evolve_parameters(self, current_genes):
         # Analyze market conditions
@@ -16,31 +138,189 @@ class AdaptiveGeneOptimizer:
         }
     
     def update_genetic_pool(self, new_genes):
-        # Maintain diversity in genetic pool
+        # Maintain diversity in genetic pool, ring buffer drops the oldest gene
         self.genetic_pool.append(new_genes)
-        if len(self.genetic_pool) > 100:
-            self.genetic_pool.pop(0)
+
+class TraitEntropy:
+    """
+    Running Shannon entropy over trait counts.
+    Keeps n and S = sum(c * log c), so H = log n - S / n and every
+    add/remove is O(1).
+    """
+    def __init__(self):
+        self.counts = defaultdict(int)
+        self.total = 0
+        self._count_log_sum = 0.0
+
+    def add(self, trait):
+        count = self.counts[trait]
+        self._count_log_sum += _count_log(count + 1) - _count_log(count)
+        self.counts[trait] = count + 1
+        self.total += 1
+
+    def remove(self, trait):
+        count = self.counts[trait]
+        if count == 0:
+            raise KeyError(trait)
+        self._count_log_sum += _count_log(count - 1) - _count_log(count)
+        if count == 1:
+            del self.counts[trait]
+        else:
+            self.counts[trait] = count - 1
+        self.total -= 1
+
+    def entropy(self):
+        if self.total == 0:
+            return 0.0
+        return max(math.log(self.total) - self._count_log_sum / self.total, 0.0)
+
+    def diversity(self):
+        # Entropy normalized by its maximum; a single trait has no diversity
+        if len(self.counts) < 2:
+            return 0.0
+        return self.entropy() / math.log(len(self.counts))
+
+def _count_log(count):
+    return count * math.log(count) if count > 1 else 0.0
 
 class GenePoolManager:
-    def __init__(self, genetic_db):
+    # Genes closer than this (Jaccard distance over DNA and symbol) count as near-duplicates
+    NEAR_DUPLICATE_DISTANCE = 0.2
+    MAX_DUPLICATE_SHARE = 0.3
+
+    def __init__(self, genetic_db, similarity_index=None):
         self.db = genetic_db
         self.optimal_size = 100
+        # Traits in insertion order so remove_oldest can update the entropy
+        self.traits = None
+        self._trait_order = deque()
+        # Optional SimilarityIndex over gene DNA and symbols, keyed by gene id
+        self.similarity_index = similarity_index
+        # (gene id, insertion number) per db row, oldest first; a re-added id only
+        # leaves the index when its latest insertion does
+        self._id_order = deque()
+        self._live_insertion = {}
+        self._insertions = 0
+        # gene id -> ids within NEAR_DUPLICATE_DISTANCE, kept in step with the index
+        self._twins = {}
+        self._duplicated = 0
+
+    def add_gene(self, gene):
+        self._ensure_traits()
+        self.db.add_gene(gene)
+        self.traits.add(gene['dominant_trait'])
+        self._trait_order.append(gene['dominant_trait'])
+        self._index_gene(gene)
+
+    def remove_oldest(self, count):
+        self._ensure_traits()
+        self.db.remove_oldest(count)
+        for _ in range(min(count, len(self._trait_order))):
+            self.traits.remove(self._trait_order.popleft())
+        if self.similarity_index is not None:
+            for _ in range(min(count, len(self._id_order))):
+                gene_id, insertion = self._id_order.popleft()
+                if self._live_insertion.get(gene_id) != insertion:
+                    continue
+                del self._live_insertion[gene_id]
+                if self.similarity_index.remove(gene_id):
+                    self._unlink(gene_id)
+
+    def is_near_duplicate(self, gene, max_distance=None):
+        # Checked before a proposal is added, without comparing against every gene
+        if self.similarity_index is None:
+            return False
+        self._ensure_traits()
+        shingles = self._gene_shingles(gene)
+        if not len(shingles):
+            return False
+        max_distance = self.NEAR_DUPLICATE_DISTANCE if max_distance is None else max_distance
+        return self.similarity_index.has_near(shingles, max_distance, exclude=gene.get('id'))
+
+    def near_duplicate_share(self, max_distance=None):
+        """Fraction of indexed genes with a near-duplicate elsewhere in the pool"""
+        if self.similarity_index is None:
+            return 0.0
+        self._ensure_traits()
+        if not self._live_insertion:
+            return 0.0
+        if max_distance is None or max_distance == self.NEAR_DUPLICATE_DISTANCE:
+            # Running count, kept up to date by add_gene and remove_oldest
+            return self._duplicated / len(self._live_insertion)
+        duplicated = sum(
+            1 for gene_id in self._live_insertion
+            if gene_id in self.similarity_index and self.similarity_index.neighbors(gene_id, max_distance)
+        )
+        return duplicated / len(self._live_insertion)
         
     def maintain_pool_diversity(self):
-        current_pool = self.db.get_all_genes()
-        if len(current_pool) > self.optimal_size:
+        self._ensure_traits()
+        if self.traits.total > self.optimal_size:
             # Remove oldest 10% variants
-            remove_count = int(len(current_pool) * 0.1)
-            self.db.remove_oldest(remove_count)
+            remove_count = int(self.traits.total * 0.1)
+            self.remove_oldest(remove_count)
             
-        # Calculate diversity score
-        diversity = self.calculate_diversity(current_pool)
-        if diversity < 0.7:
+        # Diversity of the pool as it stands, without rescanning it
+        diversity = self.traits.diversity()
+        if diversity < 0.7 or self.near_duplicate_share() > self.MAX_DUPLICATE_SHARE:
             self.introduce_mutations()
     
     def calculate_diversity(self, genes):
         # Measure genetic variation using Shannon entropy
-        trait_counts = defaultdict(int)
+        trait_counts = TraitEntropy()
         for gene in genes:
-            trait_counts[gene['dominant_trait']] += 1
-        return entropy(list(trait_counts.values())) / math.log(len(trait_counts)) 
\ No newline at end of file
+            trait_counts.add(gene['dominant_trait'])
+        return trait_counts.diversity()
+
+    def _ensure_traits(self):
+        # One full read on first use, incremental afterwards
+        if self.traits is not None:
+            return
+        self.traits = TraitEntropy()
+        for gene in self.db.get_all_genes():
+            self.traits.add(gene['dominant_trait'])
+            self._trait_order.append(gene['dominant_trait'])
+            self._index_gene(gene)
+
+    def _index_gene(self, gene):
+        if self.similarity_index is None:
+            return
+        gene_id = gene['id']
+        if gene_id in self._twins:
+            # Re-added: the new copy replaces the indexed one
+            self._unlink(gene_id)
+            self.similarity_index.remove(gene_id)
+        shingles = self._gene_shingles(gene)
+        if len(shingles):
+            self.similarity_index.insert(gene_id, shingles)
+            self._link(gene_id)
+        # Keep ids aligned with db rows even for genes without DNA or symbol
+        self._insertions += 1
+        self._live_insertion[gene_id] = self._insertions
+        self._id_order.append((gene_id, self._insertions))
+
+    def _link(self, gene_id):
+        # One index query per insert instead of one per gene on every diversity check
+        twins = {
+            key for key, _ in self.similarity_index.neighbors(gene_id, self.NEAR_DUPLICATE_DISTANCE)
+            if key in self._twins
+        }
+        for twin in twins:
+            if not self._twins[twin]:
+                self._duplicated += 1
+            self._twins[twin].add(gene_id)
+        self._twins[gene_id] = twins
+        if twins:
+            self._duplicated += 1
+
+    def _unlink(self, gene_id):
+        twins = self._twins.pop(gene_id)
+        if twins:
+            self._duplicated -= 1
+        for twin in twins:
+            self._twins[twin].discard(gene_id)
+            if not self._twins[twin]:
+                self._duplicated -= 1
+
+    def _gene_shingles(self, gene):
+        return mutation_shingles(gene.get('dna'), gene.get('symbol'))
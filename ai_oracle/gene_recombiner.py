@@ -1,4 +1,17 @@
+import math
+from collections import OrderedDict
+
+import numpy as np
+
+from ai_oracle import dna
+from ai_oracle.evolution_metrics import EnhancedScorer
+from ai_oracle.prompt_cache import PromptCache
+
 class GeneRecombiner:
+    def __init__(self, prompt_cache=None):
+        # Shared across recombiners so identical parent sets hit the LLM once
+        self.prompt_cache = prompt_cache or PromptCache()
+
     def recombine_mutations(self, mutation_ids):
         # 选择最优历史基因进行重组
         parents = [self.get_mutation(id) for id in mutation_ids]
@@ -15,15 +28,42 @@ class GeneRecombiner:
     
     def combine_symbols(self, symbols):
         # 使用NLP模型生成组合名称
-        prompt = f"Combine these crypto names into a new hybrid: {', '.join(symbols)}"
-        return query_gpt4(prompt) 
+        return self.prompt_cache.query(self._combine_prompt(symbols), query_gpt4)
+
+    def combine_symbols_batch(self, symbol_sets):
+        # 多组重组打包成一次请求 -> Pack several recombinations into one request
+        prompts = [self._combine_prompt(symbols) for symbols in symbol_sets]
+        return self.prompt_cache.query_batch(prompts, query_gpt4)
+
+    def _combine_prompt(self, symbols):
+        return f"Combine these crypto names into a new hybrid: {', '.join(symbols)}"
 
 class EnhancedGeneRecombiner(GeneRecombiner):
-    def recombine_mutations(self, mutation_ids, market_data):
+    SELECTION_STRATEGIES = ('top_k', 'tournament', 'roulette')
+
+    def __init__(self, prompt_cache=None, scorer=None, selection='top_k', parent_count=3,
+                 tournament_size=4, memo_snapshots=4, seed=None, inheritance_weight=0.3,
+                 market_snapshot=None):
+        super().__init__(prompt_cache)
+        if selection not in self.SELECTION_STRATEGIES:
+            raise ValueError(f"Unknown selection strategy '{selection}', expected one of {self.SELECTION_STRATEGIES}")
+        self.scorer = scorer if scorer is not None else EnhancedScorer()
+        self.selection = selection
+        self.parent_count = parent_count
+        self.tournament_size = tournament_size
+        self.rng = np.random.default_rng(seed)
+        # MarketSnapshot generation -> {mutation_id: fitness}, most recent generations only
+        self.market_snapshot = market_snapshot
+        self._fitness_memo = OrderedDict()
+        self.memo_snapshots = memo_snapshots
+        # Share of a candidate's fitness taken from its stored success rate, when it has one
+        self.inheritance_weight = inheritance_weight
+
+    def recombine_mutations(self, mutation_ids, market_data, weights=None):
         parents = self._select_parents(mutation_ids, market_data)
         
         # 遗传算法优化 -> Genetic algorithm optimization
-        new_burn_rate = self._crossover_burn_rates([p.burn_rate for p in parents])
+        new_burn_rate = self._crossover_burn_rates([p.burn_rate for p in parents], weights)
         new_symbol = self.combine_symbols([p.symbol for p in parents])
         
         return {
@@ -32,20 +72,128 @@ class EnhancedGeneRecombiner(GeneRecombiner):
             'parent_genes': mutation_ids
         }
     
-    def _crossover_burn_rates(self, rates):
+    def _crossover_burn_rates(self, rates, weights=None):
         # 使用加权平均（近期变异权重更高）-> Using weighted average (higher weight for recent mutations)
-        weights = [0.4, 0.3, 0.3]  # Assuming 3 parent generations
+        if weights is None:
+            weights = GeneticOptimizer.DEFAULT_WEIGHTS  # Assuming 3 parent generations
         return sum(r * w for r, w in zip(rates[:3], weights))
+
+    def crossover_burn_rates_batch(self, rates, weights=None):
+        # rates: (N, 3) parent burn rates; weights: (N, 3) from optimize_recombination_batch
+        rates = np.asarray(rates, dtype=np.float64)
+        if weights is None:
+            weights = GeneticOptimizer.DEFAULT_WEIGHTS
+        return np.einsum('ij,ij->i', rates[:, :3], np.broadcast_to(weights, rates[:, :3].shape))
     
     def _select_parents(self, mutation_ids, market_data):
-        # 根据达尔文评分选择最优父代 -> Select optimal parents based on Darwin score
-        return sorted(
-            [self.get_mutation(id) for id in mutation_ids],
-            key=lambda x: self.scorer.calculate_fitness(x.id, market_data),
-            reverse=True
-        )[:3] 
+        """
+        根据达尔文评分选择最优父代 -> Select optimal parents based on Darwin score
+        - Candidates are scored in one batch; with a market_snapshot, fitness
+          is memoized per snapshot generation and mutation id
+        - Success rates stored by the scorer for earlier generations are
+          blended in with inheritance_weight
+        - Only the chosen parents are fetched, best first
+        market_data is columnar and aligned with mutation_ids; scalars are shared.
+        It must be derived from the current snapshot generation for the memo to hold.
+        """
+        mutation_ids = list(mutation_ids)
+        if not mutation_ids:
+            return []
+        fitness = self._inherit(mutation_ids, self._fitness(mutation_ids, market_data))
+        chosen = getattr(self, f"_select_{self.selection}")(fitness, min(self.parent_count, len(mutation_ids)))
+        # Best parent first so crossover weights favour the fittest
+        chosen = chosen[np.argsort(-fitness[chosen], kind='stable')]
+        return self._fetch_mutations([mutation_ids[i] for i in chosen])
+
+    def _select_top_k(self, fitness, k):
+        # Partial selection: O(n) to find the k best instead of sorting every candidate
+        if k >= len(fitness):
+            return np.arange(len(fitness))
+        candidates = np.argpartition(-fitness, k - 1)[:k]
+        return np.sort(candidates)
+
+    def _select_tournament(self, fitness, k):
+        # k tournaments of tournament_size random entrants, each won by its fittest entrant;
+        # earlier winners cannot enter again, so a mutation is never recombined with itself
+        remaining = np.arange(len(fitness))
+        winners = []
+        for _ in range(k):
+            entrants = remaining[self.rng.integers(0, len(remaining), size=self.tournament_size)]
+            winner = entrants[np.argmax(fitness[entrants])]
+            winners.append(winner)
+            remaining = remaining[remaining != winner]
+        return np.array(winners, dtype=np.intp)
+
+    def _select_roulette(self, fitness, k):
+        # Fitness-proportional draw without replacement
+        weights = np.clip(fitness, 0, None)
+        positive = np.flatnonzero(weights > 0)
+        if len(positive) >= k:
+            return self.rng.choice(len(fitness), size=k, replace=False, p=weights / weights.sum())
+        # Too few candidates with any weight: take them all, the fittest of the rest fill up
+        rest = np.flatnonzero(weights <= 0)
+        fill = rest[np.argsort(-fitness[rest], kind='stable')[:k - len(positive)]]
+        return np.concatenate([self.rng.permutation(positive), fill])
+
+    def _inherit(self, mutation_ids, fitness):
+        stored_success_rates = getattr(self.scorer, 'stored_success_rates', None)
+        if not self.inheritance_weight or stored_success_rates is None:
+            return fitness
+        stored = stored_success_rates(mutation_ids)
+        known = ~np.isnan(stored)
+        if not known.any():
+            return fitness
+        blended = fitness.copy()
+        blended[known] += self.inheritance_weight * (stored[known] - fitness[known])
+        return blended
+
+    def _fitness(self, mutation_ids, market_data):
+        memo = self._snapshot_memo()
+        fitness = np.array([memo.get(id, np.nan) for id in mutation_ids])
+        missing = np.flatnonzero(np.isnan(fitness))
+        if len(missing):
+            rows = market_data if len(missing) == len(mutation_ids) else self._rows(market_data, missing, len(mutation_ids))
+            scored = self.scorer.calculate_fitness_batch([mutation_ids[i] for i in missing], rows)
+            fitness[missing] = scored
+            memo.update(zip((mutation_ids[i] for i in missing), scored.tolist()))
+        return fitness
+
+    def _snapshot_memo(self):
+        if self.market_snapshot is None:
+            # Nothing tells two market_data apart cheaply, so every call rescores
+            return {}
+        key = self.market_snapshot.generation
+        memo = self._fitness_memo.get(key)
+        if memo is None:
+            memo = self._fitness_memo[key] = {}
+            while len(self._fitness_memo) > self.memo_snapshots:
+                self._fitness_memo.popitem(last=False)
+        else:
+            self._fitness_memo.move_to_end(key)
+        return memo
+
+    def _rows(self, market_data, rows, size):
+        # Subset of the columnar market data for the given candidate rows
+        subset = {}
+        for name in self._column_names(market_data):
+            column = np.asarray(market_data[name], dtype=np.float64)
+            subset[name] = column[rows] if column.shape == (size,) else column
+        return subset
+
+    def _column_names(self, market_data):
+        names = getattr(getattr(market_data, 'dtype', None), 'names', None)
+        return list(names) if names else list(market_data.keys())
+
+    def _fetch_mutations(self, mutation_ids):
+        # Prefer the bulk lookup when the backing store provides one
+        get_mutations = getattr(self, 'get_mutations', None)
+        if get_mutations is not None:
+            return list(get_mutations(mutation_ids))
+        return [self.get_mutation(id) for id in mutation_ids]
 
 class GeneticOptimizer:
+    DEFAULT_WEIGHTS = (0.4, 0.3, 0.3)
+
     def optimize_recombination(self, parent_genes, market_conditions):
         """
         Optimize genetic recombination using market-adaptive weights
@@ -71,10 +219,55 @@ class GeneticOptimizer:
         
         return normalized_weights 
 
+    def optimize_recombination_batch(self, volatility, holder_count, success_rates):
+        """
+        Vectorized optimize_recombination over N parent sets:
+        - volatility and holder_count are length-N arrays (scalars broadcast)
+        - success_rates is an (N, parents) array, or (N,) precomputed sums
+        Returns an (N, 3) weight matrix. Rows whose raw weights do not sum to a
+        positive finite total fall back to DEFAULT_WEIGHTS.
+        """
+        success = np.asarray(success_rates, dtype=np.float64)
+        if success.ndim == 2:
+            success = success.sum(axis=1)
+        volatility, holder_count, success = np.broadcast_arrays(
+            np.asarray(volatility, dtype=np.float64),
+            np.asarray(holder_count, dtype=np.float64),
+            success
+        )
+
+        volatility_factor = volatility * 0.2
+        with np.errstate(divide='ignore', invalid='ignore'):
+            holder_factor = np.log(holder_count) * 0.1
+        success_bonus = success * 0.05
+
+        weights = np.empty((volatility.size, 3))
+        weights[:, 0] = (0.4 + volatility_factor - holder_factor + success_bonus).ravel()
+        weights[:, 1] = (0.3 - volatility_factor + holder_factor).ravel()
+        weights[:, 2] = (0.3 + holder_factor - success_bonus).ravel()
+
+        with np.errstate(invalid='ignore'):
+            total = weights.sum(axis=1)
+        valid = np.isfinite(total) & (total > 0)
+        weights[valid] /= total[valid, np.newaxis]
+        weights[~valid] = self.DEFAULT_WEIGHTS
+        return weights
+
 # Genetic recombination algorithm
-def recombine_genes(parent1, parent2):
+def recombine_genes(parent1, parent2, method='single_point', mutation_rate=0.01, rng=None):
     """
     Perform gene crossover and mutation
+    Parents are equal-length base sequences (str or list of 'A', 'C', 'G', 'T');
+    the child has the same type. Whole populations go through
+    dna.recombine_population on packed arrays instead.
     """
-    # Implementation of recombine_genes method
-    pass 
\ No newline at end of file
+    if len(parent1) != len(parent2):
+        raise ValueError(f"Parents differ in length: {len(parent1)} vs {len(parent2)}")
+    length = len(parent1)
+    child = dna.recombine_population(
+        dna.pack(dna.encode(parent1)),
+        dna.pack(dna.encode(parent2)),
+        length, method, mutation_rate, rng
+    )[0]
+    sequence = dna.decode(dna.unpack(child, length))
+    return sequence if isinstance(parent1, str) else list(sequence) 
\ No newline at end of file
@@ -0,0 +1,218 @@
+from collections import deque
+
+import numpy as np
+
+class GovernanceHistory:
+    """
+    Columnar governance history with bounded retention:
+    - block, min_duration, quorum and delay live in uint64 ring buffers;
+      only the latest `retention` changes are kept
+    - Rolling mean/min/max and EWMA per parameter are updated on append
+      for each window size (in changes), so trend queries are O(1)
+    - A change that leaves a parameter more than its alert threshold away
+      (relative) from where the window started is recorded in alerts
+    Indexing is by on-chain history position: len() counts every change
+    ever appended, and evicted positions raise IndexError.
+    """
+    FIELDS = ('block', 'min_duration', 'quorum', 'delay')
+    PARAMS = ('min_duration', 'quorum', 'delay')
+
+    def __init__(self, retention=10000, windows=(10, 100, 1000), alert_thresholds=None, max_alerts=1000):
+        windows = tuple(sorted(set(windows)))
+        if windows and windows[-1] > retention:
+            raise ValueError(f"Window {windows[-1]} exceeds retention {retention}")
+        self.retention = retention
+        self.windows = windows
+        # param -> max relative change within a window before alerting
+        self.alert_thresholds = dict(alert_thresholds or {})
+        self.alerts = deque(maxlen=max_alerts)
+        self._columns = {field: np.zeros(retention, dtype=np.uint64) for field in self.FIELDS}
+        self._total = 0
+        # First position covered by the rolling windows; moves only on truncate()
+        self._base = 0
+        self._rolling = {window: _RollingWindow(window, self.PARAMS) for window in windows}
+
+    def __len__(self):
+        return self._total
+
+    def __iter__(self):
+        for index in range(self.first_index, self._total):
+            yield self._entry(index)
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            start, stop, step = key.indices(self._total)
+            return [self._entry(index) for index in range(max(start, self.first_index), stop, step)]
+        index = key + self._total if key < 0 else key
+        if not self.first_index <= index < self._total:
+            raise IndexError(f"History position {key} is not retained")
+        return self._entry(index)
+
+    def __eq__(self, other):
+        if isinstance(other, (list, GovernanceHistory)):
+            return list(self) == list(other)
+        return NotImplemented
+
+    @property
+    def first_index(self):
+        # Oldest position still retained
+        return max(self._total - self.retention, 0)
+
+    def append(self, entry):
+        """Record one change; returns the alerts it raised"""
+        self._add(entry)
+        raised = []
+        for window in self._rolling:
+            raised.extend(self._check_alerts(window, entry['block']))
+        self.alerts.extend(raised)
+        return raised
+
+    def extend(self, entries):
+        raised = []
+        for entry in entries:
+            raised.extend(self.append(entry))
+        return raised
+
+    def restore(self, entries, start=0):
+        """
+        Reload entries that begin at history position start, e.g. the tail
+        of a checkpoint log. They were checked when first appended, so no
+        alerts are raised; only the last `retention` entries are kept.
+        """
+        if self._total:
+            raise ValueError("Can only restore into an empty history")
+        entries = list(entries)
+        skipped = max(len(entries) - self.retention, 0)
+        self._total = self._base = start + skipped
+        for entry in entries[skipped:]:
+            self._add(entry)
+
+    def truncate(self, length):
+        """
+        Drop every position from length onwards (chain reorg rollback) and
+        return the dropped entries. Rolling windows are rebuilt from the
+        retained entries, so this is O(retention) and meant to be rare.
+        """
+        if length >= self._total:
+            return []
+        if length < self.first_index:
+            raise ValueError(f"Cannot roll back to position {length}, oldest retained is {self.first_index}")
+        dropped = [self._entry(index) for index in range(length, self._total)]
+        kept = [self._entry(index) for index in range(self.first_index, length)]
+
+        self._total = self._base = self.first_index
+        self._rolling = {window: _RollingWindow(window, self.PARAMS) for window in self.windows}
+        for entry in kept:
+            self._add(entry)
+        return dropped
+
+    def _add(self, entry):
+        index = self._total
+        slot = index % self.retention
+        values = {param: int(entry[param]) for param in self.PARAMS}
+        for window, rolling in self._rolling.items():
+            # Read the value leaving the window before its slot can be reused
+            leaving = None
+            if index - window >= self._base:
+                leaving_slot = (index - window) % self.retention
+                leaving = {param: int(self._columns[param][leaving_slot]) for param in self.PARAMS}
+            rolling.update(index, values, leaving)
+
+        for field in self.FIELDS:
+            self._columns[field][slot] = entry[field]
+        self._total += 1
+
+    def column(self, field):
+        """Retained values of one field, oldest first, as a uint64 array"""
+        order = np.arange(self.first_index, self._total) % self.retention
+        return self._columns[field][order]
+
+    def trend(self, param, window):
+        """
+        Rolling view of one parameter over the last `window` changes:
+        mean, min, max, ewma, change (latest minus the window's first value)
+        and rate (change per block across the window).
+        """
+        if self._total == 0:
+            return None
+        rolling = self._rolling[window]
+        latest = self._total - 1
+        first = max(self._total - window, self._base)
+        change = self._value(param, latest) - self._value(param, first)
+        blocks = self._value('block', latest) - self._value('block', first)
+        return {
+            'mean': rolling.sums[param] / min(self._total - self._base, window),
+            'min': rolling.minimum(param),
+            'max': rolling.maximum(param),
+            'ewma': rolling.ewma[param],
+            'change': change,
+            'rate': change / blocks if blocks > 0 else 0.0
+        }
+
+    def trends(self):
+        return {
+            window: {param: self.trend(param, window) for param in self.PARAMS}
+            for window in self.windows
+        }
+
+    def _check_alerts(self, window, block):
+        alerts = []
+        latest = self._total - 1
+        for param, threshold in self.alert_thresholds.items():
+            # Only the change that moved the parameter alerts, not every later one
+            if latest == self._base or self._value(param, latest) == self._value(param, latest - 1):
+                continue
+            trend = self.trend(param, window)
+            base = self._value(param, max(self._total - window, self._base))
+            relative = abs(trend['change']) / max(base, 1)
+            if relative > threshold:
+                alerts.append({
+                    'block': block,
+                    'param': param,
+                    'window': window,
+                    'change': trend['change'],
+                    'relative_change': relative
+                })
+        return alerts
+
+    def _value(self, field, index):
+        return int(self._columns[field][index % self.retention])
+
+    def _entry(self, index):
+        slot = index % self.retention
+        return {field: int(self._columns[field][slot]) for field in self.FIELDS}
+
+class _RollingWindow:
+    # Sum, monotonic min/max queues and EWMA for one window size
+    def __init__(self, size, params):
+        self.size = size
+        self.alpha = 2 / (size + 1)
+        self.sums = {param: 0 for param in params}
+        self.ewma = {param: None for param in params}
+        self._mins = {param: deque() for param in params}
+        self._maxes = {param: deque() for param in params}
+
+    def update(self, index, values, leaving):
+        for param, value in values.items():
+            self.sums[param] += value - (leaving[param] if leaving else 0)
+            previous = self.ewma[param]
+            self.ewma[param] = float(value) if previous is None else previous + self.alpha * (value - previous)
+            # Monotonic queues: the front is the window's min (max), popped once it ages out
+            mins = self._mins[param]
+            while mins and mins[-1][1] >= value:
+                mins.pop()
+            mins.append((index, value))
+            if mins[0][0] <= index - self.size:
+                mins.popleft()
+            maxes = self._maxes[param]
+            while maxes and maxes[-1][1] <= value:
+                maxes.pop()
+            maxes.append((index, value))
+            if maxes[0][0] <= index - self.size:
+                maxes.popleft()
+
+    def minimum(self, param):
+        return self._mins[param][0][1]
+
+    def maximum(self, param):
+        return self._maxes[param][0][1]
@@ -1,24 +1,360 @@
+import os
+import queue
+import re
+import struct
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from ai_oracle.governance_history import GovernanceHistory
+from ai_oracle.instrumentation import METRICS
+
+# JSON-RPC "method not found", and the messages providers use for it
+_METHOD_NOT_FOUND = -32601
+_UNSUPPORTED = re.compile(r'not supported|method not found|does not exist|not available', re.IGNORECASE)
+
+# Ends a head stream, or wakes its subscription for unsubscribe()
+_STREAM_END = object()
+
 class GovernanceWatcher:
-    def __init__(self, contract):
+    # block, min_duration, quorum, delay as little-endian uint64
+    CHECKPOINT_RECORD = struct.Struct('<4Q')
+
+    EVENT = 'GovernanceUpdated'
+
+    def __init__(self, contract, checkpoint_path=None, max_workers=8, batch_size=256, multicall=None, history=None,
+                 web3=None, confirmations=12, max_log_range=2000):
         self.contract = contract
-        self.history = []
-        
+        # Columnar, bounded; len() still counts every on-chain entry seen
+        self.history = history if history is not None else GovernanceHistory()
+        self.checkpoint_path = checkpoint_path
+        self.max_workers = max_workers
+        self.batch_size = batch_size
+        # Optional callable that executes a list of contract calls in one round-trip
+        self.multicall = multicall
+        # Event mode needs block access; web3.py contracts carry their provider as .w3
+        self.web3 = web3 if web3 is not None else getattr(contract, 'w3', None)
+        # Blocks a change must be buried under before it is no longer re-checked for reorgs
+        self.confirmations = confirmations
+        # Blocks per eth_getLogs request, so catching up after downtime stays within provider limits
+        self.max_log_range = max_log_range
+        self.on_rollback = None
+        self.stats = {'events': 0, 'reorgs': 0, 'rolled_back': 0, 'polls': 0, 'errors': 0}
+        METRICS.register_stats('governance_watcher', self.stats, owner=self)
+        self._events_available = self.web3 is not None and hasattr(contract, 'events')
+        self._next_block = None
+        # (block number, block hash, history length after that block), oldest first;
+        # the first checkpoint is final and the rest are still within the reorg window
+        self._block_checkpoints = []
+        self._stop = threading.Event()
+        self._subscriber = None
+        self._heads = None
+        self._sync_lock = threading.Lock()
+        if checkpoint_path:
+            self._load_checkpoint()
+
     def watch_changes(self):
-        latest = self.contract.functions.governanceHistoryLength().call()
+        latest = self._history_length()
         if latest > len(self.history):
             new_entries = latest - len(self.history)
-            for i in range(new_entries):
-                index = len(self.history) + i
-                change = self.contract.functions.governanceHistory(index).call()
-                self.history.append({
-                    'block': change[0],
-                    'min_duration': change[1],
-                    'quorum': change[2],
-                    'delay': change[3]
-                })
+            self.backfill(latest)
             return self.history[-new_entries:]
         return []
-    
+
+    def sync_events(self):
+        """
+        Event mode: record GovernanceUpdated logs from every block since the
+        last call, the moment the block is seen.
+        - Changes newer than `confirmations` blocks stay revocable: if the
+          chain reorganises under them they are rolled back out of history
+          (and the checkpoint log) and the replacement blocks are re-read
+        - An idle call costs two block lookups, not a contract call
+        - Logs are read max_log_range blocks at a time; a failed request
+          raises after the ranges before it are recorded, and the next call
+          resumes from there
+        Falls back to polling watch_changes() only when the contract or
+        provider offers no event logs at all.
+        """
+        # monitor() and a subscription thread may both sync; one at a time
+        with self._sync_lock:
+            if not self._events_available:
+                return self.watch_changes()
+            start = len(self.history)
+            head = self._block_number()
+            if self._next_block is None:
+                self._anchor(head)
+            self._check_reorg(head)
+            # Entries re-read after a rollback count as new
+            start = min(start, len(self.history))
+            if head < self._next_block:
+                return self.history[start:]
+            for from_block in range(self._next_block, head + 1, self.max_log_range):
+                to_block = min(from_block + self.max_log_range - 1, head)
+                try:
+                    logs = self._get_logs(from_block, to_block)
+                except Exception as exc:
+                    # Rate limits and other RPC errors are retried by the next call
+                    if not _logs_unsupported(exc):
+                        raise
+                    self._events_available = False
+                    return self.history[start:] + self.watch_changes()
+                self._record_logs(logs, to_block)
+            self._finalize(head)
+            return self.history[start:]
+
+    def _record_logs(self, logs, to_block):
+        by_block = {}
+        for log in sorted(logs, key=lambda log: (log['blockNumber'], log['logIndex'])):
+            args = log['args']
+            self._record([(args['timestamp'], args['newMinDuration'], args['newQuorum'], args['newDelay'])])
+            self.stats['events'] += 1
+            by_block[log['blockNumber']] = (log['blockHash'], len(self.history))
+
+        for number, (block_hash, length) in sorted(by_block.items()):
+            self._block_checkpoints.append((number, block_hash, length))
+        if to_block not in by_block:
+            self._block_checkpoints.append((to_block, self._block_hash(to_block), len(self.history)))
+        self._next_block = to_block + 1
+
+    def subscribe(self, callback, poll_interval=1.0, new_blocks=None):
+        """
+        Push changes to callback(changes) from a background thread as blocks land.
+        new_blocks is an optional iterable yielding on every new block (e.g. a
+        websocket newHeads subscription); without it the head is polled every
+        poll_interval seconds and the logs are only read once it moves.
+        A failed sync is counted in stats['errors'] and retried on the next block.
+        """
+        if self._subscriber is not None and self._subscriber.is_alive():
+            raise RuntimeError("Watcher already has a subscriber")
+        self._stop.clear()
+        self._heads = queue.Queue() if new_blocks is not None else None
+        self._subscriber = threading.Thread(
+            target=self._run_subscription,
+            args=(callback, poll_interval, new_blocks, self._heads),
+            name='governance-events',
+            daemon=True
+        )
+        self._subscriber.start()
+        return self._subscriber
+
+    def unsubscribe(self):
+        self._stop.set()
+        if self._heads is not None:
+            self._heads.put(_STREAM_END)
+            self._heads = None
+        if self._subscriber is not None:
+            self._subscriber.join()
+            self._subscriber = None
+
+    def _run_subscription(self, callback, poll_interval, new_blocks, heads):
+        if new_blocks is not None:
+            # Heads are read on a helper thread, so a stalled stream cannot hold up unsubscribe()
+            threading.Thread(
+                target=self._read_heads, args=(new_blocks, heads), name='governance-heads', daemon=True
+            ).start()
+            ended = False
+            while not ended and not self._stop.is_set():
+                # Heads that landed during the last delivery are covered by one sync
+                received = [heads.get()]
+                while not heads.empty():
+                    received.append(heads.get_nowait())
+                ended = any(head is _STREAM_END for head in received)
+                if not self._stop.is_set() and any(head is not _STREAM_END for head in received):
+                    self._deliver(callback)
+            return
+
+        last_head = None
+        while not self._stop.is_set():
+            self.stats['polls'] += 1
+            head = self._block_number() if self._events_available else None
+            if head is None or head != last_head:
+                last_head = head
+                self._deliver(callback)
+            self._stop.wait(poll_interval)
+
+    def _read_heads(self, new_blocks, heads):
+        # Stops at the first head after unsubscribe(); a stalled stream just leaves this daemon waiting
+        try:
+            for head in new_blocks:
+                if self._stop.is_set():
+                    break
+                heads.put(head)
+        finally:
+            heads.put(_STREAM_END)
+
+    def _deliver(self, callback):
+        try:
+            changes = self.sync_events()
+        except Exception:
+            # Transient RPC failures must not end the subscription
+            self.stats['errors'] += 1
+            return
+        if changes:
+            callback(changes)
+
+    def _anchor(self, head):
+        # Start from the last final block; history up to it comes from backfill()
+        final = max(head - self.confirmations, 0)
+        length = self._history_length(final)
+        if len(self.history) > length:
+            self._rollback(length)
+        self.backfill(length)
+        self._block_checkpoints = [(final, self._block_hash(final), len(self.history))]
+        self._next_block = final + 1
+
+    def _check_reorg(self, head):
+        # A block hash commits to all its ancestors, so an unchanged latest hash means no reorg
+        if self._still_canonical(self._block_checkpoints[-1], head):
+            return
+        self.stats['reorgs'] += 1
+        kept = 1
+        for index in range(len(self._block_checkpoints) - 2, 0, -1):
+            if self._still_canonical(self._block_checkpoints[index], head):
+                kept = index + 1
+                break
+        # Deeper than the confirmation window: the final checkpoint is the best we have
+        del self._block_checkpoints[kept:]
+        number, _, length = self._block_checkpoints[-1]
+        self._rollback(length)
+        self._next_block = number + 1
+
+    def _still_canonical(self, checkpoint, head):
+        # Blocks above the head were dropped by a reorg onto a shorter chain
+        number, block_hash, _ = checkpoint
+        return number <= head and self._block_hash(number) == block_hash
+
+    def _finalize(self, head):
+        final = [checkpoint for checkpoint in self._block_checkpoints if checkpoint[0] <= head - self.confirmations]
+        if len(final) > 1:
+            del self._block_checkpoints[:len(final) - 1]
+
+    def _rollback(self, length):
+        removed = self.history.truncate(length)
+        if not removed:
+            return
+        self.stats['rolled_back'] += len(removed)
+        if self.checkpoint_path and os.path.exists(self.checkpoint_path):
+            with open(self.checkpoint_path, 'r+b') as log:
+                log.truncate(length * self.CHECKPOINT_RECORD.size)
+                log.flush()
+                os.fsync(log.fileno())
+        if self.on_rollback is not None:
+            self.on_rollback(removed)
+
+    @METRICS.timed('rpc_seconds', method='blockNumber')
+    def _block_number(self):
+        return self.web3.eth.block_number
+
+    @METRICS.timed('rpc_seconds', method='getBlock')
+    def _block_hash(self, number):
+        return self.web3.eth.get_block(number)['hash']
+
+    @METRICS.timed('rpc_seconds', method='getLogs')
+    def _get_logs(self, from_block, to_block):
+        event = getattr(self.contract.events, self.EVENT)
+        return event.get_logs(fromBlock=from_block, toBlock=to_block)
+
+    def backfill(self, latest=None):
+        """
+        Catch up to the on-chain history length:
+        - Pulls batch_size entries per round, concurrently or via multicall
+        - Appends each completed batch to the checkpoint log in order
+        Returns the number of entries fetched.
+        """
+        if latest is None:
+            latest = self._history_length()
+        start = len(self.history)
+        if latest <= start:
+            return 0
+
+        if latest - start == 1 and self.multicall is None:
+            self._record([self._fetch_change(start)])
+            return 1
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            for batch_start in range(start, latest, self.batch_size):
+                batch_end = min(batch_start + self.batch_size, latest)
+                self._record(self._fetch_batch(pool, batch_start, batch_end))
+        return latest - start
+
+    def _fetch_batch(self, pool, start, end):
+        if self.multicall is not None:
+            calls = [self.contract.functions.governanceHistory(i) for i in range(start, end)]
+            with METRICS.timer('rpc_seconds', method='multicall'):
+                return list(self.multicall(calls))
+
+        # Split the batch across workers, results come back in index order
+        return list(pool.map(self._fetch_change, range(start, end)))
+
+    @METRICS.timed('rpc_seconds', method='governanceHistoryLength')
+    def _history_length(self, block=None):
+        call = self.contract.functions.governanceHistoryLength()
+        if block is None:
+            return call.call()
+        return call.call(block_identifier=block)
+
+    @METRICS.timed('rpc_seconds', method='governanceHistory')
+    def _fetch_change(self, index):
+        return self.contract.functions.governanceHistory(index).call()
+
+    def _record(self, changes):
+        entries = [
+            {
+                'block': change[0],
+                'min_duration': change[1],
+                'quorum': change[2],
+                'delay': change[3]
+            }
+            for change in changes
+        ]
+        if self.checkpoint_path:
+            self._append_checkpoint(entries)
+        self.history.extend(entries)
+
+    def _append_checkpoint(self, entries):
+        record = self.CHECKPOINT_RECORD
+        with open(self.checkpoint_path, 'ab') as log:
+            log.write(b''.join(
+                record.pack(e['block'], e['min_duration'], e['quorum'], e['delay'])
+                for e in entries
+            ))
+            log.flush()
+            os.fsync(log.fileno())
+
+    def _load_checkpoint(self):
+        if not os.path.exists(self.checkpoint_path):
+            return
+
+        record = self.CHECKPOINT_RECORD
+        # Record i is history position i, so rollbacks can truncate by offset;
+        # only the last `retention` records are read back
+        size = os.path.getsize(self.checkpoint_path)
+        count = size // record.size
+        if count * record.size != size:
+            # Drop a torn trailing record left by an interrupted write
+            with open(self.checkpoint_path, 'r+b') as log:
+                log.truncate(count * record.size)
+
+        start = max(count - self.history.retention, 0)
+        with open(self.checkpoint_path, 'rb') as log:
+            log.seek(start * record.size)
+            data = log.read((count - start) * record.size)
+
+        self.history.restore((
+            {
+                'block': block,
+                'min_duration': min_duration,
+                'quorum': quorum,
+                'delay': delay
+            }
+            for block, min_duration, quorum, delay in record.iter_unpack(data)
+        ), start)
+
+    def rolling_trends(self, window=None):
+        # Windowed mean/min/max/EWMA and rate of change, maintained on append
+        if window is None:
+            return self.history.trends()
+        return {param: self.history.trend(param, window) for param in self.history.PARAMS}
+
     def analyze_trends(self):
         if len(self.history) < 2:
             return None
@@ -30,4 +366,16 @@ class GovernanceWatcher:
             'duration_trend': latest['min_duration'] - previous['min_duration'],
             'quorum_trend': latest['quorum'] - previous['quorum'],
             'delay_trend': latest['delay'] - previous['delay']
-        } 
\ No newline at end of file
+        } 
+
+
+def _logs_unsupported(exc):
+    # Only a missing event ABI or a missing eth_getLogs disables event mode for good
+    if isinstance(exc, (AttributeError, NotImplementedError)):
+        return True
+    if not isinstance(exc, ValueError):
+        return False
+    error = exc.args[0] if exc.args else None
+    if isinstance(error, dict):
+        return error.get('code') == _METHOD_NOT_FOUND or bool(_UNSUPPORTED.search(str(error.get('message', ''))))
+    return bool(_UNSUPPORTED.search(str(exc)))
@@ -0,0 +1,355 @@
+import functools
+import os
+import re
+import sys
+import threading
+import time
+import weakref
+from bisect import bisect_left
+from collections import Counter
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Prometheus default latency buckets, in seconds
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_INVALID_NAME = re.compile(r'[^a-zA-Z0-9_]')
+
+class Histogram:
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+
+    @property
+    def count(self):
+        return sum(self.counts)
+
+class Metrics:
+    """
+    Process-wide metrics with Prometheus text export:
+    - timer()/timed() feed latency histograms and count() feeds counters;
+      both return immediately while the registry is disabled
+    - Components that already keep a stats dict or a depth callable are
+      registered once and read only when scraped, so they cost nothing
+      on the hot path; every live instance of a component is summed under
+      one name and held only weakly, see register_stats
+    - A sampling profiler can be started and stopped at runtime
+    """
+    def __init__(self, namespace='evolve', enabled=False):
+        self.namespace = namespace
+        self.enabled = enabled
+        self.profiler = SamplingProfiler()
+        self._histograms = {}
+        self._counters = {}
+        self._stats = {}
+        self._gauges = {}
+        self._lock = threading.Lock()
+
+    def enable(self):
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+            self._counters.clear()
+            self._stats.clear()
+            self._gauges.clear()
+
+    def timer(self, name, **labels):
+        if not self.enabled:
+            return _NULL_TIMER
+        return self._timed_block(name, labels)
+
+    def timed(self, name, **labels):
+        """Decorator recording each call's latency, and errors as a counter"""
+        def decorate(fn):
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return fn(*args, **kwargs)
+                with self._timed_block(name, labels):
+                    return fn(*args, **kwargs)
+            return wrapper
+        return decorate
+
+    def observe(self, name, value, **labels):
+        if self.enabled:
+            self._histogram(name, labels).observe(value)
+
+    def count(self, name, amount=1, **labels):
+        if not self.enabled:
+            return
+        key = (name, _label_key(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def register_stats(self, prefix, stats, owner=None, **labels):
+        """
+        Export a component's stats dict as counters, e.g. prompt_cache_hits_total.
+        Components pass themselves as owner: the stats of every live owner
+        are summed, and an owner drops out once collected or unregistered.
+        Without an owner the stats replace any earlier owner-less ones.
+        """
+        self._register(self._stats, (prefix, _label_key(labels)), owner, stats)
+
+    def register_gauge(self, name, read, owner=None, **labels):
+        """
+        Called at scrape time, e.g. a queue depth: read(owner) for each live
+        owner, summed, so read must not hold the owner itself; read() without one
+        """
+        if owner is None:
+            read = functools.partial(_read_static, read)
+        self._register(self._gauges, (name, _label_key(labels)), owner, read)
+
+    def unregister(self, owner):
+        """Drop an owner's stats and gauges, e.g. when the component closes"""
+        with self._lock:
+            for sources in (self._stats, self._gauges):
+                for key, owners in list(sources.items()):
+                    owners.pop(owner, None)
+                    if not owners:
+                        del sources[key]
+
+    def _register(self, sources, key, owner, value):
+        with self._lock:
+            owners = sources.get(key)
+            if owners is None:
+                owners = sources[key] = weakref.WeakKeyDictionary()
+            owners[_STATIC if owner is None else owner] = value
+
+    def render(self):
+        """Prometheus text exposition format"""
+        with self._lock:
+            histograms = list(self._histograms.items())
+            counters = list(self._counters.items())
+            # Owners collected since registration are already gone from these
+            stats = [(key, list(owners.items())) for key, owners in self._stats.items() if owners]
+            gauges = [(key, list(owners.items())) for key, owners in self._gauges.items() if owners]
+
+        lines = []
+        typed = set()
+        for (name, labels), histogram in sorted(histograms, key=_sort_key):
+            metric = self._metric_name(name)
+            self._declare(lines, typed, metric, 'histogram')
+            cumulative = 0
+            bounds = [_format_value(bound) for bound in histogram.buckets] + ['+Inf']
+            for bound, count in zip(bounds, list(histogram.counts)):
+                cumulative += count
+                lines.append(f"{metric}_bucket{_format_labels(labels + (('le', bound),))} {cumulative}")
+            lines.append(f"{metric}_sum{_format_labels(labels)} {_format_value(histogram.sum)}")
+            lines.append(f"{metric}_count{_format_labels(labels)} {cumulative}")
+
+        totals = [((name, labels), value) for (name, labels), value in counters]
+        for (prefix, labels), owners in stats:
+            summed = Counter()
+            for _, values in owners:
+                summed.update(dict(values))
+            for key, value in summed.items():
+                totals.append(((f"{prefix}_{key}", labels), value))
+        for (name, labels), value in sorted(totals, key=_sort_key):
+            metric = self._metric_name(name) + '_total'
+            self._declare(lines, typed, metric, 'counter')
+            lines.append(f"{metric}{_format_labels(labels)} {_format_value(value)}")
+
+        for (name, labels), owners in sorted(gauges, key=_sort_key):
+            values = []
+            for owner, read in owners:
+                try:
+                    values.append(read(owner))
+                except Exception:
+                    # A failing gauge must not break the whole scrape
+                    continue
+            metric = self._metric_name(name)
+            self._declare(lines, typed, metric, 'gauge')
+            if values:
+                lines.append(f"{metric}{_format_labels(labels)} {_format_value(sum(values))}")
+        return '\n'.join(lines) + '\n'
+
+    def serve(self, port=9464, host='127.0.0.1'):
+        """
+        Background HTTP endpoint:
+        - GET /metrics           Prometheus text
+        - GET /profile/start     start the sampling profiler
+        - GET /profile/stop      stop it and return collapsed stacks
+        - GET /profile           collapsed stacks collected so far
+        """
+        server = ThreadingHTTPServer((host, port), _handler_for(self))
+        thread = threading.Thread(target=server.serve_forever, args=(0.5,), name='metrics-server', daemon=True)
+        thread.start()
+        return server
+
+    @contextmanager
+    def _timed_block(self, name, labels):
+        started = time.perf_counter()
+        try:
+            yield
+        except Exception:
+            self.count(f"{name}_errors", **labels)
+            raise
+        finally:
+            self._histogram(name, labels).observe(time.perf_counter() - started)
+
+    def _histogram(self, name, labels):
+        key = (name, _label_key(labels))
+        histogram = self._histograms.get(key)
+        if histogram is None:
+            with self._lock:
+                histogram = self._histograms.setdefault(key, Histogram())
+        return histogram
+
+    def _metric_name(self, name):
+        return _INVALID_NAME.sub('_', f"{self.namespace}_{name}")
+
+    def _declare(self, lines, typed, metric, kind):
+        if metric not in typed:
+            typed.add(metric)
+            lines.append(f"# TYPE {metric} {kind}")
+
+class SamplingProfiler:
+    """
+    Statistical profiler for live processes: a daemon thread snapshots every
+    thread's stack each interval. Costs nothing until started.
+    collapsed() returns "frame;frame;frame count" lines for flame graphs.
+    """
+    def __init__(self, interval=0.005, max_depth=64):
+        self.interval = interval
+        self.max_depth = max_depth
+        self.samples = Counter()
+        self._stop = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        with self._lock:
+            if self.running:
+                return False
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='sampling-profiler', daemon=True)
+            self._thread.start()
+            return True
+
+    def stop(self):
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is None:
+            return False
+        self._stop.set()
+        thread.join()
+        return True
+
+    def clear(self):
+        with self._lock:
+            self.samples.clear()
+
+    def collapsed(self):
+        with self._lock:
+            samples = self.samples.most_common()
+        return ''.join(f"{';'.join(stack)} {count}\n" for stack, count in samples)
+
+    def _run(self):
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            stacks = [
+                self._stack(frame)
+                for ident, frame in sys._current_frames().items()
+                if ident != own
+            ]
+            with self._lock:
+                self.samples.update(stacks)
+
+    def _stack(self, frame):
+        stack = []
+        while frame is not None and len(stack) < self.max_depth:
+            code = frame.f_code
+            stack.append(f"{code.co_filename.rsplit('/', 1)[-1]}:{code.co_name}")
+            frame = frame.f_back
+        return tuple(reversed(stack))
+
+class _NullTimer:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+_NULL_TIMER = _NullTimer()
+
+class _Static:
+    # Owner of sources registered without one; lives as long as the module
+    pass
+
+_STATIC = _Static()
+
+def _read_static(read, owner):
+    return read()
+
+def _label_key(labels):
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+def _sort_key(item):
+    return item[0]
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    escaped = (
+        (key, value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+        for key, value in labels
+    )
+    return '{' + ','.join(f'{key}="{value}"' for key, value in escaped) + '}'
+
+def _format_value(value):
+    if isinstance(value, bool):
+        return str(int(value))
+    if isinstance(value, int):
+        return str(value)
+    return repr(float(value))
+
+def _handler_for(metrics):
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            path = self.path.split('?', 1)[0]
+            if path == '/metrics':
+                self._reply(metrics.render(), 'text/plain; version=0.0.4')
+            elif path == '/profile/start':
+                metrics.profiler.clear()
+                metrics.profiler.start()
+                self._reply('profiling\n')
+            elif path == '/profile/stop':
+                metrics.profiler.stop()
+                self._reply(metrics.profiler.collapsed())
+            elif path == '/profile':
+                self._reply(metrics.profiler.collapsed())
+            else:
+                self.send_error(404)
+
+        def _reply(self, text, content_type='text/plain'):
+            body = text.encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+# Shared by every component in the process; disabled unless EVOLVE_METRICS=1 or enable() is called
+METRICS = Metrics(enabled=os.environ.get('EVOLVE_METRICS') == '1')
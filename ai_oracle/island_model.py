@@ -0,0 +1,184 @@
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+class IslandModel:
+    """
+    Island-model genetic algorithm over AdaptiveFitnessCalculator genes:
+    - The population is split into islands that evolve independently on a
+      process pool: ranking selection, crossover, mutation and elitism
+    - Every migration_interval generations each island's elites replace
+      the worst genes of the next island (ring topology)
+    - Populations and migrants live in shared memory, so a job only
+      carries the island index, its rates and a seed
+    - mutation_rate, crossover_rate and selection_pressure come from
+      optimizer.evolve_parameters before each epoch, and the fitness
+      weights from the calculator's current market state
+    Island seeds derive from seed, so results do not depend on processes.
+    """
+    def __init__(self, fitness_calculator, optimizer, islands=4, island_size=256, migrants=4, elites=2,
+                 migration_interval=10, mutation_scale=0.1, bounds=(0.0, 1.0), processes=None):
+        if not 0 < migrants < island_size or not 0 <= elites < island_size:
+            raise ValueError(f"Migrants ({migrants}) and elites ({elites}) must be smaller than the island size ({island_size})")
+        self.calculator = fitness_calculator
+        self.optimizer = optimizer
+        self.islands = islands
+        self.island_size = island_size
+        self.migrants = migrants
+        self.elites = elites
+        self.migration_interval = migration_interval
+        self.mutation_scale = mutation_scale
+        self.bounds = bounds
+        # One worker per island up to the core count; 1 runs in-process
+        self.processes = processes if processes is not None else min(islands, os.cpu_count() or 1)
+
+    def run(self, generations=100, seed=None, population=None):
+        """
+        Evolve for the given number of generations.
+        population optionally seeds every island: (islands * island_size, factors)
+        rows in the calculator's factor order; otherwise genes start uniform
+        within bounds.
+        Returns the best gene, its fitness and per-epoch progress.
+        """
+        if generations < 1:
+            raise ValueError("At least one generation is required")
+        factors, _, _ = self.calculator.linear_form()
+        shape = (self.islands, self.island_size, len(factors))
+        init_seed, *island_seeds = np.random.SeedSequence(seed).spawn(self.islands + 1)
+        epochs = math.ceil(generations / self.migration_interval)
+        # One seed per island and epoch, fixed up front
+        epoch_seeds = [island_seed.spawn(epochs) for island_seed in island_seeds]
+
+        buffers = _IslandBuffers.create(self.islands, self.island_size, self.migrants, len(factors))
+        executor = ProcessPoolExecutor(max_workers=self.processes) if self.processes > 1 else None
+        try:
+            if population is None:
+                population = np.random.default_rng(init_seed).uniform(*self.bounds, size=shape)
+            buffers.population[:] = np.asarray(population, dtype=np.float64).reshape(shape)
+
+            progress = []
+            for epoch in range(epochs):
+                steps = min(self.migration_interval, generations - epoch * self.migration_interval)
+                # Market and rates are re-read once per epoch, islands share them
+                _, weights, scale = self.calculator.linear_form()
+                rates = self.optimizer.evolve_parameters(self._champions(buffers, factors, weights, scale))
+                jobs = [
+                    (buffers.spec, island, epoch, steps, rates, weights, scale,
+                     self.elites, self.mutation_scale, self.bounds, epoch_seeds[island][epoch])
+                    for island in range(self.islands)
+                ]
+                results = executor.map(_evolve_island, jobs) if executor else map(_evolve_island, jobs)
+                progress.append({'rates': rates, 'best_fitness': list(results)})
+
+            final = buffers.population.reshape(-1, len(factors)).copy()
+        finally:
+            if executor is not None:
+                executor.shutdown()
+            buffers.release()
+
+        fitness = _score(final, weights, scale)
+        best = int(np.argmax(fitness))
+        best_gene = dict(zip(factors, final[best].tolist()))
+        if 'burn_rate' in best_gene:
+            self.optimizer.update_genetic_pool({'burn_rate': best_gene['burn_rate'], 'mutation_rate': rates['mutation_rate']})
+        return {
+            'best_gene': best_gene,
+            'best_fitness': float(fitness[best]),
+            'epochs': progress,
+            'population': final
+        }
+
+    def _champions(self, buffers, factors, weights, scale):
+        # Best gene of each island, handed to evolve_parameters as the current genes
+        fitness = _score(buffers.population, weights, scale)
+        best = buffers.population[np.arange(self.islands), np.argmax(fitness, axis=1)]
+        return [dict(zip(factors, gene.tolist())) for gene in best]
+
+class _IslandBuffers:
+    """
+    One shared memory block: the island populations plus two migrant
+    areas, so islands write this epoch's emigrants while reading the last
+    epoch's without any locking
+    """
+    def __init__(self, spec, memory):
+        self.spec = spec
+        self.memory = memory
+        self.population, self.outbox = _views(memory.buf, *spec[1:])
+
+    @classmethod
+    def create(cls, islands, island_size, migrants, factors):
+        size = 8 * factors * islands * (island_size + 2 * migrants)
+        memory = shared_memory.SharedMemory(create=True, size=size)
+        return cls((memory.name, islands, island_size, migrants, factors), memory)
+
+    @classmethod
+    def attach(cls, spec):
+        return cls(spec, shared_memory.SharedMemory(name=spec[0]))
+
+    def close(self):
+        # Views must go before the mapping can be closed
+        self.population = self.outbox = None
+        self.memory.close()
+
+    def release(self):
+        self.close()
+        self.memory.unlink()
+
+def _views(buffer, islands, island_size, migrants, factors):
+    population = np.ndarray((islands, island_size, factors), dtype=np.float64, buffer=buffer)
+    outbox = np.ndarray(
+        (2, islands, migrants, factors), dtype=np.float64, buffer=buffer, offset=population.nbytes
+    )
+    return population, outbox
+
+def _score(genes, weights, scale):
+    return (genes @ np.asarray(weights, dtype=np.float64)) * scale
+
+def _ranking_probabilities(size, pressure):
+    # Linear ranking, best first: the best gene is drawn pressure / size of the time
+    pressure = min(max(pressure, 1.0), 2.0)
+    ranks = np.arange(size)
+    return (pressure - (2 * pressure - 2) * ranks / max(size - 1, 1)) / size
+
+def _evolve_island(job):
+    spec, island, epoch, steps, rates, weights, scale, elites, mutation_scale, bounds, seed = job
+    rng = np.random.default_rng(seed)
+    buffers = _IslandBuffers.attach(spec)
+    try:
+        genes = buffers.population[island].copy()
+        size, migrants = genes.shape[0], buffers.outbox.shape[2]
+        fitness = _score(genes, weights, scale)
+
+        if epoch > 0:
+            # Immigrants from the previous island replace the worst genes
+            worst = np.argpartition(fitness, migrants - 1)[:migrants]
+            genes[worst] = buffers.outbox[(epoch - 1) % 2, (island - 1) % buffers.outbox.shape[1]]
+            fitness[worst] = _score(genes[worst], weights, scale)
+
+        probabilities = _ranking_probabilities(size, rates['selection_pressure'])
+        offspring = size - elites
+        for _ in range(steps):
+            order = np.argsort(-fitness, kind='stable')
+            parents = order[rng.choice(size, size=(offspring, 2), p=probabilities)]
+            first, second = genes[parents[:, 0]], genes[parents[:, 1]]
+
+            # Arithmetic crossover with a random mix per child, otherwise a copy of the first parent
+            crossed = rng.random(offspring) < rates['crossover_rate']
+            mix = rng.random((offspring, 1))
+            children = np.where(crossed[:, np.newaxis], mix * first + (1 - mix) * second, first)
+
+            mutated = rng.random(children.shape) < rates['mutation_rate']
+            children += mutated * rng.normal(0, mutation_scale, children.shape)
+            np.clip(children, *bounds, out=children)
+
+            genes = np.concatenate([genes[order[:elites]], children])
+            fitness = _score(genes, weights, scale)
+
+        buffers.population[island] = genes
+        buffers.outbox[epoch % 2, island] = genes[np.argsort(-fitness, kind='stable')[:migrants]]
+        return float(fitness.max())
+    finally:
+        buffers.close()
@@ -1,46 +1,222 @@
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from ai_oracle import dna
+from ai_oracle.instrumentation import METRICS
+from ai_oracle.model_registry import ModelRegistry, RegistryModel
+from ai_oracle.prompt_cache import PromptCache
+from ai_oracle.sentiment_inference import SentimentInference
+from ai_oracle.similarity_index import symbol_shingles
+from ai_oracle.social_stream import SentimentAggregate, SocialStream
+
+# Shared by every engine in the process, each model loads on first use
+MODEL_REGISTRY = ModelRegistry()
+MODEL_REGISTRY.register('nlp_model', lambda: load_huggingface_model("microsoft/deberta-v3"))
+MODEL_REGISTRY.register('trend_analyzer', lambda: TrendAnalyzer())
+MODEL_REGISTRY.register('image_generator', lambda: StableDiffusionWrapper())
+MODEL_REGISTRY.register('community_analyzer', lambda: CommunityAnalyzer())
+MODEL_REGISTRY.register('symbol_mixer', lambda: SymbolMixer())
+
+# Marks a proposal rejected as a near-duplicate
+_DUPLICATE = object()
+
 class EvolutionEngine:
-    def __init__(self):
-        self.nlp_model = load_huggingface_model("microsoft/deberta-v3")
-        self.trend_analyzer = TrendAnalyzer()
-        self.image_generator = StableDiffusionWrapper()
-        self.community_analyzer = CommunityAnalyzer()
-        
-    def generate_mutations(self):
-        # 扩展社交媒体数据源
-        twitter_data = self.fetch_social_data({
-            'twitter': ['#memecoin', '#evolve', '#crypto'],
-            'telegram': ['evolve_official', 'evolve_trading'],
-            'discord': ['evolve-general', 'evolve-trading'],
-            'reddit': ['r/cryptocurrency', 'r/evolveprotocol']
-        })
+    # Default max concurrent calls per backend and seconds allowed for a whole cycle;
+    # raise diffusion to the number of renders the GPU backend can hold at once
+    BACKEND_CONCURRENCY = {'llm': 3, 'diffusion': 2}
+    STAGE_TIMEOUT = 300
+    # Diffusion steps for draft renders in preview mode
+    PREVIEW_STEPS = 8
+    # Symbols closer than this to one of the last NOVELTY_WINDOW proposals are rejected before
+    # rendering; a rejected symbol is re-prompted past the prompt cache SYMBOL_RETRIES times
+    NOVELTY_DISTANCE = 0.3
+    NOVELTY_WINDOW = 512
+    SYMBOL_RETRIES = 1
+
+    nlp_model = RegistryModel('nlp_model')
+    trend_analyzer = RegistryModel('trend_analyzer')
+    image_generator = RegistryModel('image_generator')
+    community_analyzer = RegistryModel('community_analyzer')
+
+    def __init__(self, models=None, warm_up=False, visual_cache=None, similarity_index=None, backend_concurrency=None):
+        self.models = models or MODEL_REGISTRY
+        self.prompt_cache = PromptCache()
+        # Scores each unique post once, in bounded batches, cached across cycles
+        self.sentiment_inference = SentimentInference(self._analyze_texts)
+        # Optional VisualDNACache shared by every render of this engine
+        self.visual_cache = visual_cache
+        self._pending_upgrades = {}
+        self._upgrade_lock = threading.Lock()
+        self._upgrade_pool = None
+        # Set by start_social_stream; generate_mutations then reads its snapshot
+        self.social_aggregate = None
+        # Optional SimilarityIndex of earlier proposals, keyed by symbol
+        self.similarity_index = similarity_index
+        self._novelty_lock = threading.Lock()
+        self._claimed = deque()
+        # backend_concurrency overrides BACKEND_CONCURRENCY per backend, e.g. {'diffusion': 4}
+        self.backend_limits = {
+            backend: threading.BoundedSemaphore(limit)
+            for backend, limit in {**self.BACKEND_CONCURRENCY, **(backend_concurrency or {})}.items()
+        }
+        if warm_up:
+            # Load models in the background so the first cycle does not pay for it
+            self.models.warm_up(background=True)
         
-        # 多维度情绪分析
-        sentiment = self.analyze_market_sentiment(twitter_data)
+    def generate_mutations(self, parallel=True):
+        if self.social_aggregate is not None:
+            # 流式模式：直接读取当前情绪快照 -> Streaming mode: read the live snapshot
+            sentiment = self.sentiment_snapshot()
+        else:
+            # 扩展社交媒体数据源
+            with METRICS.timer('stage_seconds', stage='fetch_social_data'):
+                twitter_data = self.fetch_social_data({
+                    'twitter': ['#memecoin', '#evolve', '#crypto'],
+                    'telegram': ['evolve_official', 'evolve_trading'],
+                    'discord': ['evolve-general', 'evolve-trading'],
+                    'reddit': ['r/cryptocurrency', 'r/evolveprotocol']
+                })
+
+            # 多维度情绪分析
+            sentiment = self.analyze_market_sentiment(twitter_data)
         
         # 生成三个差异化的突变提案
         mutations = []
         base_trends = ['aggressive', 'balanced', 'defensive']
+        if parallel:
+            return self.generate_mutations_parallel(sentiment, base_trends)
         
         for trend in base_trends:
             mutation = self.generate_single_mutation(sentiment, trend)
-            mutations.append(mutation)
+            if mutation is not None:
+                mutations.append(mutation)
         
         return mutations
 
+    def generate_mutations_parallel(self, sentiment, trends):
+        """
+        Fan every trend's symbol and visual sub-steps out at once:
+        - Each backend is capped by BACKEND_CONCURRENCY
+        - The whole fan-out must finish within STAGE_TIMEOUT seconds
+        Returns the same mutation dicts as generate_single_mutation. With a
+        similarity_index, each visual waits for its symbol and proposals that
+        stay near-duplicates after a re-prompt are dropped without rendering.
+        """
+        pool = ThreadPoolExecutor(max_workers=2 * len(trends), thread_name_prefix='mutation')
+        try:
+            jobs = []
+            for trend in trends:
+                if self.similarity_index is None:
+                    symbol = pool.submit(self._with_backend, 'llm', self.generate_evolved_symbol, sentiment, trend)
+                    visual_dna = pool.submit(self._with_backend, 'diffusion', self.generate_visual_mutation, sentiment, trend)
+                else:
+                    symbol = pool.submit(self._novel_symbol, sentiment, trend)
+                    visual_dna = pool.submit(self._visual_if_novel, symbol, sentiment, trend)
+                jobs.append((trend, symbol, visual_dna))
+
+            deadline = time.monotonic() + self.STAGE_TIMEOUT
+            mutations = []
+            for trend, symbol, visual_dna in jobs:
+                new_symbol = symbol.result(timeout=max(deadline - time.monotonic(), 0))
+                rendered = visual_dna.result(timeout=max(deadline - time.monotonic(), 0))
+                if new_symbol is _DUPLICATE or rendered is _DUPLICATE:
+                    continue
+                mutations.append(self._assemble_mutation(sentiment, trend, new_symbol, rendered))
+            return mutations
+        finally:
+            # Do not block the cycle on stragglers that already timed out
+            pool.shutdown(wait=False)
+
+    def _visual_if_novel(self, symbol, sentiment, trend):
+        if symbol.result(timeout=self.STAGE_TIMEOUT) is _DUPLICATE:
+            return _DUPLICATE
+        return self._with_backend('diffusion', self.generate_visual_mutation, sentiment, trend)
+
+    def _novel_symbol(self, sentiment, trend):
+        # An unchanged market context hits the prompt cache and returns the symbol
+        # already claimed last cycle, so retries skip the cache
+        for attempt in range(1 + self.SYMBOL_RETRIES):
+            options = {'refresh': True} if attempt else {}
+            symbol = self._with_backend('llm', self.generate_evolved_symbol, sentiment, trend, **options)
+            if self.claim_symbol(symbol):
+                return symbol
+        return _DUPLICATE
+
+    def claim_symbol(self, symbol):
+        """
+        Record symbol as proposed unless it is within NOVELTY_DISTANCE of one
+        of the last NOVELTY_WINDOW proposals. Returns False for near-duplicates.
+        """
+        if self.similarity_index is None:
+            return True
+        shingles = symbol_shingles(symbol)
+        # Check and insert together so concurrent trends cannot both claim a symbol
+        with self._novelty_lock:
+            if self.similarity_index.has_near(shingles, self.NOVELTY_DISTANCE):
+                return False
+            self.similarity_index.insert(symbol, shingles)
+            self._claimed.append(symbol)
+            while len(self._claimed) > self.NOVELTY_WINDOW:
+                self.similarity_index.remove(self._claimed.popleft())
+            return True
+
+    def _with_backend(self, backend, stage, *args, **kwargs):
+        with self.backend_limits[backend]:
+            with METRICS.timer('backend_seconds', backend=backend):
+                return stage(*args, **kwargs)
+
+    @METRICS.timed('stage_seconds', stage='analyze_market_sentiment')
     def analyze_market_sentiment(self, social_data):
+        return self._market_context(
+            self.sentiment_inference.mean_score(social_data['text']),
+            social_data['media']
+        )
+
+    def start_social_stream(self, sources, queue_size=1000, dedup_window=100000, batch_size=64):
+        """
+        Ingest social sources continuously instead of per cycle.
+        sources maps a name to a callable yielding {'text', 'media'} items;
+        sentiment aggregates update in the background as items arrive.
+        """
+        stream = SocialStream(sources, queue_size=queue_size, dedup_window=dedup_window)
+        self.social_aggregate = SentimentAggregate(self._score_texts, batch_size=batch_size)
+        self.social_aggregate.consume_in_background(stream)
+        return stream
+
+    def sentiment_snapshot(self):
+        social = self.social_aggregate.snapshot()
+        return self._market_context(social['recent_sentiment'], social['media'])
+
+    def _score_texts(self, texts):
+        return self.sentiment_inference.score(texts)
+
+    def _analyze_texts(self, texts):
+        return self.nlp_model.analyze(texts)
+
+    def _market_context(self, basic_sentiment, media):
         return {
-            'basic_sentiment': self.nlp_model.analyze(social_data['text']),
+            'basic_sentiment': basic_sentiment,
             'market_trend': self.trend_analyzer.analyze_market_data(),
             'community_engagement': self.community_analyzer.get_engagement_metrics(),
-            'meme_virality': self.analyze_meme_potential(social_data['media']),
+            'meme_virality': self.analyze_meme_potential(media),
             'environmental_pressure': self.calculate_pressure()
         }
 
     def generate_single_mutation(self, sentiment, trend):
         # 基于市场情绪和进化趋势生成突变
-        new_symbol = self.generate_evolved_symbol(sentiment, trend)
+        new_symbol = self._novel_symbol(sentiment, trend)
+        if new_symbol is _DUPLICATE:
+            # Still a near-duplicate of a recent proposal after a re-prompt, skip the render
+            return None
+        visual_dna = self._with_backend('diffusion', self.generate_visual_mutation, sentiment, trend)
+        return self._assemble_mutation(sentiment, trend, new_symbol, visual_dna)
+
+    def _assemble_mutation(self, sentiment, trend, new_symbol, visual_dna):
         new_burn_rate = self.calculate_adaptive_burn_rate(sentiment, trend)
-        visual_dna = self.generate_visual_mutation(sentiment, trend)
         
         return {
             'symbol': new_symbol,
@@ -68,7 +244,7 @@ class EvolutionEngine:
         adjusted_rate = base_rate + sum(modifiers.values())
         return np.clip(adjusted_rate, 1, 10)
 
-    def generate_evolved_symbol(self, sentiment, trend):
+    def generate_evolved_symbol(self, sentiment, trend, refresh=False):
         # 使用 GPT-4 生成进化符号
         context = f"""
         Market Sentiment: {sentiment['basic_sentiment']}
@@ -86,17 +262,74 @@ class EvolutionEngine:
         - Maximum length: 12 characters
         """
         
-        return query_gpt4(prompt)
+        return self.prompt_cache.query(prompt, query_gpt4, refresh=refresh)
 
-    def generate_visual_mutation(self, sentiment, trend):
+    def generate_visual_mutation(self, sentiment, trend, preview=False, on_upgrade=None):
         # 使用 Stable Diffusion 生成视觉突变
         base_prompt = self._create_visual_prompt(sentiment, trend)
-        return self.image_generator.generate(
-            prompt=base_prompt,
-            negative_prompt="static, pixelated, low quality, simple, basic",
-            steps=50,
-            guidance_scale=7.5
-        )
+        context = {
+            'basic_sentiment': sentiment['basic_sentiment'],
+            'trend': trend,
+            'environmental_pressure': sentiment['environmental_pressure']
+        }
+        return self._render_visual(context, {
+            'prompt': base_prompt,
+            'negative_prompt': "static, pixelated, low quality, simple, basic",
+            'steps': 50,
+            'guidance_scale': 7.5
+        }, preview, on_upgrade)
+
+    def _render_visual(self, context, render_args, preview=False, on_upgrade=None):
+        """
+        Render through the visual DNA cache:
+        - A cached full render for the quantized context is returned as is
+        - preview=True returns a PREVIEW_STEPS draft at once and upgrades to
+          the full render in the background, passing it to on_upgrade
+        """
+        key = None
+        if self.visual_cache is not None:
+            settings = {name: value for name, value in render_args.items() if name != 'prompt'}
+            key = self.visual_cache.key({'context': context, 'render': settings})
+            cached = self.visual_cache.get(key)
+            if cached is not None:
+                return cached
+
+        if not preview:
+            return self._full_render(key, render_args)
+
+        # Drafts share the diffusion limit with full renders
+        draft = self._with_backend('diffusion', self.image_generator.generate, **dict(render_args, steps=self.PREVIEW_STEPS))
+        self._schedule_upgrade(key, render_args, on_upgrade)
+        return draft
+
+    def _schedule_upgrade(self, key, render_args, on_upgrade):
+        with self._upgrade_lock:
+            future = self._pending_upgrades.get(key) if key is not None else None
+            if future is None:
+                if self._upgrade_pool is None:
+                    self._upgrade_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix='visual-upgrade')
+                future = self._upgrade_pool.submit(self._upgrade_render, key, render_args)
+                if key is not None:
+                    self._pending_upgrades[key] = future
+
+        if on_upgrade is not None:
+            future.add_done_callback(
+                lambda done: on_upgrade(done.result()) if done.exception() is None else None
+            )
+        return future
+
+    def _upgrade_render(self, key, render_args):
+        try:
+            return self._with_backend('diffusion', self._full_render, key, render_args)
+        finally:
+            with self._upgrade_lock:
+                self._pending_upgrades.pop(key, None)
+
+    def _full_render(self, key, render_args):
+        visual_dna = self.image_generator.generate(**render_args)
+        if key is not None:
+            self.visual_cache.put(key, visual_dna)
+        return visual_dna
 
     def _create_visual_prompt(self, sentiment, trend):
         return f"""Evolving cryptocurrency logo showing:
@@ -107,19 +340,17 @@ class EvolutionEngine:
         """
 
 class MultimodalEvolutionEngine(EvolutionEngine):
-    def __init__(self):
-        super().__init__()
-        self.image_generator = StableDiffusionWrapper()
-        self.symbol_mixer = SymbolMixer()
+    # Reuses the parent's diffusion pipeline instead of loading a second copy
+    symbol_mixer = RegistryModel('symbol_mixer')
     
-    def generate_visual_mutation(self, previous_dna):
+    def generate_visual_mutation(self, previous_dna, preview=False, on_upgrade=None):
         # Generate evolutionary images using diffusion model
         prompt = self._create_visual_prompt(previous_dna)
-        return self.image_generator.generate(
-            prompt=prompt,
-            negative_prompt="static, boring, low quality",
-            steps=30
-        )
+        return self._render_visual({'previous_dna': previous_dna}, {
+            'prompt': prompt,
+            'negative_prompt': "static, boring, low quality",
+            'steps': 30
+        }, preview, on_upgrade)
     
     def _create_visual_prompt(self, dna):
         return f"""Cryptocurrency logo evolution sequence showing:
@@ -129,6 +360,24 @@ class MultimodalEvolutionEngine(EvolutionEngine):
 Art style: Cyberpunk biology with glowing elements, 8k resolution""" 
 
 class DNAGenerator:
-    def __init__(self):
-        # Initialize random sequence
-        self.sequence = [random.choice('ATCG') for _ in range(100)] 
\ No newline at end of file
+    def __init__(self, length=100, rng=None):
+        # Initialize random sequence, 2 bits per base
+        self.length = length
+        self.packed = dna.random_population(1, length, rng)[0]
+
+    @property
+    def sequence(self):
+        return list(dna.decode(dna.unpack(self.packed, self.length)))
+
+    @sequence.setter
+    def sequence(self, bases):
+        # Assignments are packed; the list handed out above is a copy, so edit and assign it back
+        codes = dna.encode(bases)
+        self.length = len(codes)
+        self.packed = dna.pack(codes)
+
+    def recombine(self, other, method='single_point', mutation_rate=0.01, rng=None):
+        child = DNAGenerator.__new__(DNAGenerator)
+        child.length = self.length
+        child.packed = dna.recombine_population(self.packed, other.packed, self.length, method, mutation_rate, rng)[0]
+        return child 
\ No newline at end of file
@@ -0,0 +1,117 @@
+import threading
+import time
+from contextlib import contextmanager
+
+class _PendingRead:
+    __slots__ = ('done', 'value', 'error')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+class MarketSnapshot:
+    """
+    Shared, TTL-cached view of a market feed.
+    Exposes the same accessors as the market analyzers so it can be handed
+    to AdaptiveFitnessCalculator, MutationProbabilityEngine,
+    MutationProbabilityModel and AdaptiveGeneOptimizer in place of the feed:
+    - Each accessor hits the feed at most once per TTL
+    - Concurrent callers wait on a single in-flight fetch
+    - pin_generation() freezes the snapshot for a whole generation
+    - generation increases whenever values callers may have seen are
+      dropped, so derived results can be cached against it
+    """
+    ACCESSORS = (
+        'current_state',
+        'get_volatility',
+        'get_liquidity',
+        'get_liquidity_ratio',
+        'get_liquidity_index'
+    )
+
+    def __init__(self, market_feed, ttl=5.0, clock=time.monotonic):
+        self.feed = market_feed
+        self.ttl = ttl
+        self.clock = clock
+        self._values = {}
+        self._inflight = {}
+        self._pins = 0
+        self._lock = threading.Lock()
+        self.generation = 0
+
+    def current_state(self):
+        return self._read('current_state')
+
+    def get_volatility(self):
+        return self._read('get_volatility')
+
+    def get_liquidity(self):
+        return self._read('get_liquidity')
+
+    def get_liquidity_ratio(self):
+        return self._read('get_liquidity_ratio')
+
+    def get_liquidity_index(self):
+        return self._read('get_liquidity_index')
+
+    @contextmanager
+    def pin_generation(self):
+        # Values read inside the block never expire until the outermost pin exits
+        with self._lock:
+            if self._pins == 0:
+                self._clear()
+            self._pins += 1
+        try:
+            yield self
+        finally:
+            with self._lock:
+                self._pins -= 1
+                if self._pins == 0:
+                    self._clear()
+
+    def invalidate(self):
+        with self._lock:
+            self._clear()
+
+    def _read(self, accessor):
+        with self._lock:
+            cached = self._values.get(accessor)
+            if cached is not None:
+                if self._is_fresh(cached[0]):
+                    return cached[1]
+                del self._values[accessor]
+                self.generation += 1
+
+            pending = self._inflight.get(accessor)
+            leader = pending is None
+            if leader:
+                pending = self._inflight[accessor] = _PendingRead()
+
+        if not leader:
+            # Another caller is already fetching this value
+            pending.done.wait()
+            if pending.error is not None:
+                raise pending.error
+            return pending.value
+
+        try:
+            pending.value = getattr(self.feed, accessor)()
+        except Exception as exc:
+            pending.error = exc
+            raise
+        finally:
+            with self._lock:
+                del self._inflight[accessor]
+                if pending.error is None:
+                    self._values[accessor] = (self.clock(), pending.value)
+            pending.done.set()
+        return pending.value
+
+    def _clear(self):
+        if self._values:
+            self._values.clear()
+            self.generation += 1
+
+    def _is_fresh(self, fetched_at):
+        return self._pins > 0 or self.clock() - fetched_at < self.ttl
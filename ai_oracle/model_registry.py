@@ -0,0 +1,72 @@
+import threading
+
+from ai_oracle.instrumentation import METRICS
+
+class ModelRegistry:
+    """
+    Process-wide home for heavy models:
+    - Factories are registered up front, nothing loads until first use
+    - get() is thread-safe and loads each model exactly once
+    - warm_up() preloads models, optionally on a background thread
+    """
+    def __init__(self):
+        self._factories = {}
+        self._models = {}
+        self._locks = {}
+        self._registry_lock = threading.Lock()
+
+    def register(self, name, factory):
+        with self._registry_lock:
+            self._factories[name] = factory
+            self._locks.setdefault(name, threading.Lock())
+            self._models.pop(name, None)
+
+    def get(self, name):
+        try:
+            return self._models[name]
+        except KeyError:
+            pass
+
+        if name not in self._factories:
+            raise KeyError(f"No model registered as '{name}'")
+        with self._locks[name]:
+            # Another thread may have finished loading while we waited
+            if name not in self._models:
+                with METRICS.timer('model_load_seconds', model=name):
+                    self._models[name] = self._factories[name]()
+            return self._models[name]
+
+    def is_loaded(self, name):
+        return name in self._models
+
+    def unload(self, name):
+        with self._locks[name]:
+            self._models.pop(name, None)
+
+    def warm_up(self, names=None, background=False):
+        names = list(names or self._factories)
+        if not background:
+            for name in names:
+                self.get(name)
+            return None
+
+        thread = threading.Thread(
+            target=lambda: [self.get(name) for name in names],
+            name='model-warm-up',
+            daemon=True
+        )
+        thread.start()
+        return thread
+
+class RegistryModel:
+    """
+    Class attribute that resolves to a shared model on first access.
+    Assigning the attribute on an instance overrides it for that instance.
+    """
+    def __init__(self, name):
+        self.name = name
+
+    def __get__(self, instance, owner):
+        if instance is None:
+            return self
+        return instance.models.get(self.name)
@@ -0,0 +1,166 @@
+import queue
+import random
+import threading
+import time
+from operator import methodcaller
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from ai_oracle.instrumentation import METRICS
+
+# Client errors worth another attempt: request timeout and rate limiting
+RETRYABLE_CLIENT_ERRORS = (408, 429)
+
+class WebhookSender:
+    """POST JSON payloads over a pooled, keep-alive HTTP session"""
+    def __init__(self, url, pool_size=8, timeout=5.0, session=None):
+        self.url = url
+        self.timeout = timeout
+        self.session = session or requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def __call__(self, payload):
+        response = self.session.post(self.url, json=payload, timeout=self.timeout)
+        response.raise_for_status()
+        return response
+
+    def close(self):
+        self.session.close()
+
+class NotificationDispatcher:
+    """
+    Background delivery queue for alerts:
+    - One bounded queue and worker pool per channel
+    - submit() blocks when a channel is saturated (backpressure)
+    - Failed sends retry with full-jitter exponential backoff; 4xx
+      responses other than 408/429 are permanent and fail at once
+    """
+    def __init__(self, senders, workers_per_channel=4, queue_size=1000,
+                 max_retries=3, backoff_base=0.5, backoff_cap=30.0,
+                 on_failure=None, sleep=time.sleep):
+        self.senders = dict(senders)
+        self.workers_per_channel = workers_per_channel
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.on_failure = on_failure
+        self.sleep = sleep
+        self.queues = {
+            channel: queue.Queue(maxsize=queue_size)
+            for channel in self.senders
+        }
+        self.stats = {'sent': 0, 'retried': 0, 'failed': 0}
+        self._stats_lock = threading.Lock()
+        METRICS.register_stats('notifications', self.stats, owner=self)
+        for channel in self.queues:
+            METRICS.register_gauge(
+                'notification_queue_depth', methodcaller('queue_depth', channel), owner=self, channel=channel
+            )
+        self._workers = []
+        self._start_lock = threading.Lock()
+        self._closed = False
+        # Submits in progress; close() waits for them so nothing lands behind the sentinels
+        self._submitting = 0
+        self._submit_done = threading.Condition()
+
+    def submit(self, channel, payload, block=True, timeout=None):
+        """Queue a payload for delivery. Raises queue.Full if the channel stays saturated."""
+        if channel not in self.queues:
+            raise ValueError(f"Unknown notification channel: {channel}")
+        with self._submit_done:
+            if self._closed:
+                raise RuntimeError("Dispatcher is closed")
+            self._submitting += 1
+        try:
+            self._ensure_started()
+            self.queues[channel].put(payload, block=block, timeout=timeout)
+        finally:
+            with self._submit_done:
+                self._submitting -= 1
+                self._submit_done.notify_all()
+
+    def queue_depth(self, channel):
+        return self.queues[channel].qsize()
+
+    def join(self):
+        # Wait until everything queued so far is delivered or dropped
+        for channel_queue in self.queues.values():
+            channel_queue.join()
+
+    def close(self, wait=True):
+        # Sentinels queue behind pending payloads, so workers drain first
+        with self._submit_done:
+            self._closed = True
+            self._submit_done.wait_for(lambda: self._submitting == 0)
+        if self._workers:
+            for channel_queue in self.queues.values():
+                for _ in range(self.workers_per_channel):
+                    channel_queue.put(None)
+        if wait:
+            for worker in self._workers:
+                worker.join()
+        METRICS.unregister(self)
+
+    def _ensure_started(self):
+        if self._workers:
+            return
+        with self._start_lock:
+            if self._workers:
+                return
+            workers = [
+                threading.Thread(
+                    target=self._work,
+                    args=(channel,),
+                    name=f"notify-{channel}-{i}",
+                    daemon=True
+                )
+                for channel in self.senders
+                for i in range(self.workers_per_channel)
+            ]
+            for worker in workers:
+                worker.start()
+            self._workers = workers
+
+    def _work(self, channel):
+        channel_queue = self.queues[channel]
+        send = self.senders[channel]
+        while True:
+            payload = channel_queue.get()
+            try:
+                if payload is None:
+                    return
+                self._deliver(channel, send, payload)
+            finally:
+                channel_queue.task_done()
+
+    def _deliver(self, channel, send, payload):
+        for attempt in range(self.max_retries + 1):
+            try:
+                with METRICS.timer('notification_send_seconds', channel=channel):
+                    send(payload)
+            except Exception as exc:
+                if attempt == self.max_retries or _is_permanent(exc):
+                    self._count('failed')
+                    if self.on_failure is not None:
+                        self.on_failure(channel, payload, exc)
+                    return
+                self._count('retried')
+                self.sleep(self._backoff(attempt))
+            else:
+                self._count('sent')
+                return
+
+    def _backoff(self, attempt):
+        return random.uniform(0, min(self.backoff_cap, self.backoff_base * 2 ** attempt))
+
+    def _count(self, key):
+        with self._stats_lock:
+            self.stats[key] += 1
+
+def _is_permanent(exc):
+    # HTTPError carries the response; other sender errors are treated as transient
+    status = getattr(getattr(exc, 'response', None), 'status_code', None)
+    return status is not None and 400 <= status < 500 and status not in RETRYABLE_CLIENT_ERRORS
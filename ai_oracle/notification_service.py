@@ -1,20 +1,55 @@
+from datetime import datetime
+
+from ai_oracle.governance_monitor import GovernanceWatcher
+from ai_oracle.notification_dispatcher import NotificationDispatcher, WebhookSender
+from ai_oracle.threshold_index import ThresholdIndex
+
 class GovernanceNotifier:
-    def __init__(self, contract, webhook_url):
-        self.watcher = GovernanceWatcher(contract)
+    def __init__(self, contract, webhook_url, dispatcher=None, watcher=None):
+        self.contract = contract
+        self.watcher = watcher or GovernanceWatcher(contract)
         self.webhook = webhook_url
         self.last_alert = 0
+        # Delivery runs on background workers so slow channels never stall monitor()
+        self._owns_dispatcher = dispatcher is None
+        self.dispatcher = dispatcher or NotificationDispatcher(self._channel_senders())
+        # Changes a chain reorg drops were already alerted on, so withdraw them
+        self.watcher.on_rollback = self._retract_all
         
     def monitor(self):
-        changes = self.watcher.watch_changes()
+        # Event logs when the chain offers them, polling otherwise
+        changes = self.watcher.sync_events()
+        return self._alert_all(changes)
+
+    def subscribe(self, poll_interval=1.0, new_blocks=None):
+        """Alert on each change as soon as its block lands, until unsubscribe()"""
+        return self.watcher.subscribe(self._alert_all, poll_interval, new_blocks)
+
+    def unsubscribe(self):
+        self.watcher.unsubscribe()
+
+    def close(self, wait=True):
+        """Stop the subscription and, unless it was passed in, the dispatcher after it drains"""
+        self.unsubscribe()
+        if self.watcher.on_rollback == self._retract_all:
+            self.watcher.on_rollback = None
+        if self._owns_dispatcher:
+            self.dispatcher.close(wait)
+
+    def _alert_all(self, changes):
         if changes:
             for change in changes:
                 self._send_alert(change)
             return True
         return False
     
-    def _send_alert(self, change):
+    def _retract_all(self, changes):
+        for change in changes:
+            self._send_alert(change, retracted=True)
+
+    def _send_alert(self, change, retracted=False):
         payload = {
-            "type": "governance_change",
+            "type": "governance_change_retracted" if retracted else "governance_change",
             "timestamp": change['block'],
             "parameters": {
                 "min_duration": change['min_duration'],
@@ -22,7 +57,10 @@ class GovernanceNotifier:
                 "delay": change['delay']
             }
         }
-        requests.post(self.webhook, json=payload)
+        self.dispatcher.submit('webhook', payload)
+
+    def _channel_senders(self):
+        return {'webhook': WebhookSender(self.webhook)}
         
     def format_webhook_message(self, change):
         return {
@@ -44,17 +82,34 @@ class PriorityNotifier(GovernanceNotifier):
         'MEDIUM': ['push'],
         'LOW': ['in_app']
     }
+    # Protocol severity by relative change, for users without custom thresholds
+    SEVERITY_LEVELS = (('CRITICAL', 0.5), ('HIGH', 0.25), ('MEDIUM', 0.1))
+
+    def get_severity(self, change):
+        relative = abs(change['new'] - change['old']) / max(abs(change['old']), 1)
+        for severity, minimum in self.SEVERITY_LEVELS:
+            if relative >= minimum:
+                return severity
+        return 'LOW'
 
-    def _send_priority_alert(self, change, severity):
+    def _send_priority_alert(self, change, severity, recipients=None):
         channels = self.SEVERITY_CHANNELS.get(severity, ['in_app'])
         message = self._format_message(change, severity)
+        if recipients is not None:
+            message['recipients'] = recipients
         
-        if 'sms' in channels:
-            self._send_sms(message)
-        if 'email' in channels:
-            self._send_email(message)
-        if 'push' in channels:
-            self._send_push_notification(message)
+        # Fan out to every channel at once instead of one after another
+        for channel in ('sms', 'email', 'push'):
+            if channel in channels:
+                self.dispatcher.submit(channel, message)
+
+    def _channel_senders(self):
+        return {
+            **super()._channel_senders(),
+            'sms': lambda message: self._send_sms(message),
+            'email': lambda message: self._send_email(message),
+            'push': lambda message: self._send_push_notification(message)
+        }
     
     def _format_message(self, change, severity):
         return {
@@ -65,11 +120,17 @@ class PriorityNotifier(GovernanceNotifier):
         } 
 
 class PersonalizedNotifier(PriorityNotifier):
+    def __init__(self, contract, webhook_url, dispatcher=None, threshold_index=None, alert_batch_size=500):
+        super().__init__(contract, webhook_url, dispatcher)
+        # Cached userThresholds, refreshed incrementally via thresholds.refresh(users)
+        self.thresholds = threshold_index or ThresholdIndex(contract)
+        self.alert_batch_size = alert_batch_size
+
     def get_personalized_severity(self, user, change):
-        # Get user's custom thresholds from blockchain
-        thresholds = self.contract.functions.userThresholds(user).call()
+        # Get user's custom thresholds from the local index (loaded from blockchain on miss)
+        thresholds = self.thresholds.get(user)
         if not thresholds['customEnabled']:
-            return super().get_severity(change)
+            return self.get_severity(change)
             
         delta = abs(change['new'] - change['old'])
         if change['param'] == 'minDuration' and delta >= thresholds['minDuration']:
@@ -83,4 +144,27 @@ class PersonalizedNotifier(PriorityNotifier):
     def send_personalized_alert(self, user, change):
         severity = self.get_personalized_severity(user, change)
         if severity != 'LOW':
-            self._send_priority_alert(change, severity) 
\ No newline at end of file
+            self._send_priority_alert(change, severity)
+
+    def send_personalized_alerts(self, change):
+        """
+        Fan one change out to every indexed subscriber:
+        - CRITICAL recipients come from a range scan over sorted thresholds
+        - Users without custom thresholds share the protocol severity
+        Alerts are sent in batches of alert_batch_size recipients.
+        """
+        delta = abs(change['new'] - change['old'])
+        groups = [('CRITICAL', self.thresholds.critical_recipients(change['param'], delta))]
+
+        default_users = self.thresholds.default_recipients()
+        if default_users:
+            groups.append((self.get_severity(change), default_users))
+
+        notified = 0
+        for severity, users in groups:
+            if severity == 'LOW':
+                continue
+            for start in range(0, len(users), self.alert_batch_size):
+                self._send_priority_alert(change, severity, users[start:start + self.alert_batch_size])
+            notified += len(users)
+        return notified 
\ No newline at end of file
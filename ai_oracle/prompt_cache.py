@@ -0,0 +1,189 @@
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+
+from ai_oracle.instrumentation import METRICS
+
+class _PendingQuery:
+    __slots__ = ('done', 'value', 'error')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+class PromptCache:
+    """
+    Content-addressed cache for LLM prompt results:
+    - Keys are hashes of the whitespace-normalized prompt
+    - In-memory LRU tier backed by an optional on-disk tier with TTL
+    - Concurrent identical prompts share one backend call
+    - query_batch() packs several prompts into a single request
+    """
+    def __init__(self, max_entries=1024, cache_dir=None, ttl=24 * 3600, clock=time.time):
+        self.max_entries = max_entries
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self.clock = clock
+        self.stats = {'hits': 0, 'misses': 0, 'coalesced': 0}
+        METRICS.register_stats('prompt_cache', self.stats, owner=self)
+        self._memory = OrderedDict()
+        self._inflight = {}
+        self._lock = threading.Lock()
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    @staticmethod
+    def key(prompt):
+        normalized = '\n'.join(
+            ' '.join(line.split())
+            for line in prompt.strip().splitlines()
+            if line.strip()
+        )
+        return hashlib.sha256(normalized.encode('utf-8')).hexdigest()
+
+    def query(self, prompt, backend, refresh=False):
+        """Cached backend(prompt); refresh asks the backend again and replaces the cached answer"""
+        key = self.key(prompt)
+        with self._lock:
+            found, value = (False, None) if refresh else self._lookup(key)
+            if found:
+                return value
+
+            pending = self._inflight.get(key)
+            leader = pending is None
+            if leader:
+                pending = self._inflight[key] = _PendingQuery()
+                self.stats['misses'] += 1
+            else:
+                self.stats['coalesced'] += 1
+
+        if not leader:
+            pending.done.wait()
+            if pending.error is not None:
+                raise pending.error
+            return pending.value
+
+        try:
+            pending.value = backend(prompt)
+        except Exception as exc:
+            pending.error = exc
+            raise
+        finally:
+            with self._lock:
+                del self._inflight[key]
+                if pending.error is None:
+                    self._store(key, pending.value)
+            pending.done.set()
+        return pending.value
+
+    def query_batch(self, prompts, backend):
+        """
+        Resolve many prompts with at most one backend call.
+        Cached prompts are served locally, duplicates are sent once and
+        the remaining prompts are packed into one numbered request.
+        """
+        results = [None] * len(prompts)
+        missing = OrderedDict()
+        with self._lock:
+            for i, prompt in enumerate(prompts):
+                key = self.key(prompt)
+                found, value = self._lookup(key)
+                if found:
+                    results[i] = value
+                else:
+                    missing.setdefault(key, (prompt, []))[1].append(i)
+            self.stats['misses'] += len(missing)
+
+        if missing:
+            batch = [prompt for prompt, _ in missing.values()]
+            if len(batch) == 1:
+                answers = [backend(batch[0])]
+            else:
+                answers = unpack_response(backend(pack_prompts(batch)), len(batch))
+            with self._lock:
+                for (key, (_, indexes)), answer in zip(missing.items(), answers):
+                    self._store(key, answer)
+                    for i in indexes:
+                        results[i] = answer
+        return results
+
+    def prune(self):
+        # Drop expired entries from the disk tier
+        if not self.cache_dir:
+            return 0
+        removed = 0
+        for name in os.listdir(self.cache_dir):
+            if name.endswith('.json') and self._read_disk(name[:-5]) is None:
+                removed += 1
+        return removed
+
+    def _lookup(self, key):
+        if key in self._memory:
+            self._memory.move_to_end(key)
+            self.stats['hits'] += 1
+            return True, self._memory[key]
+
+        entry = self._read_disk(key)
+        if entry is not None:
+            self._remember(key, entry['value'])
+            self.stats['hits'] += 1
+            return True, entry['value']
+        return False, None
+
+    def _store(self, key, value):
+        self._remember(key, value)
+        if self.cache_dir:
+            path = self._path(key)
+            tmp_path = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp_path, 'w') as handle:
+                json.dump({'created': self.clock(), 'value': value}, handle)
+            os.replace(tmp_path, path)
+
+    def _remember(self, key, value):
+        self._memory[key] = value
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def _read_disk(self, key):
+        if not self.cache_dir:
+            return None
+        path = self._path(key)
+        try:
+            with open(path) as handle:
+                entry = json.load(handle)
+        except (OSError, ValueError):
+            return None
+        if self.clock() - entry['created'] >= self.ttl:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            return None
+        return entry
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+def pack_prompts(prompts):
+    requests = '\n'.join(f"{i + 1}. {' '.join(p.split())}" for i, p in enumerate(prompts))
+    return (
+        f"Answer each of the following {len(prompts)} requests independently.\n"
+        f"Reply with exactly {len(prompts)} lines in the form '<number>. <answer>'.\n"
+        f"{requests}"
+    )
+
+def unpack_response(response, count):
+    answers = {}
+    for line in response.strip().splitlines():
+        match = re.match(r'\s*(\d+)[.)]\s*(.*\S)', line)
+        if match:
+            answers[int(match.group(1))] = match.group(2)
+    if sorted(answers) != list(range(1, count + 1)):
+        raise ValueError(f"Batched response has {len(answers)} answers, expected {count}")
+    return [answers[i] for i in range(1, count + 1)]
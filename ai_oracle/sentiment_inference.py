@@ -0,0 +1,118 @@
+import queue
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from operator import attrgetter
+
+from ai_oracle.instrumentation import METRICS
+from ai_oracle.social_stream import text_fingerprint
+
+class SentimentInference:
+    """
+    Deduplicating, micro-batched front end for the sentiment model:
+    - Texts are normalized and hashed, each unique text is scored once
+    - Scores are cached across cycles in a bounded LRU
+    - Model calls never exceed max_batch_size texts
+    - submit() callers are batched together for at most max_latency seconds
+    analyze is a callable mapping a list of texts to a list of scores.
+    """
+    def __init__(self, analyze, max_batch_size=32, max_latency=0.05, cache_size=100000):
+        self.analyze = analyze
+        self.max_batch_size = max_batch_size
+        self.max_latency = max_latency
+        self.cache_size = cache_size
+        self.stats = {'texts': 0, 'cache_hits': 0, 'model_calls': 0, 'scored': 0}
+        METRICS.register_stats('sentiment_inference', self.stats, owner=self)
+        METRICS.register_gauge('sentiment_queue_depth', attrgetter('queue_depth'), owner=self)
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self._pending = queue.Queue()
+        self._batcher = None
+
+    def score(self, texts):
+        """Scores aligned with texts; duplicates and cached texts cost no inference"""
+        keys = [text_fingerprint(text) for text in texts]
+        scores = {}
+        missing = OrderedDict()
+        with self._lock:
+            self.stats['texts'] += len(texts)
+            for key, text in zip(keys, texts):
+                if key in scores or key in missing:
+                    continue
+                if key in self._cache:
+                    self._cache.move_to_end(key)
+                    scores[key] = self._cache[key]
+                    self.stats['cache_hits'] += 1
+                else:
+                    missing[key] = text
+
+        if missing:
+            scores.update(self._infer(missing))
+        return [scores[key] for key in keys]
+
+    def mean_score(self, texts):
+        # Every post counts towards the mean, but each unique text is scored once
+        if not texts:
+            return 0.0
+        return sum(self.score(texts)) / len(texts)
+
+    @property
+    def queue_depth(self):
+        return self._pending.qsize()
+
+    def submit(self, text):
+        """Queue one text for the next micro-batch; returns a Future of its score"""
+        future = Future()
+        self._ensure_batcher()
+        self._pending.put((text, future))
+        return future
+
+    def _infer(self, missing):
+        items = list(missing.items())
+        results = {}
+        for start in range(0, len(items), self.max_batch_size):
+            batch = items[start:start + self.max_batch_size]
+            with METRICS.timer('sentiment_batch_seconds'):
+                batch_scores = self.analyze([text for _, text in batch])
+            with self._lock:
+                self.stats['model_calls'] += 1
+                self.stats['scored'] += len(batch)
+                for (key, _), value in zip(batch, batch_scores):
+                    results[key] = value
+                    self._remember(key, value)
+        return results
+
+    def _remember(self, key, value):
+        self._cache[key] = value
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def _ensure_batcher(self):
+        with self._lock:
+            if self._batcher is None:
+                self._batcher = threading.Thread(target=self._run_batches, name='sentiment-batcher', daemon=True)
+                self._batcher.start()
+
+    def _run_batches(self):
+        while True:
+            batch = [self._pending.get()]
+            deadline = time.monotonic() + self.max_latency
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._pending.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            try:
+                scores = self.score([text for text, _ in batch])
+            except Exception as exc:
+                for _, future in batch:
+                    future.set_exception(exc)
+            else:
+                for (_, future), value in zip(batch, scores):
+                    future.set_result(value)
@@ -0,0 +1,149 @@
+import hashlib
+import threading
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from ai_oracle import dna
+
+_SYMBOL_TAG = np.uint64(1 << 63)
+
+def dna_shingles(sequence, k=8):
+    """k-mers of a base sequence (str, list or uint8 codes) as uint64 values"""
+    if k > 31:
+        raise ValueError("k-mers longer than 31 bases do not fit a shingle")
+    codes = sequence if isinstance(sequence, np.ndarray) else dna.encode(sequence)
+    if len(codes) < k:
+        return np.zeros(0, dtype=np.uint64)
+    weights = np.uint64(4) ** np.arange(k - 1, -1, -1, dtype=np.uint64)
+    kmers = (sliding_window_view(codes.astype(np.uint64), k) * weights).sum(axis=1, dtype=np.uint64)
+    return np.unique(kmers)
+
+def symbol_shingles(symbol, n=3):
+    """Character n-grams of a symbol, padded so short symbols still shingle"""
+    text = f" {symbol.strip().lower()} "
+    grams = {text[i:i + n] for i in range(max(len(text) - n + 1, 1))}
+    hashes = [
+        int.from_bytes(hashlib.blake2b(gram.encode('utf-8'), digest_size=8).digest(), 'little')
+        for gram in grams
+    ]
+    # Top bit set keeps symbol n-grams apart from DNA k-mers
+    return np.array(hashes, dtype=np.uint64) | _SYMBOL_TAG
+
+def mutation_shingles(sequence=None, symbol=None, k=8, n=3):
+    parts = []
+    if sequence is not None:
+        parts.append(dna_shingles(sequence, k))
+    if symbol is not None:
+        parts.append(symbol_shingles(symbol, n))
+    return np.unique(np.concatenate(parts)) if parts else np.zeros(0, dtype=np.uint64)
+
+class SimilarityIndex:
+    """
+    MinHash/LSH index for near-duplicate mutations:
+    - Items are shingle sets (see mutation_shingles); distance is the
+      estimated Jaccard distance between two sets
+    - Signatures are split into bands, items sharing any band bucket
+      become candidates, so queries touch only a few items
+    - insert() and remove() are incremental
+    With the default 64 permutations in 16 bands, pairs closer than about
+    0.5 are found reliably; use more bands to query larger distances.
+    """
+    def __init__(self, num_perm=64, bands=16, seed=0):
+        if num_perm % bands:
+            raise ValueError(f"num_perm ({num_perm}) must be a multiple of bands ({bands})")
+        rng = np.random.default_rng(seed)
+        # Multiply-shift hashing; odd multipliers keep each permutation a bijection
+        self._multipliers = rng.integers(0, 2 ** 63, num_perm, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+        self._offsets = rng.integers(0, 2 ** 63, num_perm, dtype=np.uint64)
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self._signatures = {}
+        self._buckets = [{} for _ in range(bands)]
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._signatures)
+
+    def __contains__(self, key):
+        return key in self._signatures
+
+    def signature(self, shingles):
+        shingles = np.asarray(shingles, dtype=np.uint64)
+        if shingles.size == 0:
+            raise ValueError("Cannot sign an empty shingle set")
+        mixed = _mix(shingles)
+        hashed = (self._multipliers[:, np.newaxis] * mixed + self._offsets[:, np.newaxis]) >> np.uint64(32)
+        return hashed.min(axis=1).astype(np.uint32)
+
+    def insert(self, key, shingles):
+        signature = self.signature(shingles)
+        with self._lock:
+            if key in self._signatures:
+                self._unbucket(key)
+            self._signatures[key] = signature
+            for band, bucket in zip(self._band_keys(signature), self._buckets):
+                bucket.setdefault(band, set()).add(key)
+        return signature
+
+    def remove(self, key):
+        with self._lock:
+            if key not in self._signatures:
+                return False
+            self._unbucket(key)
+            del self._signatures[key]
+            return True
+
+    def query(self, shingles, max_distance):
+        """Indexed (key, distance) pairs within max_distance, nearest first"""
+        return self._query(self.signature(shingles), max_distance)
+
+    def neighbors(self, key, max_distance):
+        """Other indexed items within max_distance of an indexed key"""
+        with self._lock:
+            signature = self._signatures[key]
+        return [match for match in self._query(signature, max_distance) if match[0] != key]
+
+    def _query(self, signature, max_distance):
+        with self._lock:
+            candidates = set()
+            for band, bucket in zip(self._band_keys(signature), self._buckets):
+                candidates.update(bucket.get(band, ()))
+            matches = [
+                (key, self._distance(signature, self._signatures[key]))
+                for key in candidates
+            ]
+        return sorted(
+            [(key, distance) for key, distance in matches if distance <= max_distance],
+            key=lambda match: match[1]
+        )
+
+    def has_near(self, shingles, max_distance, exclude=None):
+        return any(key != exclude for key, _ in self.query(shingles, max_distance))
+
+    def distance(self, key_a, key_b):
+        with self._lock:
+            return self._distance(self._signatures[key_a], self._signatures[key_b])
+
+    def _distance(self, signature_a, signature_b):
+        return float(np.count_nonzero(signature_a != signature_b)) / self.num_perm
+
+    def _band_keys(self, signature):
+        return [band.tobytes() for band in signature.reshape(self.bands, self.rows)]
+
+    def _unbucket(self, key):
+        # Caller holds the lock
+        for band, bucket in zip(self._band_keys(self._signatures[key]), self._buckets):
+            members = bucket.get(band)
+            members.discard(key)
+            if not members:
+                del bucket[band]
+
+def _mix(values):
+    # splitmix64 finalizer so structured k-mer values hash uniformly
+    values = values ^ (values >> np.uint64(30))
+    values = values * np.uint64(0xbf58476d1ce4e5b9)
+    values = values ^ (values >> np.uint64(27))
+    values = values * np.uint64(0x94d049bb133111eb)
+    return values ^ (values >> np.uint64(31))
@@ -1,10 +1,18 @@
 import random
 import re
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+BURN_RATE_BOUNDS = (1, 10)
+HISTOGRAM_BINS = 180
 
 class RecombinationSimulator:
-    def __init__(self, gene_pool):
+    def __init__(self, gene_pool, mutation_rate=0.1, mutation_scale=0.5):
         self.gene_pool = gene_pool
         self.scenarios = []
+        self.mutation_rate = mutation_rate
+        self.mutation_scale = mutation_scale
         
     def generate_scenario(self, generations=5):
         current_genes = random.choice(self.gene_pool)
@@ -29,4 +37,176 @@ class RecombinationSimulator:
         # Extract version numbers
         v1 = int(re.search(r'\d+', sym1).group())
         v2 = int(re.search(r'\d+', sym2).group())
-        return f"EvoV{(v1 + v2)//2}_{sym1.split('_')[-1][:3]}{sym2.split('_')[-1][-3:]}" 
\ No newline at end of file
+        return f"EvoV{(v1 + v2)//2}_{sym1.split('_')[-1][:3]}{sym2.split('_')[-1][-3:]}"
+
+    def _apply_mutations(self, genes):
+        # Gaussian drift on the burn rate, kept inside protocol bounds
+        if random.random() < self.mutation_rate:
+            burn_rate = genes['burn_rate'] + random.gauss(0, self.mutation_scale)
+            genes['burn_rate'] = min(max(burn_rate, BURN_RATE_BOUNDS[0]), BURN_RATE_BOUNDS[1])
+        return genes
+
+    def simulate_batch(self, scenarios, generations=5, seed=None, processes=None, chunk_size=65536, top_symbols=5):
+        """
+        Monte Carlo run of many scenarios at once:
+        - Each shard advances chunk_size scenarios together on NumPy arrays
+        - Shards run on a process pool when processes > 1
+        - Shard seeds derive from seed, so results do not depend on processes
+        Returns summary statistics instead of per-scenario histories.
+        """
+        if scenarios < 1 or generations < 1:
+            raise ValueError(f"Need at least one scenario and one generation, got {scenarios} and {generations}")
+        codec = SymbolCodec()
+        pool = codec.encode_pool(self.gene_pool)
+        shard_sizes = [
+            min(chunk_size, scenarios - start)
+            for start in range(0, scenarios, chunk_size)
+        ]
+        seeds = np.random.SeedSequence(seed).spawn(len(shard_sizes))
+        jobs = [
+            (pool, size, generations, self.mutation_rate, self.mutation_scale, shard_seed)
+            for size, shard_seed in zip(shard_sizes, seeds)
+        ]
+
+        summary = ScenarioSummary(generations)
+        if processes and processes > 1:
+            with ProcessPoolExecutor(max_workers=processes) as executor:
+                for shard in executor.map(_simulate_shard, jobs):
+                    summary.merge(shard)
+        else:
+            for job in jobs:
+                summary.merge(_simulate_shard(job))
+        return summary.to_dict(codec, top_symbols)
+
+class SymbolCodec:
+    """
+    Integer codes for the parts of a symbol _combine_symbols reads.
+    EvoV{version}_{suffix} becomes a version plus fragment codes for
+    suffix[:3] and suffix[-3:]; a child symbol is packed into one int64.
+    """
+    def __init__(self):
+        self.fragments = []
+        self._codes = {}
+
+    def code(self, fragment):
+        if fragment not in self._codes:
+            self._codes[fragment] = len(self.fragments)
+            self.fragments.append(fragment)
+        return self._codes[fragment]
+
+    def encode(self, symbol):
+        suffix = symbol.split('_')[-1]
+        version = int(re.search(r'\d+', symbol).group())
+        return version, self.code(suffix[:3]), self.code(suffix[-3:])
+
+    def encode_pool(self, gene_pool):
+        versions, heads, tails = zip(*(self.encode(g['symbol']) for g in gene_pool))
+        return {
+            'burn_rate': np.array([g['burn_rate'] for g in gene_pool], dtype=np.float64),
+            'version': np.array(versions, dtype=np.int64),
+            'head': np.array(heads, dtype=np.int64),
+            'tail': np.array(tails, dtype=np.int64),
+            'fragments': len(self.fragments)
+        }
+
+    def decode(self, packed):
+        # Inverse of the packing done in _simulate_shard
+        size = len(self.fragments)
+        version, rest = divmod(int(packed), size * size)
+        head, tail = divmod(rest, size)
+        return f"EvoV{version}_{self.fragments[head]}{self.fragments[tail]}"
+
+class ScenarioSummary:
+    """Streaming burn-rate and symbol statistics that merge across shards"""
+    def __init__(self, generations):
+        self.count = 0
+        self.total = 0.0
+        self.total_sq = 0.0
+        self.minimum = np.inf
+        self.maximum = -np.inf
+        self.drift_total = 0.0
+        self.version_total = 0
+        self.generation_totals = np.zeros(generations)
+        self.histogram = np.zeros(HISTOGRAM_BINS, dtype=np.int64)
+        self.symbol_counts = {}
+
+    def observe(self, burn_rates, symbols, versions):
+        # burn_rates: scenarios x generations matrix for one shard
+        final = burn_rates[:, -1]
+        self.count += len(final)
+        self.total += final.sum()
+        self.total_sq += np.square(final).sum()
+        self.minimum = min(self.minimum, final.min())
+        self.maximum = max(self.maximum, final.max())
+        self.drift_total += (final - burn_rates[:, 0]).sum()
+        self.version_total += int(versions.sum())
+        self.generation_totals += burn_rates.sum(axis=0)
+        self.histogram += np.histogram(final, bins=HISTOGRAM_BINS, range=BURN_RATE_BOUNDS)[0]
+        packed, counts = np.unique(symbols, return_counts=True)
+        for symbol, count in zip(packed.tolist(), counts.tolist()):
+            self.symbol_counts[symbol] = self.symbol_counts.get(symbol, 0) + count
+
+    def merge(self, other):
+        self.count += other.count
+        self.total += other.total
+        self.total_sq += other.total_sq
+        self.minimum = min(self.minimum, other.minimum)
+        self.maximum = max(self.maximum, other.maximum)
+        self.drift_total += other.drift_total
+        self.version_total += other.version_total
+        self.generation_totals += other.generation_totals
+        self.histogram += other.histogram
+        for packed, count in other.symbol_counts.items():
+            self.symbol_counts[packed] = self.symbol_counts.get(packed, 0) + count
+
+    def percentile(self, q):
+        edges = np.linspace(*BURN_RATE_BOUNDS, HISTOGRAM_BINS + 1)
+        rank = np.searchsorted(np.cumsum(self.histogram), q / 100 * self.count)
+        return float(edges[min(rank + 1, HISTOGRAM_BINS)])
+
+    def to_dict(self, codec, top_symbols=5):
+        mean = float(self.total / self.count)
+        ranked = sorted(self.symbol_counts.items(), key=lambda item: (-item[1], item[0]))
+        return {
+            'scenarios': self.count,
+            'final_burn_rate_mean': mean,
+            'final_burn_rate_std': float(np.sqrt(max(self.total_sq / self.count - mean ** 2, 0))),
+            'final_burn_rate_min': float(self.minimum),
+            'final_burn_rate_max': float(self.maximum),
+            'final_burn_rate_p5': self.percentile(5),
+            'final_burn_rate_p50': self.percentile(50),
+            'final_burn_rate_p95': self.percentile(95),
+            'burn_rate_drift_mean': float(self.drift_total / self.count),
+            'generation_burn_rate_mean': (self.generation_totals / self.count).tolist(),
+            'final_version_mean': self.version_total / self.count,
+            'top_symbols': [(codec.decode(packed), count) for packed, count in ranked[:top_symbols]]
+        }
+
+def _simulate_shard(job):
+    pool, size, generations, mutation_rate, mutation_scale, seed = job
+    rng = np.random.default_rng(seed)
+    pool_size = len(pool['burn_rate'])
+
+    burn_rates = np.empty((size, generations))
+    for generation in range(generations):
+        # Two distinct parents per scenario, as random.sample(pool, 2)
+        first = rng.integers(0, pool_size, size)
+        second = rng.integers(0, pool_size - 1, size)
+        second += second >= first
+
+        rates = (pool['burn_rate'][first] + pool['burn_rate'][second]) / 2
+        mutated = rng.random(size) < mutation_rate
+        rates[mutated] = np.clip(
+            rates[mutated] + rng.normal(0, mutation_scale, mutated.sum()),
+            *BURN_RATE_BOUNDS
+        )
+        burn_rates[:, generation] = rates
+
+    # Only the final child symbol is reported, packed as version|head|tail
+    fragments = pool['fragments']
+    versions = (pool['version'][first] + pool['version'][second]) // 2
+    symbols = (versions * fragments + pool['head'][first]) * fragments + pool['tail'][second]
+
+    summary = ScenarioSummary(generations)
+    summary.observe(burn_rates, symbols, versions)
+    return summary
@@ -0,0 +1,173 @@
+import hashlib
+import queue
+import re
+import threading
+import time
+from collections import OrderedDict, deque
+
+from ai_oracle.instrumentation import METRICS
+
+_RETWEET_PREFIX = re.compile(r'^(rt\s+@\w+:\s*)+')
+_URL = re.compile(r'https?://\S+')
+
+def normalize_text(text):
+    # Retweets, cross-posts and link variants collapse to the same text
+    text = _URL.sub('', text.lower())
+    return ' '.join(_RETWEET_PREFIX.sub('', text.strip()).split())
+
+def text_fingerprint(text):
+    return hashlib.blake2b(normalize_text(text).encode('utf-8'), digest_size=16).digest()
+
+_DONE = object()
+
+class SocialStream:
+    """
+    Merges social sources into one deduplicated item stream:
+    - Each source runs on its own thread and feeds a bounded queue,
+      so fast sources block instead of growing memory
+    - Items seen within the last dedup_window fingerprints are dropped
+    sources maps a name to a callable returning an iterable of items
+    shaped like {'text': ..., 'media': [...]}.
+    """
+    # Seconds between stop checks while a producer or the consumer waits on the queue
+    STOP_POLL = 0.1
+
+    def __init__(self, sources, queue_size=1000, dedup_window=100000):
+        self.sources = sources
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.dedup_window = dedup_window
+        self.stats = {'received': 0, 'duplicates': 0}
+        METRICS.register_stats('social_stream', self.stats, owner=self)
+        METRICS.register_gauge('social_queue_depth', lambda stream: stream.queue.qsize(), owner=self)
+        self._seen = OrderedDict()
+        self._stopped = threading.Event()
+        self.producers = []
+
+    def __iter__(self):
+        return self.items()
+
+    def items(self, idle_timeout=None):
+        """
+        The deduplicated stream; with idle_timeout, None is yielded whenever
+        that many seconds pass without an item, so consumers can act on time.
+        Ends when every source is exhausted or stop() is called.
+        """
+        self.producers = [
+            threading.Thread(target=self._produce, args=(name, source), name=f"social-{name}", daemon=True)
+            for name, source in self.sources.items()
+        ]
+        for producer in self.producers:
+            producer.start()
+
+        remaining = len(self.producers)
+        while remaining:
+            try:
+                item = self.queue.get(timeout=idle_timeout if idle_timeout is not None else self.STOP_POLL)
+            except queue.Empty:
+                if self._stopped.is_set():
+                    return
+                if idle_timeout is not None:
+                    yield None
+                continue
+            if item is _DONE:
+                remaining -= 1
+                continue
+            self.stats['received'] += 1
+            if self._is_duplicate(item):
+                self.stats['duplicates'] += 1
+                continue
+            yield item
+
+    def stop(self):
+        self._stopped.set()
+        METRICS.unregister(self)
+
+    def _produce(self, name, source):
+        try:
+            for item in source():
+                if not self._put(dict(item, source=name)):
+                    break
+        finally:
+            self._put(_DONE)
+
+    def _put(self, item):
+        # Blocking put that gives up once stop() is called; False if dropped
+        while not self._stopped.is_set():
+            try:
+                self.queue.put(item, timeout=self.STOP_POLL)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _is_duplicate(self, item):
+        fingerprint = text_fingerprint(item.get('text', ''))
+        if fingerprint in self._seen:
+            self._seen.move_to_end(fingerprint)
+            return True
+        self._seen[fingerprint] = None
+        if len(self._seen) > self.dedup_window:
+            self._seen.popitem(last=False)
+        return False
+
+class SentimentAggregate:
+    """
+    Running sentiment over a social stream:
+    - scorer turns a list of texts into a list of sentiment scores
+    - Items are scored in batches of batch_size as they arrive, or once the
+      oldest unscored item is about max_latency seconds old on a slow feed
+    - snapshot() can be taken at any time; memory does not grow with volume
+    """
+    def __init__(self, scorer, batch_size=64, media_window=200, smoothing=0.05, max_latency=1.0):
+        self.scorer = scorer
+        self.batch_size = batch_size
+        self.max_latency = max_latency
+        self.smoothing = smoothing
+        self.count = 0
+        self.total = 0.0
+        self.ewma = None
+        self.source_counts = {}
+        self.recent_media = deque(maxlen=media_window)
+        self._lock = threading.Lock()
+
+    def consume(self, stream):
+        # SocialStream wakes us while idle; a plain iterable is checked per item
+        items = stream.items(idle_timeout=self.max_latency / 4) if isinstance(stream, SocialStream) else stream
+        batch = []
+        deadline = None
+        for item in items:
+            if item is not None:
+                if not batch:
+                    deadline = time.monotonic() + self.max_latency
+                batch.append(item)
+            if batch and (len(batch) >= self.batch_size or time.monotonic() >= deadline):
+                self.update(batch)
+                batch = []
+        if batch:
+            self.update(batch)
+
+    def consume_in_background(self, stream):
+        thread = threading.Thread(target=self.consume, args=(stream,), name='social-aggregate', daemon=True)
+        thread.start()
+        return thread
+
+    def update(self, items):
+        scores = self.scorer([item.get('text', '') for item in items])
+        with self._lock:
+            for item, score in zip(items, scores):
+                self.count += 1
+                self.total += score
+                self.ewma = score if self.ewma is None else self.ewma + self.smoothing * (score - self.ewma)
+                source = item.get('source')
+                self.source_counts[source] = self.source_counts.get(source, 0) + 1
+                self.recent_media.extend(item.get('media', ()))
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'count': self.count,
+                'mean_sentiment': self.total / self.count if self.count else 0.0,
+                'recent_sentiment': self.ewma if self.ewma is not None else 0.0,
+                'source_counts': dict(self.source_counts),
+                'media': list(self.recent_media)
+            }
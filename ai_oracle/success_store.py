@@ -0,0 +1,207 @@
+import os
+import threading
+from bisect import bisect_left, insort
+from collections import OrderedDict
+from numbers import Integral
+
+import numpy as np
+
+# One fixed-size slot per mutation; tick 0 marks a free slot.
+# Persisted ids are big-endian uint256, the width of the contract's mutationId
+ID_BYTES = 32
+SLOT_DTYPE = np.dtype([('id', 'u1', (ID_BYTES,)), ('score', '<f8'), ('tick', '<u8')])
+
+class SuccessRateStore:
+    """
+    Bounded mutation_id -> success rate map for genetic inheritance:
+    - At most capacity entries; the least recently used ('lru') or the
+      lowest-scoring ('lowest') entry is evicted to make room
+    - Slots live in a memory-mapped file when path is given, so scores
+      survive restarts and writes cost no serialization
+    - Scores are also kept in a sorted index, top_k() is a tail slice
+    Any hashable mutation id works in memory; a file-backed store needs
+    ids it can write back, non-negative integers below 2**256.
+    """
+    POLICIES = ('lru', 'lowest')
+
+    def __init__(self, path=None, capacity=100000, policy='lru'):
+        if policy not in self.POLICIES:
+            raise ValueError(f"Unknown eviction policy '{policy}', expected one of {self.POLICIES}")
+        self.path = path
+        self.capacity = capacity
+        self.policy = policy
+        self.stats = {'evictions': 0}
+        self._slot_of = {}
+        self._recency = OrderedDict()
+        self._ranked = []
+        self._tick = 0
+        self._lock = threading.Lock()
+        self._closed = False
+        self._slots = self._open_slots()
+        self._free = []
+        self._next_slot = 0
+        self._load_index()
+
+    def __len__(self):
+        return len(self._slot_of)
+
+    def __contains__(self, mutation_id):
+        return mutation_id in self._slot_of
+
+    def __getitem__(self, mutation_id):
+        score = self.get(mutation_id)
+        if score is None:
+            raise KeyError(mutation_id)
+        return score
+
+    def __setitem__(self, mutation_id, score):
+        self.put(mutation_id, score)
+
+    def __delitem__(self, mutation_id):
+        if not self.discard(mutation_id):
+            raise KeyError(mutation_id)
+
+    def get(self, mutation_id, default=None):
+        with self._lock:
+            self._check_open()
+            slot = self._slot_of.get(mutation_id)
+            if slot is None:
+                return default
+            self._touch(mutation_id, slot)
+            return float(self._slots['score'][slot])
+
+    def scores(self, mutation_ids, default=np.nan):
+        """Stored scores aligned with mutation_ids as a float64 array, default where missing"""
+        with self._lock:
+            self._check_open()
+            slots = np.array([self._slot_of.get(i, -1) for i in mutation_ids], dtype=np.int64)
+            found = slots >= 0
+            result = np.full(len(slots), default, dtype=np.float64)
+            result[found] = self._slots['score'][slots[found]]
+            return result
+
+    def put(self, mutation_id, score):
+        score = float(score)
+        encoded = self._encode_id(mutation_id) if self.path is not None else None
+        with self._lock:
+            self._check_open()
+            slot = self._slot_of.get(mutation_id)
+            if slot is not None:
+                self._unrank(mutation_id, slot)
+            else:
+                slot = self._allocate()
+                self._slot_of[mutation_id] = slot
+                if encoded is not None:
+                    self._slots['id'][slot] = encoded
+            self._slots['score'][slot] = score
+            # The slot breaks score ties, so ids of different types are never compared
+            insort(self._ranked, (score, slot, mutation_id))
+            self._touch(mutation_id, slot)
+
+    def discard(self, mutation_id):
+        with self._lock:
+            self._check_open()
+            slot = self._slot_of.get(mutation_id)
+            if slot is None:
+                return False
+            self._release(mutation_id, slot)
+            return True
+
+    def top_k(self, k):
+        """The k best (mutation_id, score) pairs, highest score first"""
+        with self._lock:
+            self._check_open()
+            return [(mutation_id, score) for score, _, mutation_id in reversed(self._ranked[-k:])] if k > 0 else []
+
+    def items(self):
+        with self._lock:
+            self._check_open()
+            return [(mutation_id, float(self._slots['score'][slot])) for mutation_id, slot in self._slot_of.items()]
+
+    def flush(self):
+        if isinstance(self._slots, np.memmap):
+            self._slots.flush()
+
+    def close(self):
+        with self._lock:
+            if self._closed:
+                return
+            self.flush()
+            # Drop the mapping so the file can be reopened or removed
+            self._slots = np.zeros(0, dtype=SLOT_DTYPE)
+            self._slot_of.clear()
+            self._recency.clear()
+            self._ranked.clear()
+            self._free.clear()
+            self._closed = True
+
+    def _check_open(self):
+        # Caller holds the lock
+        if self._closed:
+            raise ValueError("Success rate store is closed")
+
+    def _allocate(self):
+        # Caller holds the lock
+        if self._free:
+            return self._free.pop()
+        if self._next_slot < self.capacity:
+            self._next_slot += 1
+            return self._next_slot - 1
+        victim = next(iter(self._recency)) if self.policy == 'lru' else self._ranked[0][2]
+        slot = self._slot_of[victim]
+        self._release(victim, slot)
+        self.stats['evictions'] += 1
+        return self._free.pop()
+
+    def _release(self, mutation_id, slot):
+        self._unrank(mutation_id, slot)
+        self._recency.pop(mutation_id, None)
+        del self._slot_of[mutation_id]
+        self._slots[slot] = 0
+        self._free.append(slot)
+
+    def _unrank(self, mutation_id, slot):
+        score = float(self._slots['score'][slot])
+        del self._ranked[bisect_left(self._ranked, (score, slot))]
+
+    def _encode_id(self, mutation_id):
+        if isinstance(mutation_id, bool) or not isinstance(mutation_id, Integral) or not 0 <= mutation_id < 2 ** (8 * ID_BYTES):
+            raise ValueError(
+                f"A file-backed store needs integer mutation ids in [0, 2**{8 * ID_BYTES}), got {mutation_id!r}"
+            )
+        return np.frombuffer(int(mutation_id).to_bytes(ID_BYTES, 'big'), dtype=np.uint8)
+
+    def _touch(self, mutation_id, slot):
+        self._tick += 1
+        self._slots['tick'][slot] = self._tick
+        self._recency[mutation_id] = slot
+        self._recency.move_to_end(mutation_id)
+
+    def _open_slots(self):
+        if self.path is None:
+            return np.zeros(self.capacity, dtype=SLOT_DTYPE)
+
+        expected = self.capacity * SLOT_DTYPE.itemsize
+        if os.path.exists(self.path):
+            size = os.path.getsize(self.path)
+            if size != expected:
+                raise ValueError(
+                    f"{self.path} holds {size // SLOT_DTYPE.itemsize} slots, expected capacity {self.capacity}"
+                )
+            return np.memmap(self.path, dtype=SLOT_DTYPE, mode='r+', shape=(self.capacity,))
+        return np.memmap(self.path, dtype=SLOT_DTYPE, mode='w+', shape=(self.capacity,))
+
+    def _load_index(self):
+        # Rebuild the id map, recency order and ranking from occupied slots
+        ticks = self._slots['tick']
+        occupied = np.flatnonzero(ticks)
+        for slot in occupied[np.argsort(ticks[occupied], kind='stable')]:
+            mutation_id = int.from_bytes(self._slots['id'][slot].tobytes(), 'big')
+            self._slot_of[mutation_id] = int(slot)
+            self._recency[mutation_id] = int(slot)
+            self._ranked.append((float(self._slots['score'][slot]), int(slot), mutation_id))
+        self._ranked.sort()
+        self._tick = int(ticks.max()) if len(occupied) else 0
+        # Holes left by deletions are reused before never-used slots
+        self._next_slot = int(occupied.max()) + 1 if len(occupied) else 0
+        self._free = [int(slot) for slot in np.flatnonzero(ticks[:self._next_slot] == 0)[::-1]]
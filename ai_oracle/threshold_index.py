@@ -0,0 +1,114 @@
+import threading
+from bisect import bisect_left, bisect_right, insort
+
+class ThresholdIndex:
+    """
+    Local cache of on-chain userThresholds for alert fan-out:
+    - Custom thresholds kept sorted per parameter
+    - critical_recipients() is a binary search plus a prefix slice
+    - refresh() re-reads only the users whose thresholds changed
+    """
+    PARAMS = ('minDuration', 'quorum', 'delay')
+
+    def __init__(self, contract):
+        self.contract = contract
+        self._thresholds = {}
+        self._sorted = {param: [] for param in self.PARAMS}
+        self._default_users = set()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._thresholds)
+
+    def __contains__(self, user):
+        return user in self._thresholds
+
+    def load(self, users):
+        """
+        Initial sync for a subscriber list: entries are stored first and each
+        per-parameter list is sorted once, instead of one insort per user
+        """
+        fetched = [(user, _normalize(self._fetch(user))) for user in users]
+        with self._lock:
+            for user, thresholds in fetched:
+                previous = self._thresholds.get(user)
+                if previous is not None and not previous['customEnabled']:
+                    self._default_users.discard(user)
+                self._thresholds[user] = thresholds
+                if not thresholds['customEnabled']:
+                    self._default_users.add(user)
+            custom = [(user, t) for user, t in self._thresholds.items() if t['customEnabled']]
+            for param in self.PARAMS:
+                self._sorted[param] = sorted((t[param], user) for user, t in custom)
+
+    def refresh(self, users):
+        """Re-read users whose thresholds changed on-chain"""
+        for user in users:
+            self.update(user, self._fetch(user))
+
+    def get(self, user):
+        thresholds = self._thresholds.get(user)
+        if thresholds is None:
+            thresholds = self._fetch(user)
+            self.update(user, thresholds)
+        return thresholds
+
+    def update(self, user, thresholds):
+        thresholds = _normalize(thresholds)
+        with self._lock:
+            self._unindex(user)
+            self._thresholds[user] = thresholds
+            if thresholds['customEnabled']:
+                for param in self.PARAMS:
+                    insort(self._sorted[param], (thresholds[param], user))
+            else:
+                self._default_users.add(user)
+
+    def remove(self, user):
+        with self._lock:
+            self._unindex(user)
+            self._thresholds.pop(user, None)
+
+    def critical_recipients(self, param, delta):
+        # Custom users whose threshold for param is at most delta
+        with self._lock:
+            entries = self._sorted.get(param, [])
+            end = bisect_right(entries, (delta, _MAX_USER))
+            return [user for _, user in entries[:end]]
+
+    def default_recipients(self):
+        # Users without custom thresholds fall back to protocol severity
+        with self._lock:
+            return list(self._default_users)
+
+    def _unindex(self, user):
+        previous = self._thresholds.get(user)
+        if previous is None:
+            return
+        if not previous['customEnabled']:
+            self._default_users.discard(user)
+            return
+        for param in self.PARAMS:
+            entries = self._sorted[param]
+            del entries[bisect_left(entries, (previous[param], user))]
+
+    def _fetch(self, user):
+        return self.contract.functions.userThresholds(user).call()
+
+def _normalize(thresholds):
+    return {
+        'minDuration': thresholds['minDuration'],
+        'quorum': thresholds['quorum'],
+        'delay': thresholds['delay'],
+        'customEnabled': thresholds['customEnabled']
+    }
+
+class _MaxUser:
+    # Sorts after every user so (delta, _MAX_USER) bounds all ties on delta
+    def __lt__(self, other):
+        return False
+
+    def __gt__(self, other):
+        return True
+
+_MAX_USER = _MaxUser()
@@ -0,0 +1,125 @@
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from numbers import Number
+from operator import attrgetter
+
+from ai_oracle.instrumentation import METRICS
+
+class VisualDNACache:
+    """
+    On-disk cache of rendered visual DNA:
+    - Keys are fingerprints of the render context with numbers quantized,
+      so small sentiment or pressure moves reuse the previous render
+    - Entries are evicted least-recently-used once max_bytes is exceeded
+    Values must be str (stored as UTF-8) or bytes.
+    """
+    def __init__(self, cache_dir, max_bytes=512 * 1024 * 1024, quantum=0.05):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.quantum = quantum
+        self.stats = {'hits': 0, 'misses': 0, 'evictions': 0}
+        METRICS.register_stats('visual_cache', self.stats, owner=self)
+        METRICS.register_gauge('visual_cache_bytes', attrgetter('size'), owner=self)
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+        self._load_index()
+
+    @property
+    def size(self):
+        return self._size
+
+    def key(self, context):
+        normalized = json.dumps(self._quantize(context), sort_keys=True, default=str)
+        return hashlib.sha256(normalized.encode('utf-8')).hexdigest()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.stats['misses'] += 1
+                return None
+            self._entries.move_to_end(key)
+            self.stats['hits'] += 1
+
+        filename = entry[0]
+        path = os.path.join(self.cache_dir, filename)
+        try:
+            with open(path, 'rb') as handle:
+                data = handle.read()
+            os.utime(path)
+        except OSError:
+            self._forget(key)
+            return None
+        return data.decode('utf-8') if filename.endswith('.txt') else data
+
+    def put(self, key, value):
+        if isinstance(value, str):
+            filename, data = f"{key}.txt", value.encode('utf-8')
+        elif isinstance(value, bytes):
+            filename, data = f"{key}.bin", value
+        else:
+            raise TypeError(f"Cannot cache visual DNA of type {type(value).__name__}")
+
+        path = os.path.join(self.cache_dir, filename)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'wb') as handle:
+            handle.write(data)
+        os.replace(tmp_path, path)
+
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._size -= previous[1]
+                if previous[0] != filename:
+                    self._remove_file(previous[0])
+            self._entries[key] = (filename, len(data))
+            self._size += len(data)
+            self._evict()
+
+    def _evict(self):
+        # Caller holds the lock; never evict the entry just written
+        while self._size > self.max_bytes and len(self._entries) > 1:
+            _, (filename, size) = self._entries.popitem(last=False)
+            self._size -= size
+            self.stats['evictions'] += 1
+            self._remove_file(filename)
+
+    def _forget(self, key):
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                self._size -= entry[1]
+
+    def _remove_file(self, filename):
+        try:
+            os.remove(os.path.join(self.cache_dir, filename))
+        except OSError:
+            pass
+
+    def _load_index(self):
+        # Rebuild recency order from file modification times
+        files = []
+        for filename in os.listdir(self.cache_dir):
+            if filename.endswith(('.txt', '.bin')):
+                stat = os.stat(os.path.join(self.cache_dir, filename))
+                files.append((stat.st_mtime, filename, stat.st_size))
+        for _, filename, size in sorted(files):
+            self._entries[filename[:-4]] = (filename, size)
+            self._size += size
+        with self._lock:
+            self._evict()
+
+    def _quantize(self, value):
+        if isinstance(value, bool) or not isinstance(value, Number):
+            if isinstance(value, dict):
+                return {str(k): self._quantize(v) for k, v in value.items()}
+            if isinstance(value, (list, tuple)):
+                return [self._quantize(v) for v in value]
+            return value
+        # Bucket index, so 0.51 and 0.52 share a key at quantum 0.05
+        return int(round(float(value) / self.quantum))
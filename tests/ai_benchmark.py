@@ -0,0 +1,287 @@
+"""
+Offline benchmarks for the ai_oracle hot paths.
+
+Everything runs against local stand-ins (fake contract, local HTTP sink,
+deterministic model fakes), so numbers only move when the code does:
+
+    python -m tests.ai_benchmark --output bench.json
+    python -m tests.ai_benchmark --update-baseline
+
+Results are compared with tests/ai_benchmark_baseline.json; a benchmark
+whose best time exceeds its baseline by more than the threshold counts
+as a regression and the run exits non-zero. The best of several rounds
+is compared rather than the median, since it is far less sensitive to
+other load on the machine.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+from unittest.mock import Mock
+
+import numpy as np
+
+from ai_oracle.evolution_metrics import DarwinianScorer
+from ai_oracle.fitness_calculator import AdaptiveFitnessCalculator
+from ai_oracle.gene_optimizer import AdaptiveGeneOptimizer, GenePoolManager
+from ai_oracle.governance_monitor import GovernanceWatcher
+from ai_oracle.island_model import IslandModel
+from ai_oracle.notification_dispatcher import NotificationDispatcher, WebhookSender
+from ai_oracle.simulator import RecombinationSimulator
+from tests.ai_engine_test import (
+    FakeGeneticDB,
+    FakeGovernanceContract,
+    WebhookSink,
+    make_governance_changes,
+    make_offline_engine
+)
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), 'ai_benchmark_baseline.json')
+DEFAULT_THRESHOLD = 0.5
+
+BENCHMARKS = {}
+
+def benchmark(name, items, threshold=DEFAULT_THRESHOLD):
+    """Register fn(config) -> callable; the callable is the timed body, run `repeat` times"""
+    def register(fn):
+        BENCHMARKS[name] = {'setup': fn, 'items': items, 'threshold': threshold}
+        return fn
+    return register
+
+def market_rows(count, seed=0):
+    rng = np.random.default_rng(seed)
+    return {
+        'holder_growth': rng.uniform(0, 10, count),
+        'trade_velocity': rng.uniform(0, 10, count),
+        'sentiment': rng.uniform(0, 10, count),
+        'meme_shares': rng.uniform(0, 10, count)
+    }
+
+@benchmark('darwinian_fitness_scalar', items=10000)
+def bench_darwinian_scalar(config):
+    scorer = DarwinianScorer()
+    columns = market_rows(10000)
+    rows = [dict(zip(columns, values)) for values in zip(*columns.values())]
+    return lambda: [scorer.calculate_fitness(i, row) for i, row in enumerate(rows)]
+
+@benchmark('darwinian_fitness_batch', items=1000000)
+def bench_darwinian_batch(config):
+    scorer = DarwinianScorer()
+    columns = market_rows(1000000)
+    ids = np.arange(1000000)
+    return lambda: scorer.calculate_fitness_batch(ids, columns)
+
+class StaticMarketFeed:
+    # Zero-latency market analyzer, so the benchmark measures scoring only
+    def current_state(self):
+        return {'trend': 'bearish', 'pressure_index': 20}
+
+def fitness_genes(count, seed=0):
+    rng = random.Random(seed)
+    factors = ('liquidity', 'volatility', 'social_score', 'holder_growth', 'burn_rate')
+    return [{factor: rng.random() for factor in factors} for _ in range(count)]
+
+@benchmark('adaptive_fitness_calculate', items=10000)
+def bench_adaptive_calculate(config):
+    calculator = AdaptiveFitnessCalculator(StaticMarketFeed())
+    genes = fitness_genes(10000)
+    return lambda: [calculator.calculate(gene) for gene in genes]
+
+@benchmark('adaptive_fitness_population', items=10000)
+def bench_adaptive_population(config):
+    calculator = AdaptiveFitnessCalculator(StaticMarketFeed())
+    genes = fitness_genes(10000)
+    return lambda: calculator.calculate_population(genes)
+
+def scenario_pool(size=50):
+    return [{'symbol': f"EvoV{i}_{'MEME' if i % 2 else 'DOGE'}{i}", 'burn_rate': 1 + i % 9} for i in range(size)]
+
+@benchmark('simulator_generate_scenario', items=2000)
+def bench_generate_scenario(config):
+    simulator = RecombinationSimulator(scenario_pool())
+
+    def run():
+        random.seed(config.seed)
+        return [simulator.generate_scenario(generations=5) for _ in range(2000)]
+    return run
+
+@benchmark('simulator_batch', items=100000)
+def bench_simulate_batch(config):
+    simulator = RecombinationSimulator(scenario_pool())
+    return lambda: simulator.simulate_batch(100000, generations=5, seed=config.seed, processes=1)
+
+@benchmark('pool_calculate_diversity', items=50000)
+def bench_calculate_diversity(config):
+    rng = random.Random(config.seed)
+    genes = [{'dominant_trait': f"trait{rng.randrange(40)}"} for _ in range(50000)]
+    manager = GenePoolManager(FakeGeneticDB())
+    return lambda: manager.calculate_diversity(genes)
+
+class StaticMarketAnalyzer(StaticMarketFeed):
+    def get_volatility(self):
+        return 0.4
+
+    def get_liquidity_ratio(self):
+        return 0.6
+
+@benchmark('island_model_generations', items=4 * 256 * 50)
+def bench_island_model(config):
+    # One process, so the number tracks per-core throughput rather than the machine's core count
+    market = StaticMarketAnalyzer()
+    model = IslandModel(AdaptiveFitnessCalculator(market), AdaptiveGeneOptimizer(market), processes=1)
+    return lambda: model.run(generations=50, seed=config.seed)
+
+@benchmark('governance_watch_changes', items=500, threshold=0.75)
+def bench_watch_changes(config):
+    changes = make_governance_changes(500)
+
+    def run():
+        # Fresh watcher each round so every run backfills the full history
+        contract = FakeGovernanceContract(changes, latency=config.rpc_latency)
+        return GovernanceWatcher(contract).watch_changes()
+    return run
+
+@benchmark('notifier_dispatch', items=200, threshold=0.75)
+def bench_notifier_dispatch(config):
+    sink = WebhookSink(delay=config.sink_delay)
+    config.cleanup.append(sink.close)
+    dispatcher = NotificationDispatcher({'webhook': WebhookSender(sink.url)})
+    config.cleanup.append(dispatcher.close)
+    payloads = [{'text': f"change {i}", 'severity': 'INFO'} for i in range(200)]
+
+    def run():
+        for payload in payloads:
+            dispatcher.submit('webhook', payload)
+        dispatcher.join()
+    return run
+
+@benchmark('mutation_cycle', items=3, threshold=0.75)
+def bench_mutation_cycle(config):
+    engine = make_offline_engine()
+    sentiment = {'basic_sentiment': 0.5, 'environmental_pressure': 0.2}
+    engine.fetch_social_data = Mock(return_value={'text': [], 'media': []})
+    engine.analyze_market_sentiment = Mock(return_value=sentiment)
+    engine.calculate_adaptive_burn_rate = Mock(return_value=3)
+
+    # Deterministic model fakes with fixed latencies
+    def symbol(sentiment, trend):
+        time.sleep(config.llm_latency)
+        return f"EvoV2_{trend}"
+
+    def visual(sentiment, trend):
+        time.sleep(config.diffusion_latency)
+        return f"dna-{trend}"
+
+    engine.generate_evolved_symbol = symbol
+    engine.generate_visual_mutation = visual
+    return engine.generate_mutations
+
+def run_benchmarks(config):
+    results = {}
+    for name, spec in BENCHMARKS.items():
+        if config.only and name not in config.only:
+            continue
+        config.cleanup = []
+        try:
+            body = spec['setup'](config)
+            body()  # warm-up, not timed
+            timings = []
+            for _ in range(config.repeat):
+                started = time.perf_counter()
+                body()
+                timings.append(time.perf_counter() - started)
+        finally:
+            for cleanup in reversed(config.cleanup):
+                cleanup()
+
+        median = statistics.median(timings)
+        results[name] = {
+            'median_s': median,
+            'min_s': min(timings),
+            'items': spec['items'],
+            'items_per_s': spec['items'] / median if median > 0 else None,
+            'threshold': spec['threshold']
+        }
+    return {'environment': environment(), 'results': results}
+
+def environment():
+    return {
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'machine': platform.machine(),
+        'cpus': os.cpu_count()
+    }
+
+def compare(report, baseline, threshold=None):
+    """
+    Regressions of report against baseline. Each benchmark uses its own
+    stored threshold unless one is given; benchmarks missing on either side
+    are skipped.
+    """
+    regressions = []
+    for name, result in report['results'].items():
+        previous = baseline.get('results', {}).get(name)
+        if previous is None:
+            continue
+        limit = threshold if threshold is not None else previous.get('threshold', DEFAULT_THRESHOLD)
+        ratio = result['min_s'] / previous['min_s']
+        if ratio > 1 + limit:
+            regressions.append({
+                'name': name,
+                'baseline_s': previous['min_s'],
+                'current_s': result['min_s'],
+                'ratio': ratio,
+                'threshold': limit
+            })
+    return regressions
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--output', help='write the JSON report here')
+    parser.add_argument('--baseline', default=BASELINE_PATH)
+    parser.add_argument('--update-baseline', action='store_true', help='store this run as the new baseline')
+    parser.add_argument('--threshold', type=float, help='override every per-benchmark regression threshold')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--only', nargs='*', choices=sorted(BENCHMARKS))
+    parser.add_argument('--rpc-latency', type=float, default=0.001, help='seconds per fake contract call')
+    parser.add_argument('--sink-delay', type=float, default=0.0, help='seconds the HTTP sink holds each post')
+    parser.add_argument('--llm-latency', type=float, default=0.02)
+    parser.add_argument('--diffusion-latency', type=float, default=0.05)
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    config = parse_args(argv)
+    report = run_benchmarks(config)
+
+    for name, result in report['results'].items():
+        print(f"{name:32s} {result['median_s'] * 1000:10.2f} ms  {result['items_per_s'] or 0:14.0f} items/s")
+
+    if config.output:
+        with open(config.output, 'w') as handle:
+            json.dump(report, handle, indent=2, sort_keys=True)
+
+    if config.update_baseline:
+        with open(config.baseline, 'w') as handle:
+            json.dump(report, handle, indent=2, sort_keys=True)
+        return 0
+
+    if not os.path.exists(config.baseline):
+        print(f"No baseline at {config.baseline}, run with --update-baseline to create one")
+        return 0
+    with open(config.baseline) as handle:
+        regressions = compare(report, json.load(handle), config.threshold)
+    for regression in regressions:
+        print(
+            f"REGRESSION {regression['name']}: {regression['current_s'] * 1000:.2f} ms vs "
+            f"{regression['baseline_s'] * 1000:.2f} ms baseline ({regression['ratio']:.2f}x, "
+            f"threshold {1 + regression['threshold']:.2f}x)"
+        )
+    return 1 if regressions else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,9 +1,43 @@
+import gc
+import json
+import os
+import queue
+import random
+import tempfile
+import threading
+import time
 import unittest
+import urllib.request
+import weakref
 import numpy as np
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from operator import attrgetter
 from unittest.mock import Mock, patch
-from ai_oracle.main import EvolutionEngine
-from ai_oracle.gene_optimizer import AdaptiveGeneOptimizer
+from ai_oracle import dna
+from ai_oracle.main import DNAGenerator, EvolutionEngine, MultimodalEvolutionEngine
+from ai_oracle.gene_recombiner import EnhancedGeneRecombiner, GeneRecombiner, GeneticOptimizer, recombine_genes
+from ai_oracle.gene_optimizer import AdaptiveGeneOptimizer, GenePool, GenePoolManager, TraitEntropy
 from ai_oracle.mutation_model import MutationProbabilityModel
+from ai_oracle.evolution_metrics import DarwinianScorer, EnhancedScorer
+from ai_oracle.evolution_predictor import EvolutionaryPredictor, StreamingPredictor
+from ai_oracle.fitness_calculator import AdaptiveFitnessCalculator
+from ai_oracle.governance_history import GovernanceHistory
+from ai_oracle.governance_monitor import GovernanceWatcher
+from ai_oracle.instrumentation import METRICS, Metrics
+from ai_oracle.island_model import IslandModel
+from ai_oracle.market_snapshot import MarketSnapshot
+from ai_oracle.model_registry import ModelRegistry
+from ai_oracle.mutation_engine import MutationProbabilityEngine
+from ai_oracle.notification_dispatcher import NotificationDispatcher, WebhookSender
+from ai_oracle.prompt_cache import PromptCache
+from ai_oracle.notification_service import GovernanceNotifier, PersonalizedNotifier, PriorityNotifier
+from ai_oracle.sentiment_inference import SentimentInference
+from ai_oracle.similarity_index import SimilarityIndex, dna_shingles, mutation_shingles, symbol_shingles
+from ai_oracle.simulator import RecombinationSimulator
+from ai_oracle.success_store import SuccessRateStore
+from ai_oracle.social_stream import SentimentAggregate, SocialStream, normalize_text
+from ai_oracle.threshold_index import ThresholdIndex
+from ai_oracle.visual_cache import VisualDNACache
 
 class TestEvolutionEngine(unittest.TestCase):
     def setUp(self):
@@ -100,6 +134,128 @@ class TestGeneOptimizer(unittest.TestCase):
             })
             
         self.assertLessEqual(len(self.optimizer.genetic_pool), 100)
+        self.assertEqual(self.optimizer.genetic_pool[0]['id'], 20)
+        self.assertEqual(self.optimizer.genetic_pool[-1]['id'], 119)
+
+    def test_configurable_pool_capacity(self):
+        optimizer = AdaptiveGeneOptimizer(self.market_analyzer, pool_capacity=100000)
+        for i in range(100005):
+            optimizer.update_genetic_pool({'id': i, 'burn_rate': i % 10, 'mutation_rate': 0.1})
+
+        self.assertEqual(len(optimizer.genetic_pool), 100000)
+        self.assertEqual(optimizer.genetic_pool[0].id, 5)
+
+class TestGenePool(unittest.TestCase):
+    def test_ring_buffer_eviction(self):
+        pool = GenePool(capacity=3)
+        evicted = [
+            pool.append({'id': i, 'burn_rate': float(i), 'mutation_rate': 0.1})
+            for i in range(5)
+        ]
+
+        self.assertEqual(evicted, [None, None, None, 0, 1])
+        self.assertEqual([gene.id for gene in pool], [2, 3, 4])
+        self.assertEqual(pool[-1].to_dict(), {'id': 4, 'burn_rate': 4.0, 'mutation_rate': 0.1})
+        with self.assertRaises(IndexError):
+            pool[3]
+
+    def test_rejects_malformed_genes(self):
+        pool = GenePool(capacity=3)
+        pool.append({'id': 1, 'burn_rate': 2.0, 'mutation_rate': 0.1})
+        bad = (
+            ({'id': 'EvoV2Phoenix', 'burn_rate': 2.0, 'mutation_rate': 0.1}, "'id'"),
+            ({'id': 2 ** 70, 'burn_rate': 2.0, 'mutation_rate': 0.1}, "'id'"),
+            ({'burn_rate': 2.0}, "'mutation_rate'"),
+            ({'burn_rate': None, 'mutation_rate': 0.1}, "'burn_rate'"),
+            ({'burn_rate': float('nan'), 'mutation_rate': 0.1}, "'burn_rate'"),
+        )
+        for gene, field in bad:
+            with self.assertRaisesRegex(ValueError, field):
+                pool.append(gene)
+        # Nothing was written and ids keep counting from the last good gene
+        self.assertEqual([gene.to_dict() for gene in pool], [{'id': 1, 'burn_rate': 2.0, 'mutation_rate': 0.1}])
+        pool.append({'burn_rate': np.float32(1.5), 'mutation_rate': 0})
+        self.assertEqual(pool[-1].id, 2)
+
+    def test_zero_copy_columns(self):
+        pool = GenePool(capacity=4)
+        for i in range(6):
+            pool.append({'id': i, 'burn_rate': float(i), 'mutation_rate': i / 10})
+
+        columns = pool.columns()
+        self.assertTrue(np.shares_memory(columns['burn_rate'], pool.burn_rates))
+        self.assertEqual(sorted(columns['id'].tolist()), [2, 3, 4, 5])
+        self.assertEqual(columns['id'][pool.oldest_first()].tolist(), [2, 3, 4, 5])
+
+    def test_row_views_are_slotted(self):
+        pool = GenePool()
+        pool.append({'burn_rate': 3, 'mutation_rate': 0.2})
+        gene = pool[0]
+
+        self.assertEqual(gene.id, 0)
+        with self.assertRaises(AttributeError):
+            gene.extra = 1
+        with self.assertRaises(KeyError):
+            gene['symbol']
+
+class FakeGeneticDB:
+    def __init__(self, genes=()):
+        self.genes = list(genes)
+        self.full_reads = 0
+
+    def get_all_genes(self):
+        self.full_reads += 1
+        return list(self.genes)
+
+    def add_gene(self, gene):
+        self.genes.append(gene)
+
+    def remove_oldest(self, count):
+        del self.genes[:count]
+
+class TestPoolDiversity(unittest.TestCase):
+    def _reference_diversity(self, genes):
+        counts = {}
+        for gene in genes:
+            counts[gene['dominant_trait']] = counts.get(gene['dominant_trait'], 0) + 1
+        if len(counts) < 2:
+            return 0.0
+        probabilities = np.array(list(counts.values())) / len(genes)
+        return float(-(probabilities * np.log(probabilities)).sum() / np.log(len(counts)))
+
+    def test_running_entropy_matches_full_scan(self):
+        rng = random.Random(5)
+        traits = TraitEntropy()
+        genes = []
+        for step in range(3000):
+            if genes and rng.random() < 0.3:
+                traits.remove(genes.pop(rng.randrange(len(genes)))['dominant_trait'])
+            else:
+                gene = {'dominant_trait': rng.choice('ABCDEFG'[:rng.randint(1, 7)])}
+                genes.append(gene)
+                traits.add(gene['dominant_trait'])
+            if step % 100 == 0:
+                self.assertAlmostEqual(traits.diversity(), self._reference_diversity(genes), places=9)
+
+    def test_single_trait_has_zero_diversity(self):
+        manager = GenePoolManager(FakeGeneticDB())
+        self.assertEqual(manager.calculate_diversity([{'dominant_trait': 'fire'}] * 5), 0.0)
+        self.assertEqual(manager.calculate_diversity([]), 0.0)
+
+    def test_maintenance_without_full_pool_reads(self):
+        db = FakeGeneticDB({'dominant_trait': t} for t in 'AB' * 30)
+        manager = GenePoolManager(db)
+        manager.introduce_mutations = Mock()
+
+        for i in range(100):
+            manager.add_gene({'dominant_trait': 'A' if i % 5 else 'C'})
+            manager.maintain_pool_diversity()
+
+        self.assertEqual(db.full_reads, 1)
+        self.assertLessEqual(manager.traits.total, manager.optimal_size + 1)
+        self.assertEqual(manager.traits.total, len(db.genes))
+        self.assertAlmostEqual(manager.traits.diversity(), self._reference_diversity(db.genes))
+        self.assertTrue(manager.introduce_mutations.called)
 
 class TestMutationModel(unittest.TestCase):
     def setUp(self):
@@ -131,6 +287,2465 @@ class TestMutationModel(unittest.TestCase):
         
         self.assertGreater(rate_volatile, rate_stable)
 
+class TestBatchScoring(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(7)
+        size = 500
+        self.ids = list(range(size))
+        self.columns = {
+            'holder_growth': rng.uniform(0, 20, size),
+            'trade_velocity': rng.uniform(0, 20, size),
+            'sentiment': rng.uniform(-1, 1, size),
+            'meme_shares': rng.uniform(0, 50, size),
+            'market_cap': rng.uniform(1e8, 2e9, size),
+            'eth_price': rng.uniform(1500, 4000, size)
+        }
+
+    def _rows(self):
+        return [
+            {name: column[i] for name, column in self.columns.items()}
+            for i in self.ids
+        ]
+
+    def test_batch_matches_scalar_path(self):
+        for scorer in (DarwinianScorer(), EnhancedScorer()):
+            batch = scorer.calculate_fitness_batch(self.ids, self.columns)
+            scalar = [scorer.calculate_fitness(i, row) for i, row in zip(self.ids, self._rows())]
+
+            self.assertEqual(batch.shape, (len(self.ids),))
+            np.testing.assert_allclose(batch, scalar, rtol=1e-12)
+
+    def test_structured_array_input(self):
+        frame = np.zeros(len(self.ids), dtype=[(name, 'f8') for name in self.columns])
+        for name, column in self.columns.items():
+            frame[name] = column
+
+        scorer = EnhancedScorer()
+        np.testing.assert_allclose(
+            scorer.calculate_fitness_batch(self.ids, frame),
+            scorer.calculate_fitness_batch(self.ids, self.columns)
+        )
+
+    def test_shared_market_values_broadcast(self):
+        columns = dict(self.columns, market_cap=2e9, eth_price=2000)
+        scores = EnhancedScorer().calculate_fitness_batch(self.ids, columns)
+        base = DarwinianScorer().calculate_fitness_batch(self.ids, columns)
+
+        np.testing.assert_allclose(scores, base * 0.5)
+
+    def test_column_length_mismatch(self):
+        columns = dict(self.columns, sentiment=np.zeros(3))
+        with self.assertRaises(ValueError):
+            DarwinianScorer().calculate_fitness_batch(self.ids, columns)
+
+class CountingMarketFeed:
+    def __init__(self, delay=0):
+        self.delay = delay
+        self.reads = 0
+        self._lock = threading.Lock()
+
+    def _fetch(self, value):
+        time.sleep(self.delay)
+        with self._lock:
+            self.reads += 1
+        return value
+
+    def current_state(self):
+        return self._fetch({'trend': 'bearish', 'pressure_index': 20})
+
+    def get_volatility(self):
+        return self._fetch(0.5)
+
+    def get_liquidity(self):
+        return self._fetch(0.4)
+
+    def get_liquidity_ratio(self):
+        return self._fetch(0.6)
+
+    def get_liquidity_index(self):
+        return self._fetch(0.2)
+
+class TestMarketSnapshot(unittest.TestCase):
+    def setUp(self):
+        self.now = 0.0
+        self.feed = CountingMarketFeed()
+        self.snapshot = MarketSnapshot(self.feed, ttl=10, clock=lambda: self.now)
+        self.gene = {
+            'liquidity': 1, 'volatility': 1, 'social_score': 1,
+            'holder_growth': 1, 'burn_rate': 1
+        }
+
+    def test_population_scoring_costs_one_feed_read(self):
+        calculator = AdaptiveFitnessCalculator(self.snapshot)
+        scores = [calculator.calculate(self.gene) for _ in range(200)]
+
+        self.assertEqual(self.feed.reads, 1)
+        self.assertEqual(scores, calculator.calculate_population([self.gene] * 200))
+
+    def test_shared_between_calculators(self):
+        model = MutationProbabilityModel(self.snapshot)
+        engine = MutationProbabilityEngine(self.snapshot)
+        optimizer = AdaptiveGeneOptimizer(self.snapshot)
+        for _ in range(50):
+            model.calculate_rate({'burn_rate': 5})
+            engine.calculate_mutation_probability({})
+            optimizer.evolve_parameters({})
+
+        # volatility, liquidity, liquidity_index, liquidity_ratio
+        self.assertEqual(self.feed.reads, 4)
+
+    def test_ttl_expiry(self):
+        self.snapshot.get_volatility()
+        self.now = 9.9
+        self.snapshot.get_volatility()
+        self.assertEqual(self.feed.reads, 1)
+
+        self.now = 10.0
+        self.snapshot.get_volatility()
+        self.assertEqual(self.feed.reads, 2)
+
+    def test_pinned_generation_ignores_ttl(self):
+        with self.snapshot.pin_generation():
+            self.snapshot.current_state()
+            self.now = 1000
+            self.snapshot.current_state()
+            self.assertEqual(self.feed.reads, 1)
+
+        # Next generation starts from a fresh read
+        self.snapshot.current_state()
+        self.assertEqual(self.feed.reads, 2)
+
+    def test_generation_tracks_dropped_values(self):
+        self.snapshot.current_state()
+        self.assertEqual(self.snapshot.generation, 0)
+        self.now = 10.0
+        self.snapshot.current_state()
+        self.assertEqual(self.snapshot.generation, 1)
+
+        with self.snapshot.pin_generation():
+            self.snapshot.current_state()
+            self.assertEqual(self.snapshot.generation, 2)
+        self.assertEqual(self.snapshot.generation, 3)
+        # Nothing cached, nothing to drop
+        self.snapshot.invalidate()
+        self.assertEqual(self.snapshot.generation, 3)
+
+    def test_concurrent_callers_coalesce(self):
+        feed = CountingMarketFeed(delay=0.05)
+        snapshot = MarketSnapshot(feed, ttl=60)
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(snapshot.current_state()))
+            for _ in range(16)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(feed.reads, 1)
+        self.assertEqual(len(results), 16)
+
+    def test_failed_fetch_is_not_cached(self):
+        feed = Mock()
+        feed.get_volatility.side_effect = [RuntimeError('feed down'), 0.3]
+        snapshot = MarketSnapshot(feed)
+
+        with self.assertRaises(RuntimeError):
+            snapshot.get_volatility()
+        self.assertEqual(snapshot.get_volatility(), 0.3)
+
+class FakeContractCall:
+    def __init__(self, contract, name, args):
+        self.contract = contract
+        self.name = name
+        self.args = args
+
+    def call(self):
+        return self.contract.rpc(self.name, *self.args)
+
+class FakeContractFunctions:
+    def __init__(self, contract):
+        self.contract = contract
+
+    def __getattr__(self, name):
+        return lambda *args: FakeContractCall(self.contract, name, args)
+
+class FakeGovernanceContract:
+    """Local chain stand-in with configurable RPC latency"""
+    def __init__(self, changes=(), latency=0, thresholds=None):
+        self.changes = list(changes)
+        self.thresholds = dict(thresholds or {})
+        self.latency = latency
+        self.rpc_calls = []
+        self.active = 0
+        self.peak_concurrency = 0
+        self._lock = threading.Lock()
+        self.functions = FakeContractFunctions(self)
+
+    def rpc(self, name, *args):
+        with self._lock:
+            self.rpc_calls.append((name, args))
+            self.active += 1
+            self.peak_concurrency = max(self.peak_concurrency, self.active)
+        try:
+            time.sleep(self.latency)
+            if name == 'governanceHistoryLength':
+                return len(self.changes)
+            if name == 'governanceHistory':
+                return self.changes[args[0]]
+            if name == 'userThresholds':
+                return self.thresholds[args[0]]
+            raise AttributeError(name)
+        finally:
+            with self._lock:
+                self.active -= 1
+
+    def multicall(self, calls):
+        with self._lock:
+            self.rpc_calls.append(('multicall', (len(calls),)))
+        return [self.changes[call.args[0]] for call in calls]
+
+    def calls_to(self, name):
+        return [args for called, args in self.rpc_calls if called == name]
+
+def make_governance_changes(count, start=0):
+    return [
+        (1000 + i, 3 + i % 5, 10 + i % 40, 21600 + i)
+        for i in range(start, start + count)
+    ]
+
+class TestGovernanceBackfill(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.log_path = os.path.join(self.tmpdir.name, 'governance.log')
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_incremental_watch(self):
+        contract = FakeGovernanceContract(make_governance_changes(1))
+        watcher = GovernanceWatcher(contract)
+
+        self.assertEqual(len(watcher.watch_changes()), 1)
+        self.assertEqual(watcher.watch_changes(), [])
+
+        contract.changes.append((2000, 7, 20, 43200))
+        changes = watcher.watch_changes()
+        self.assertEqual(changes, [{'block': 2000, 'min_duration': 7, 'quorum': 20, 'delay': 43200}])
+
+    def test_concurrent_backfill_preserves_order(self):
+        changes = make_governance_changes(300)
+        contract = FakeGovernanceContract(changes, latency=0.002)
+        watcher = GovernanceWatcher(contract, max_workers=16, batch_size=64)
+
+        new_entries = watcher.watch_changes()
+
+        self.assertEqual(len(new_entries), 300)
+        self.assertEqual([e['block'] for e in watcher.history], [c[0] for c in changes])
+        self.assertGreater(contract.peak_concurrency, 1)
+        self.assertLessEqual(contract.peak_concurrency, 16)
+
+    def test_multicall_batches(self):
+        contract = FakeGovernanceContract(make_governance_changes(250))
+        watcher = GovernanceWatcher(contract, batch_size=100, multicall=contract.multicall)
+
+        watcher.backfill()
+
+        self.assertEqual(contract.calls_to('multicall'), [(100,), (100,), (50,)])
+        self.assertEqual(contract.calls_to('governanceHistory'), [])
+        self.assertEqual(watcher.history[-1]['block'], 1249)
+
+    def test_restart_resumes_from_checkpoint(self):
+        contract = FakeGovernanceContract(make_governance_changes(120))
+        GovernanceWatcher(contract, checkpoint_path=self.log_path).backfill()
+        self.assertEqual(os.path.getsize(self.log_path), 120 * GovernanceWatcher.CHECKPOINT_RECORD.size)
+
+        contract.changes.extend(make_governance_changes(5, start=120))
+        contract.rpc_calls.clear()
+        watcher = GovernanceWatcher(contract, checkpoint_path=self.log_path)
+
+        self.assertEqual(len(watcher.history), 120)
+        new_entries = watcher.watch_changes()
+        self.assertEqual([e['block'] for e in new_entries], [1120, 1121, 1122, 1123, 1124])
+        self.assertEqual(
+            sorted(args[0] for args in contract.calls_to('governanceHistory')),
+            [120, 121, 122, 123, 124]
+        )
+
+    def test_restart_reads_only_retained_checkpoint_tail(self):
+        changes = make_governance_changes(120)
+        contract = FakeGovernanceContract(changes)
+        make_history = lambda: GovernanceHistory(retention=30, windows=(10,), alert_thresholds={'quorum': 0.5})
+        first = GovernanceWatcher(contract, checkpoint_path=self.log_path, history=make_history())
+        first.backfill()
+        self.assertTrue(first.history.alerts)
+
+        watcher = GovernanceWatcher(contract, checkpoint_path=self.log_path, history=make_history())
+        self.assertEqual(len(watcher.history), 120)
+        self.assertEqual(list(watcher.history), list(first.history))
+        # Windowed stats match; the EWMA restarts from the retained tail
+        for param, trend in watcher.rolling_trends(10).items():
+            expected = first.rolling_trends(10)[param]
+            self.assertEqual({k: trend[k] for k in ('mean', 'min', 'max', 'change', 'rate')},
+                             {k: expected[k] for k in ('mean', 'min', 'max', 'change', 'rate')})
+        # Replayed changes were alerted on before the restart
+        self.assertEqual(list(watcher.history.alerts), [])
+
+        contract.changes.append((5000, 9, 45, 40000))
+        self.assertEqual(len(watcher.watch_changes()), 1)
+        self.assertEqual(os.path.getsize(self.log_path), 121 * GovernanceWatcher.CHECKPOINT_RECORD.size)
+
+    def test_torn_checkpoint_record_is_refetched(self):
+        contract = FakeGovernanceContract(make_governance_changes(10))
+        GovernanceWatcher(contract, checkpoint_path=self.log_path).backfill()
+        with open(self.log_path, 'ab') as log:
+            log.write(b'\x01\x02\x03')
+
+        watcher = GovernanceWatcher(contract, checkpoint_path=self.log_path)
+        self.assertEqual(len(watcher.history), 10)
+        self.assertEqual(os.path.getsize(self.log_path), 10 * GovernanceWatcher.CHECKPOINT_RECORD.size)
+        self.assertEqual(watcher.watch_changes(), [])
+
+class WebhookSink:
+    """Local HTTP stand-in that records JSON posts"""
+    def __init__(self, delay=0, failures=0, failure_status=503):
+        self.delay = delay
+        self.failures = failures
+        self.failure_status = failure_status
+        self.payloads = []
+        self.client_ports = set()
+        self.received = threading.Event()
+        sink = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers['Content-Length']))
+                time.sleep(sink.delay)
+                sink.client_ports.add(self.client_address[1])
+                if sink.failures > 0:
+                    sink.failures -= 1
+                    status = sink.failure_status
+                else:
+                    sink.payloads.append(json.loads(body))
+                    sink.received.set()
+                    status = 200
+                self.send_response(status)
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/hook"
+        self.thread = threading.Thread(target=self.server.serve_forever, args=(0.05,), daemon=True)
+        self.thread.start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+class TestGovernanceHistory(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(17)
+        self.entries = [
+            {'block': 1000 + 10 * i, 'min_duration': int(d), 'quorum': int(q), 'delay': int(l)}
+            for i, (d, q, l) in enumerate(zip(
+                rng.integers(1, 30, 400), rng.integers(5, 60, 400), rng.integers(3600, 90000, 400)
+            ))
+        ]
+
+    def test_rolling_stats_match_rescan(self):
+        history = GovernanceHistory(retention=64, windows=(5, 20, 64))
+        for count, entry in enumerate(self.entries, 1):
+            history.append(entry)
+            if count % 37:
+                continue
+            for window in history.windows:
+                recent = self.entries[max(count - window, 0):count]
+                for param in history.PARAMS:
+                    values = [e[param] for e in recent]
+                    trend = history.trend(param, window)
+                    self.assertAlmostEqual(trend['mean'], np.mean(values))
+                    self.assertEqual((trend['min'], trend['max']), (min(values), max(values)))
+                    self.assertEqual(trend['change'], values[-1] - values[0])
+                    self.assertAlmostEqual(
+                        trend['rate'], (values[-1] - values[0]) / (recent[-1]['block'] - recent[0]['block'])
+                    )
+
+    def test_ewma(self):
+        history = GovernanceHistory(windows=(3,))
+        for quorum in (10, 20, 20, 50):
+            history.append({'block': quorum, 'min_duration': 1, 'quorum': quorum, 'delay': 1})
+
+        # alpha = 2 / (3 + 1)
+        self.assertAlmostEqual(history.trend('quorum', 3)['ewma'], 33.75)
+
+    def test_retention_bounds_memory(self):
+        history = GovernanceHistory(retention=50, windows=(10,))
+        history.extend(self.entries)
+
+        self.assertEqual(len(history), 400)
+        self.assertEqual(history.first_index, 350)
+        self.assertEqual(history[-1], self.entries[-1])
+        self.assertEqual(history[360], self.entries[360])
+        self.assertEqual(list(history), self.entries[350:])
+        self.assertEqual(history[-3:], self.entries[-3:])
+        self.assertEqual(list(history.column('quorum')), [e['quorum'] for e in self.entries[350:]])
+        with self.assertRaises(IndexError):
+            history[10]
+        with self.assertRaises(ValueError):
+            GovernanceHistory(retention=50, windows=(100,))
+
+    def test_rate_of_change_alerts(self):
+        history = GovernanceHistory(windows=(4,), alert_thresholds={'quorum': 0.5})
+        steady = {'block': 1, 'min_duration': 3, 'quorum': 20, 'delay': 100}
+        for block in range(1, 6):
+            self.assertEqual(history.append(dict(steady, block=block)), [])
+
+        alerts = history.append(dict(steady, block=6, quorum=40))
+        self.assertEqual(alerts, [{'block': 6, 'param': 'quorum', 'window': 4, 'change': 20, 'relative_change': 1.0}])
+        # Unchanged follow-ups do not re-alert
+        self.assertEqual(history.append(dict(steady, block=7, quorum=40)), [])
+        self.assertEqual(list(history.alerts), alerts)
+
+    def test_watcher_uses_bounded_history(self):
+        changes = make_governance_changes(120)
+        contract = FakeGovernanceContract(changes)
+        watcher = GovernanceWatcher(contract, history=GovernanceHistory(retention=30, windows=(10, 30)))
+
+        self.assertEqual(len(watcher.watch_changes()), 30)
+        self.assertEqual(len(watcher.history), 120)
+        contract.changes.append((5000, 9, 45, 40000))
+        self.assertEqual(watcher.watch_changes(), [{'block': 5000, 'min_duration': 9, 'quorum': 45, 'delay': 40000}])
+
+        trends = watcher.rolling_trends(10)
+        self.assertEqual(trends['quorum']['max'], max([c[2] for c in changes[-9:]] + [45]))
+        self.assertEqual(trends['delay']['max'], 40000)
+        self.assertEqual(set(watcher.rolling_trends()), {10, 30})
+        self.assertEqual(watcher.analyze_trends()['quorum_trend'], 45 - changes[-1][2])
+
+    def test_truncate_rebuilds_rolling_stats(self):
+        history = GovernanceHistory(retention=64, windows=(5, 20))
+        history.extend(self.entries[:100])
+
+        dropped = history.truncate(90)
+        self.assertEqual(dropped, self.entries[90:100])
+        self.assertEqual(len(history), 90)
+        self.assertEqual(history[-1], self.entries[89])
+        # Windows only see retained entries after a rollback
+        values = [e['delay'] for e in self.entries[85:90]]
+        self.assertAlmostEqual(history.trend('delay', 5)['mean'], np.mean(values))
+        self.assertEqual(history.trend('delay', 5)['max'], max(values))
+
+        history.extend(self.entries[90:95])
+        values = [e['quorum'] for e in self.entries[75:95]]
+        self.assertAlmostEqual(history.trend('quorum', 20)['mean'], np.mean(values))
+        with self.assertRaises(ValueError):
+            history.truncate(10)
+
+class FakeChain:
+    """
+    Local chain stand-in for event mode: blocks carry GovernanceUpdated logs,
+    and reorg() swaps the newest blocks for a competing branch
+    """
+    def __init__(self):
+        self.blocks = [{'hash': 'genesis', 'changes': []}]
+        self.branch = 0
+        self.log_queries = []
+        self.eth = self
+        self.w3 = self
+        self.functions = self
+        self.events = self
+
+    @property
+    def block_number(self):
+        return len(self.blocks) - 1
+
+    def get_block(self, number):
+        return {'number': number, 'hash': self.blocks[number]['hash']}
+
+    def mine(self, *changes):
+        number = len(self.blocks)
+        self.blocks.append({'hash': f"{self.branch}:{number}", 'changes': list(changes)})
+        return number
+
+    def reorg(self, depth, *replacement):
+        """Drop the newest depth blocks and mine the replacement block contents instead"""
+        del self.blocks[len(self.blocks) - depth:]
+        self.branch += 1
+        for changes in replacement:
+            self.mine(*changes)
+
+    @property
+    def GovernanceUpdated(self):
+        return self
+
+    def get_logs(self, fromBlock, toBlock):
+        self.log_queries.append((fromBlock, toBlock))
+        return [
+            {
+                'blockNumber': number,
+                'blockHash': self.blocks[number]['hash'],
+                'logIndex': index,
+                'args': {'timestamp': c[0], 'newMinDuration': c[1], 'newQuorum': c[2], 'newDelay': c[3]}
+            }
+            for number in range(fromBlock, toBlock + 1)
+            for index, c in enumerate(self.blocks[number]['changes'])
+        ]
+
+    def governanceHistoryLength(self):
+        return FakeChainCall(lambda block: len(self._history(block)), self)
+
+    def governanceHistory(self, index):
+        return FakeChainCall(lambda block: self._history(block)[index], self)
+
+    def _history(self, block):
+        return [change for entry in self.blocks[:block + 1] for change in entry['changes']]
+
+class FakeChainCall:
+    def __init__(self, read, chain):
+        self.read = read
+        self.chain = chain
+
+    def call(self, block_identifier='latest'):
+        return self.read(self.chain.block_number if block_identifier == 'latest' else block_identifier)
+
+class TestGovernanceEvents(unittest.TestCase):
+    def setUp(self):
+        self.chain = FakeChain()
+        self.changes = make_governance_changes(20)
+
+    def entries(self, changes):
+        return [dict(zip(GovernanceHistory.FIELDS, change)) for change in changes]
+
+    def test_changes_arrive_as_blocks_land(self):
+        for change in self.changes[:5]:
+            self.chain.mine(change)
+        watcher = GovernanceWatcher(self.chain, confirmations=3)
+
+        # Catch-up: final blocks via backfill, the unconfirmed tail via logs
+        self.assertEqual(watcher.sync_events(), self.entries(self.changes[:5]))
+        self.assertEqual(self.chain.log_queries, [(3, 5)])
+
+        self.chain.mine()
+        self.chain.mine(self.changes[5], self.changes[6])
+        self.assertEqual(watcher.sync_events(), self.entries(self.changes[5:7]))
+        self.assertEqual(self.chain.log_queries[-1], (6, 7))
+        self.assertEqual(watcher.sync_events(), [])
+        self.assertEqual(len(self.chain.log_queries), 2)
+
+    def test_reorg_rolls_back_history(self):
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        log_path = os.path.join(tmpdir.name, 'governance.log')
+        for change in self.changes[:3]:
+            self.chain.mine(change)
+        watcher = GovernanceWatcher(self.chain, checkpoint_path=log_path, confirmations=4)
+        rolled_back = []
+        watcher.on_rollback = rolled_back.append
+        watcher.sync_events()
+
+        self.chain.mine(self.changes[3])
+        self.chain.mine(self.changes[4])
+        self.chain.mine()
+        self.assertEqual(len(watcher.sync_events()), 2)
+
+        # The two newest blocks are replaced; the change in block 5 never happened
+        self.chain.reorg(2, [self.changes[10]], [], [self.changes[11]])
+        self.assertEqual(watcher.sync_events(), self.entries(self.changes[10:12]))
+        self.assertEqual(rolled_back, [self.entries(self.changes[4:5])])
+        self.assertEqual(list(watcher.history), self.entries(self.changes[:4] + self.changes[10:12]))
+        self.assertEqual(watcher.stats['reorgs'], 1)
+        self.assertEqual(list(GovernanceWatcher(self.chain, checkpoint_path=log_path).history), list(watcher.history))
+
+    def test_reorg_onto_shorter_chain(self):
+        watcher = GovernanceWatcher(self.chain, confirmations=5)
+        watcher.sync_events()
+        self.chain.mine(self.changes[0])
+        self.chain.mine(self.changes[1])
+        watcher.sync_events()
+
+        self.chain.reorg(1)
+        self.assertEqual(watcher.sync_events(), [])
+        self.assertEqual(list(watcher.history), self.entries(self.changes[:1]))
+        self.chain.mine(self.changes[2])
+        self.assertEqual(watcher.sync_events(), self.entries(self.changes[2:3]))
+
+    def test_confirmed_blocks_are_not_rechecked(self):
+        watcher = GovernanceWatcher(self.chain, confirmations=2)
+        for change in self.changes[:10]:
+            self.chain.mine(change)
+            watcher.sync_events()
+
+        # Only the final checkpoint plus the blocks still within the window are kept
+        self.assertEqual([number for number, _, _ in watcher._block_checkpoints], [8, 9, 10])
+        self.assertEqual(list(watcher.history), self.entries(self.changes[:10]))
+
+    def test_falls_back_to_polling_without_events(self):
+        contract = FakeGovernanceContract(make_governance_changes(3))
+        watcher = GovernanceWatcher(contract)
+        self.assertEqual(len(watcher.sync_events()), 3)
+
+        # Provider rejects eth_getLogs
+        self.chain.mine(self.changes[0])
+        self.chain.get_logs = Mock(side_effect=ValueError('method not supported'))
+        watcher = GovernanceWatcher(self.chain, confirmations=0)
+        self.assertEqual(watcher.sync_events(), self.entries(self.changes[:1]))
+        self.chain.mine(self.changes[1])
+        self.assertEqual(watcher.sync_events(), self.entries(self.changes[1:2]))
+        self.chain.mine(self.changes[2])
+        self.assertEqual(watcher.sync_events(), self.entries(self.changes[2:3]))
+        self.assertEqual(self.chain.get_logs.call_count, 1)
+
+    def test_notifier_subscription(self):
+        sink = WebhookSink()
+        self.addCleanup(sink.close)
+        watcher = GovernanceWatcher(self.chain, confirmations=2)
+        notifier = GovernanceNotifier(self.chain, sink.url, watcher=watcher)
+        heads = queue.Queue()
+
+        def new_heads():
+            while True:
+                head = heads.get()
+                if head is None:
+                    return
+                yield head
+
+        notifier.subscribe(new_blocks=new_heads())
+        for change in self.changes[:3]:
+            heads.put(self.chain.mine(change))
+        heads.put(None)
+        watcher._subscriber.join()
+        notifier.close()
+
+        self.assertEqual(sorted(p['timestamp'] for p in sink.payloads), [1000, 1001, 1002])
+
+    def test_notifier_retracts_rolled_back_changes(self):
+        sink = WebhookSink()
+        self.addCleanup(sink.close)
+        watcher = GovernanceWatcher(self.chain, confirmations=4)
+        notifier = GovernanceNotifier(self.chain, sink.url, watcher=watcher)
+        notifier.monitor()
+        self.chain.mine(self.changes[0])
+        self.chain.mine(self.changes[1])
+        notifier.monitor()
+
+        self.chain.reorg(1, [self.changes[2]])
+        notifier.monitor()
+        notifier.close()
+
+        sent = sorted((p['type'], p['timestamp']) for p in sink.payloads)
+        self.assertEqual(sent, [
+            ('governance_change', 1000), ('governance_change', 1001), ('governance_change', 1002),
+            ('governance_change_retracted', 1001)
+        ])
+
+    def test_concurrent_syncs_record_each_change_once(self):
+        watcher = GovernanceWatcher(self.chain, confirmations=3)
+        watcher.sync_events()
+        for change in self.changes[:10]:
+            self.chain.mine(change)
+        slow_logs = self.chain.get_logs
+
+        def get_logs(fromBlock, toBlock):
+            time.sleep(0.05)
+            return slow_logs(fromBlock, toBlock)
+
+        self.chain.get_logs = get_logs
+        received = []
+        threads = [threading.Thread(target=lambda: received.extend(watcher.sync_events())) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(received, self.entries(self.changes[:10]))
+        self.assertEqual(list(watcher.history), self.entries(self.changes[:10]))
+
+    def test_polling_subscription_reads_logs_only_on_new_heads(self):
+        watcher = GovernanceWatcher(self.chain, confirmations=1)
+        received = []
+        watcher.subscribe(received.extend, poll_interval=0.01)
+        self.addCleanup(watcher.unsubscribe)
+
+        self.chain.mine(self.changes[0])
+        deadline = time.monotonic() + 2
+        while not received and time.monotonic() < deadline:
+            time.sleep(0.01)
+        time.sleep(0.1)
+        watcher.unsubscribe()
+
+        self.assertEqual(received, self.entries(self.changes[:1]))
+        self.assertGreater(watcher.stats['polls'], len(self.chain.log_queries) + 2)
+
+    def test_unsubscribe_with_stalled_head_stream(self):
+        watcher = GovernanceWatcher(self.chain, confirmations=1)
+        stalled = threading.Event()
+        self.addCleanup(stalled.set)
+
+        def new_heads():
+            yield self.chain.mine(self.changes[0])
+            stalled.wait()
+            yield self.chain.block_number
+
+        received = []
+        watcher.subscribe(received.extend, new_blocks=new_heads())
+        deadline = time.monotonic() + 2
+        while not received and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+        started = time.monotonic()
+        watcher.unsubscribe()
+        self.assertLess(time.monotonic() - started, 0.5)
+        self.assertIsNone(watcher._subscriber)
+        self.assertEqual(received, self.entries(self.changes[:1]))
+
+    def test_transient_log_errors_are_retried(self):
+        watcher = GovernanceWatcher(self.chain, confirmations=0)
+        watcher.sync_events()
+        self.chain.mine(self.changes[0])
+        get_logs = self.chain.get_logs
+        self.chain.get_logs = Mock(side_effect=ValueError({'code': -32005, 'message': 'rate limited'}))
+        with self.assertRaises(ValueError):
+            watcher.sync_events()
+
+        # Events stay enabled and the next call picks up where the failure left off
+        self.chain.get_logs = get_logs
+        self.chain.mine(self.changes[1])
+        self.assertEqual(watcher.sync_events(), self.entries(self.changes[:2]))
+        self.assertEqual(self.chain.log_queries, [(1, 2)])
+
+    def test_unsupported_log_errors_disable_events(self):
+        watcher = GovernanceWatcher(self.chain, confirmations=0)
+        watcher.sync_events()
+        self.chain.mine(self.changes[0])
+        self.chain.get_logs = Mock(side_effect=ValueError({'code': -32601, 'message': 'the method eth_getLogs is unknown'}))
+        self.assertEqual(watcher.sync_events(), self.entries(self.changes[:1]))
+        self.assertFalse(watcher._events_available)
+
+    def test_catch_up_reads_logs_in_bounded_ranges(self):
+        watcher = GovernanceWatcher(self.chain, confirmations=0, max_log_range=4)
+        watcher.sync_events()
+        for change in self.changes[:10]:
+            self.chain.mine(change)
+        calls = []
+        get_logs = self.chain.get_logs
+
+        def failing_get_logs(fromBlock, toBlock):
+            calls.append(fromBlock)
+            if len(calls) == 2:
+                raise ValueError('block range too large')
+            return get_logs(fromBlock, toBlock)
+
+        # A failure keeps the ranges already read
+        self.chain.get_logs = failing_get_logs
+        with self.assertRaises(ValueError):
+            watcher.sync_events()
+        self.assertEqual(list(watcher.history), self.entries(self.changes[:4]))
+
+        self.assertEqual(watcher.sync_events(), self.entries(self.changes[4:10]))
+        self.assertEqual(self.chain.log_queries, [(1, 4), (5, 8), (9, 10)])
+        self.assertEqual(list(watcher.history), self.entries(self.changes[:10]))
+
+    def test_subscription_survives_sync_errors(self):
+        watcher = GovernanceWatcher(self.chain, confirmations=0)
+        watcher.sync_events()
+        get_logs = self.chain.get_logs
+        failures = [ValueError('rate limited')]
+
+        def flaky_get_logs(fromBlock, toBlock):
+            if failures:
+                raise failures.pop()
+            return get_logs(fromBlock, toBlock)
+
+        self.chain.get_logs = flaky_get_logs
+        heads = queue.Queue()
+
+        def new_heads():
+            while True:
+                head = heads.get()
+                if head is None:
+                    return
+                yield head
+
+        received = []
+        watcher.subscribe(received.extend, new_blocks=new_heads())
+        heads.put(self.chain.mine(self.changes[0]))
+        deadline = time.monotonic() + 2
+        while not watcher.stats['errors'] and time.monotonic() < deadline:
+            time.sleep(0.01)
+        heads.put(self.chain.mine(self.changes[1]))
+        heads.put(None)
+        watcher._subscriber.join()
+        watcher.unsubscribe()
+
+        self.assertEqual(watcher.stats['errors'], 1)
+        self.assertEqual(received, self.entries(self.changes[:2]))
+
+class TestNotificationDispatch(unittest.TestCase):
+    def setUp(self):
+        self.sink = WebhookSink()
+
+    def tearDown(self):
+        self.sink.close()
+
+    def test_monitor_does_not_wait_for_delivery(self):
+        self.sink.delay = 0.3
+        contract = FakeGovernanceContract(make_governance_changes(3))
+        notifier = GovernanceNotifier(contract, self.sink.url)
+
+        started = time.monotonic()
+        self.assertTrue(notifier.monitor())
+        self.assertLess(time.monotonic() - started, 0.25)
+
+        notifier.close()
+        self.assertEqual(sorted(p['timestamp'] for p in self.sink.payloads), [1000, 1001, 1002])
+
+    def test_close_stops_subscription_and_workers(self):
+        chain = FakeChain()
+        notifier = PriorityNotifier(chain, self.sink.url, watcher=GovernanceWatcher(chain, confirmations=0))
+        notifier.subscribe(poll_interval=0.01)
+        chain.mine((1000, 3, 10, 21600))
+        self.sink.received.wait(2)
+        workers = list(notifier.dispatcher._workers)
+
+        notifier.close()
+        self.assertIsNone(notifier.watcher._subscriber)
+        self.assertIsNone(notifier.watcher.on_rollback)
+        self.assertTrue(workers)
+        self.assertFalse(any(worker.is_alive() for worker in workers))
+        self.assertEqual([p['timestamp'] for p in self.sink.payloads], [1000])
+
+    def test_pooled_connection_reuse(self):
+        sender = WebhookSender(self.sink.url)
+        dispatcher = NotificationDispatcher({'webhook': sender}, workers_per_channel=1)
+        for i in range(20):
+            dispatcher.submit('webhook', {'n': i})
+        dispatcher.close()
+
+        self.assertEqual(len(self.sink.payloads), 20)
+        self.assertEqual(len(self.sink.client_ports), 1)
+
+    def test_retry_with_backoff(self):
+        self.sink.failures = 2
+        delays = []
+        dispatcher = NotificationDispatcher(
+            {'webhook': WebhookSender(self.sink.url)},
+            workers_per_channel=1,
+            backoff_base=0.1,
+            sleep=delays.append
+        )
+        dispatcher.submit('webhook', {'n': 1})
+        dispatcher.close()
+
+        self.assertEqual(self.sink.payloads, [{'n': 1}])
+        self.assertEqual(dispatcher.stats, {'sent': 1, 'retried': 2, 'failed': 0})
+        self.assertTrue(0 <= delays[0] <= 0.1 and 0 <= delays[1] <= 0.2)
+
+    def test_client_errors_fail_fast(self):
+        failures = []
+        dispatcher = NotificationDispatcher(
+            {'webhook': WebhookSender(self.sink.url)},
+            workers_per_channel=1,
+            on_failure=lambda channel, payload, exc: failures.append(exc.response.status_code),
+            sleep=lambda delay: None
+        )
+        self.sink.failures, self.sink.failure_status = 2, 400
+        dispatcher.submit('webhook', {'n': 1})
+        dispatcher.join()
+        self.assertEqual(failures, [400])
+        self.assertEqual(dispatcher.stats, {'sent': 0, 'retried': 0, 'failed': 1})
+
+        # Rate limiting is transient
+        self.sink.failures, self.sink.failure_status = 1, 429
+        dispatcher.submit('webhook', {'n': 2})
+        dispatcher.close()
+        self.assertEqual(self.sink.payloads, [{'n': 2}])
+        self.assertEqual(dispatcher.stats, {'sent': 1, 'retried': 1, 'failed': 1})
+
+    def test_close_waits_for_blocked_submits(self):
+        release = threading.Event()
+        dispatcher = NotificationDispatcher({'push': lambda message: release.wait()}, workers_per_channel=1, queue_size=1)
+        dispatcher.submit('push', {'n': 0})
+        time.sleep(0.05)
+        dispatcher.submit('push', {'n': 1})
+        # Blocks on the full queue while close() runs
+        blocked = threading.Thread(target=dispatcher.submit, args=('push', {'n': 2}))
+        blocked.start()
+        time.sleep(0.05)
+        closer = threading.Thread(target=dispatcher.close)
+        closer.start()
+        time.sleep(0.05)
+
+        release.set()
+        blocked.join()
+        closer.join()
+        self.assertEqual(dispatcher.stats['sent'], 3)
+        with self.assertRaises(RuntimeError):
+            dispatcher.submit('push', {'n': 3})
+
+    def test_exhausted_retries_reported(self):
+        failures = []
+        dispatcher = NotificationDispatcher(
+            {'sms': Mock(side_effect=IOError('gateway down'))},
+            max_retries=2,
+            on_failure=lambda channel, payload, exc: failures.append((channel, payload)),
+            sleep=lambda delay: None
+        )
+        dispatcher.submit('sms', {'n': 1})
+        dispatcher.close()
+
+        self.assertEqual(failures, [('sms', {'n': 1})])
+        self.assertEqual(dispatcher.stats['failed'], 1)
+
+    def test_bounded_queue_backpressure(self):
+        release = threading.Event()
+        dispatcher = NotificationDispatcher(
+            {'push': lambda message: release.wait()},
+            workers_per_channel=1,
+            queue_size=2
+        )
+        dispatcher.submit('push', {'n': 0})
+        time.sleep(0.05)
+        dispatcher.submit('push', {'n': 1})
+        dispatcher.submit('push', {'n': 2})
+
+        with self.assertRaises(queue.Full):
+            dispatcher.submit('push', {'n': 3}, block=False)
+        self.assertEqual(dispatcher.queue_depth('push'), 2)
+
+        release.set()
+        dispatcher.close()
+        self.assertEqual(dispatcher.stats['sent'], 3)
+
+    def test_priority_channels_fan_out(self):
+        delivered = []
+        dispatcher = NotificationDispatcher({
+            channel: (lambda message, channel=channel: delivered.append(channel))
+            for channel in ('webhook', 'sms', 'email', 'push')
+        })
+        notifier = PriorityNotifier(FakeGovernanceContract(), self.sink.url, dispatcher=dispatcher)
+        notifier._send_priority_alert(
+            {'param': 'quorum', 'old': 10, 'new': 30, 'timestamp': 1},
+            'CRITICAL'
+        )
+        dispatcher.close()
+
+        self.assertEqual(sorted(delivered), ['email', 'push', 'sms'])
+
+class TestThresholdFanOut(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(11)
+        self.users = [f"0x{i:040x}" for i in range(2000)]
+        thresholds = {
+            user: {
+                'minDuration': int(rng.integers(0, 10)),
+                'quorum': int(rng.integers(1, 30)),
+                'delay': int(rng.integers(0, 86400)),
+                'customEnabled': bool(rng.random() < 0.8)
+            }
+            for user in self.users
+        }
+        self.contract = FakeGovernanceContract(thresholds=thresholds)
+        self.batches = []
+        self.dispatcher = Mock()
+        self.dispatcher.submit.side_effect = lambda channel, message: self.batches.append((channel, message))
+        self.notifier = PersonalizedNotifier(self.contract, 'http://sink', dispatcher=self.dispatcher, alert_batch_size=300)
+
+    def _expected_critical(self, param, delta):
+        return {
+            user for user, t in self.contract.thresholds.items()
+            if t['customEnabled'] and delta >= t[param]
+        }
+
+    def test_range_scan_matches_per_user_path(self):
+        self.notifier.thresholds.load(self.users)
+        self.contract.rpc_calls.clear()
+
+        for param, delta in (('quorum', 12), ('minDuration', 0), ('delay', 40000), ('quorum', 0)):
+            recipients = self.notifier.thresholds.critical_recipients(param, delta)
+            self.assertEqual(set(recipients), self._expected_critical(param, delta))
+
+        change = {'param': 'quorum', 'old': 40, 'new': 52, 'timestamp': 1}
+        for user in self.users[:50]:
+            severity = self.notifier.get_personalized_severity(user, change)
+            expected = 'CRITICAL' if user in self._expected_critical('quorum', 12) else 'LOW'
+            if not self.contract.thresholds[user]['customEnabled']:
+                expected = 'HIGH'
+            self.assertEqual(severity, expected)
+
+        self.assertEqual(self.contract.calls_to('userThresholds'), [])
+
+    def test_fan_out_sends_batches_without_rpcs(self):
+        self.notifier.thresholds.load(self.users)
+        self.contract.rpc_calls.clear()
+        change = {'param': 'quorum', 'old': 40, 'new': 55, 'timestamp': 1}
+
+        notified = self.notifier.send_personalized_alerts(change)
+
+        critical = [m for channel, m in self.batches if m['severity'] == 'CRITICAL' and channel == 'sms']
+        default = [m for channel, m in self.batches if m['severity'] == 'HIGH']
+        self.assertEqual(
+            {user for m in critical for user in m['recipients']},
+            self._expected_critical('quorum', 15)
+        )
+        self.assertTrue(default)
+        self.assertTrue(all(len(m['recipients']) <= 300 for m in critical + default))
+        self.assertEqual(notified, len(self._expected_critical('quorum', 15)) + len(self.notifier.thresholds.default_recipients()))
+        self.assertEqual(self.contract.calls_to('userThresholds'), [])
+
+    def test_incremental_refresh(self):
+        index = ThresholdIndex(self.contract)
+        index.load(self.users[:10])
+        user = self.users[0]
+
+        self.contract.thresholds[user] = {'minDuration': 1, 'quorum': 1, 'delay': 1, 'customEnabled': True}
+        self.contract.rpc_calls.clear()
+        index.refresh([user])
+
+        self.assertEqual(self.contract.calls_to('userThresholds'), [(user,)])
+        self.assertIn(user, index.critical_recipients('quorum', 1))
+
+        self.contract.thresholds[user] = dict(self.contract.thresholds[user], customEnabled=False)
+        index.refresh([user])
+        self.assertNotIn(user, index.critical_recipients('quorum', 100))
+        self.assertIn(user, index.default_recipients())
+
+        index.remove(user)
+        self.assertNotIn(user, index)
+        self.assertNotIn(user, index.default_recipients())
+
+    def test_bulk_load_matches_incremental_updates(self):
+        bulk = ThresholdIndex(self.contract)
+        bulk.load(self.users[:500])
+        # Reloading an overlapping list replaces entries instead of duplicating them
+        self.contract.thresholds[self.users[0]] = {'minDuration': 1, 'quorum': 1, 'delay': 1, 'customEnabled': True}
+        bulk.load(self.users[:1000])
+        incremental = ThresholdIndex(self.contract)
+        incremental.refresh(self.users[:1000])
+
+        for param in ThresholdIndex.PARAMS:
+            self.assertEqual(bulk._sorted[param], incremental._sorted[param])
+        self.assertEqual(set(bulk.default_recipients()), set(incremental.default_recipients()))
+
+    def test_protocol_severity(self):
+        severities = [
+            self.notifier.get_severity({'param': 'quorum', 'old': 20, 'new': new})
+            for new in (21, 23, 26, 30, 5)
+        ]
+        self.assertEqual(severities, ['LOW', 'MEDIUM', 'HIGH', 'CRITICAL', 'CRITICAL'])
+
+class TestBatchSimulation(unittest.TestCase):
+    def setUp(self):
+        self.gene_pool = [
+            {'burn_rate': 1 + i % 9, 'symbol': f"EvoV{i}_Phoenix{i % 7}"}
+            for i in range(40)
+        ]
+
+    def test_reproducible_and_independent_of_process_count(self):
+        simulator = RecombinationSimulator(self.gene_pool)
+        serial = simulator.simulate_batch(20000, seed=42, chunk_size=5000)
+
+        self.assertEqual(serial, simulator.simulate_batch(20000, seed=42, chunk_size=5000))
+        self.assertEqual(serial, simulator.simulate_batch(20000, seed=42, chunk_size=5000, processes=2))
+        self.assertNotEqual(serial, simulator.simulate_batch(20000, seed=43, chunk_size=5000))
+
+    def test_statistics_match_scalar_scenarios(self):
+        random.seed(3)
+        simulator = RecombinationSimulator(self.gene_pool, mutation_rate=0.3)
+        summary = simulator.simulate_batch(50000, generations=4, seed=3)
+        finals = [simulator.generate_scenario(4)[-1]['burn_rate'] for _ in range(5000)]
+
+        self.assertEqual(summary['scenarios'], 50000)
+        self.assertEqual(len(summary['generation_burn_rate_mean']), 4)
+        self.assertAlmostEqual(summary['final_burn_rate_mean'], np.mean(finals), delta=0.15)
+        self.assertAlmostEqual(summary['final_burn_rate_std'], np.std(finals), delta=0.15)
+        self.assertGreaterEqual(summary['final_burn_rate_min'], 1)
+        self.assertLessEqual(summary['final_burn_rate_max'], 10)
+        self.assertLessEqual(summary['final_burn_rate_p5'], summary['final_burn_rate_p95'])
+
+    def test_symbol_codes_round_trip(self):
+        pool = [
+            {'burn_rate': 2, 'symbol': 'EvoV2_ab'},
+            {'burn_rate': 6, 'symbol': 'EvoV7_Phoenix'}
+        ]
+        simulator = RecombinationSimulator(pool, mutation_rate=0)
+        summary = simulator.simulate_batch(1000, seed=0)
+
+        expected = {
+            simulator._combine_symbols(pool[0]['symbol'], pool[1]['symbol']),
+            simulator._combine_symbols(pool[1]['symbol'], pool[0]['symbol'])
+        }
+        self.assertEqual({symbol for symbol, _ in summary['top_symbols']}, expected)
+        self.assertEqual(sum(count for _, count in summary['top_symbols']), 1000)
+        self.assertEqual(summary['final_version_mean'], 4)
+        self.assertEqual(summary['final_burn_rate_mean'], 4)
+
+    def test_rejects_empty_runs(self):
+        simulator = RecombinationSimulator(self.gene_pool)
+        for scenarios, generations in ((0, 5), (100, 0)):
+            with self.assertRaises(ValueError):
+                simulator.simulate_batch(scenarios, generations=generations)
+
+    def test_scalar_mutations_stay_in_bounds(self):
+        simulator = RecombinationSimulator(self.gene_pool, mutation_rate=1, mutation_scale=20)
+        for genes in simulator.generate_scenario(50):
+            self.assertTrue(1 <= genes['burn_rate'] <= 10)
+
+class TestIslandModel(unittest.TestCase):
+    def setUp(self):
+        self.market = Mock()
+        self.market.current_state.return_value = {'trend': 'bearish', 'pressure_index': 20}
+        self.market.get_volatility.return_value = 0.4
+        self.market.get_liquidity_ratio.return_value = 0.6
+        self.calculator = AdaptiveFitnessCalculator(self.market)
+        self.optimizer = AdaptiveGeneOptimizer(self.market)
+
+    def test_linear_form_matches_calculate(self):
+        gene = {factor: random.random() for factor in self.calculator.base_weights}
+        factors, weights, scale = self.calculator.linear_form()
+        self.assertAlmostEqual(scale * sum(gene[f] * w for f, w in zip(factors, weights)), self.calculator.calculate(gene))
+
+    def test_reproducible_and_independent_of_process_count(self):
+        def run(seed, processes):
+            model = IslandModel(self.calculator, self.optimizer, islands=3, island_size=64, processes=processes)
+            return model.run(generations=25, seed=seed)
+
+        serial = run(7, 1)
+        np.testing.assert_array_equal(serial['population'], run(7, 1)['population'])
+        np.testing.assert_array_equal(serial['population'], run(7, 2)['population'])
+        self.assertFalse(np.array_equal(serial['population'], run(8, 1)['population']))
+
+        self.assertEqual(len(serial['epochs']), 3)
+        self.assertAlmostEqual(serial['best_fitness'], self.calculator.calculate(serial['best_gene']))
+        self.assertGreater(serial['epochs'][-1]['best_fitness'][0], serial['epochs'][0]['best_fitness'][0] - 1e-9)
+        self.assertEqual(len(self.optimizer.genetic_pool), 4)
+
+    def test_elites_migrate_around_the_ring(self):
+        # Selection only: every gene stays a copy of an initial one
+        optimizer = Mock()
+        optimizer.evolve_parameters.return_value = {'mutation_rate': 0, 'crossover_rate': 0, 'selection_pressure': 2.0}
+        rng = np.random.default_rng(1)
+        islands = [rng.uniform(0.5, 1.0, (32, 5))] + [rng.uniform(0, 0.5, (32, 5)) for _ in range(2)]
+        model = IslandModel(
+            self.calculator, optimizer, islands=3, island_size=32, migrants=2, migration_interval=5, processes=1
+        )
+        final = model.run(generations=10, seed=0, population=np.concatenate(islands))['population'].reshape(3, 32, 5)
+
+        origin = [{tuple(row) for row in island} for island in islands]
+        for island in range(3):
+            self.assertTrue({tuple(row) for row in final[island]} <= set().union(*origin))
+        # Island 0's elites reached its neighbour after one migration, not the island after that
+        self.assertTrue({tuple(row) for row in final[1]} & origin[0])
+        self.assertFalse({tuple(row) for row in final[2]} & origin[0])
+        self.assertEqual(optimizer.evolve_parameters.call_count, 2)
+
+    def test_dynamic_rates_apply_per_epoch(self):
+        optimizer = Mock()
+        optimizer.evolve_parameters.side_effect = [
+            {'mutation_rate': 0, 'crossover_rate': 0, 'selection_pressure': 1.0},
+            {'mutation_rate': 1.0, 'crossover_rate': 1.0, 'selection_pressure': 2.0}
+        ]
+        model = IslandModel(self.calculator, optimizer, islands=2, island_size=16, migration_interval=3, processes=1)
+        result = model.run(generations=6, seed=0)
+
+        self.assertEqual([epoch['rates']['mutation_rate'] for epoch in result['epochs']], [0, 1.0])
+        self.assertEqual(len(optimizer.evolve_parameters.call_args_list[1].args[0]), 2)
+        self.assertTrue(((result['population'] >= 0) & (result['population'] <= 1)).all())
+        with self.assertRaises(ValueError):
+            model.run(generations=0)
+        with self.assertRaises(ValueError):
+            IslandModel(self.calculator, optimizer, island_size=4, migrants=4)
+
+class FakeModelEndpoint:
+    """Deterministic stand-in for the LLM endpoint"""
+    def __init__(self, delay=0):
+        self.delay = delay
+        self.prompts = []
+        self._lock = threading.Lock()
+
+    def __call__(self, prompt):
+        with self._lock:
+            self.prompts.append(prompt)
+        time.sleep(self.delay)
+        requests = [line for line in prompt.splitlines() if line[:1].isdigit()]
+        if requests:
+            numbered = [line.split('. ', 1) for line in requests]
+            return '\n'.join(f"{number}. {self._answer(request)}" for number, request in numbered)
+        return self._answer(prompt)
+
+    def _answer(self, prompt):
+        return f"EvoV{len(prompt) % 90 + 10}Hybrid"
+
+class TestPromptCache(unittest.TestCase):
+    def setUp(self):
+        self.endpoint = FakeModelEndpoint()
+        self.tmpdir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_normalized_prompts_share_one_call(self):
+        cache = PromptCache()
+        first = cache.query("Combine  these:\n   EvoV1_Ape,  EvoV2_Fox\n", self.endpoint)
+        second = cache.query("Combine these:\nEvoV1_Ape, EvoV2_Fox", self.endpoint)
+
+        self.assertEqual(first, second)
+        self.assertEqual(len(self.endpoint.prompts), 1)
+        self.assertEqual(cache.stats['hits'], 1)
+
+    def test_lru_eviction(self):
+        cache = PromptCache(max_entries=2)
+        for prompt in ('a', 'b', 'a', 'c', 'b'):
+            cache.query(prompt, self.endpoint)
+
+        # 'b' was evicted by 'c' because 'a' had been used more recently
+        self.assertEqual(self.endpoint.prompts, ['a', 'b', 'c', 'b'])
+
+    def test_disk_tier_with_ttl(self):
+        now = [1000.0]
+        make_cache = lambda: PromptCache(cache_dir=self.tmpdir.name, ttl=60, clock=lambda: now[0])
+        make_cache().query('symbol prompt', self.endpoint)
+
+        # A fresh process reads the disk tier
+        self.assertEqual(make_cache().query('symbol prompt', self.endpoint), self.endpoint._answer('symbol prompt'))
+        self.assertEqual(len(self.endpoint.prompts), 1)
+
+        now[0] += 61
+        self.assertEqual(make_cache().prune(), 1)
+        make_cache().query('symbol prompt', self.endpoint)
+        self.assertEqual(len(self.endpoint.prompts), 2)
+
+    def test_concurrent_identical_prompts_coalesce(self):
+        endpoint = FakeModelEndpoint(delay=0.05)
+        cache = PromptCache()
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(cache.query('same prompt', endpoint)))
+            for _ in range(8)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(endpoint.prompts), 1)
+        self.assertEqual(len(set(results)), 1)
+        self.assertEqual(cache.stats['coalesced'], 7)
+
+    def test_recombiner_batch_packs_one_request(self):
+        recombiner = GeneRecombiner()
+        symbol_sets = [['EvoV1_Ape', 'EvoV2_Fox'], ['EvoV3_Owl', 'EvoV4_Elk'], ['EvoV1_Ape', 'EvoV2_Fox']]
+
+        with patch('ai_oracle.gene_recombiner.query_gpt4', self.endpoint, create=True):
+            recombiner.combine_symbols(['EvoV5_Cat', 'EvoV6_Dog'])
+            batch = recombiner.combine_symbols_batch(symbol_sets + [['EvoV5_Cat', 'EvoV6_Dog']])
+            self.assertEqual(batch[3], recombiner.combine_symbols(['EvoV5_Cat', 'EvoV6_Dog']))
+
+        self.assertEqual(len(self.endpoint.prompts), 2)
+        self.assertEqual(batch[0], batch[2])
+        self.assertEqual(batch[0], self.endpoint._answer(recombiner._combine_prompt(symbol_sets[0])))
+
+    def test_malformed_batch_response(self):
+        cache = PromptCache()
+        with self.assertRaises(ValueError):
+            cache.query_batch(['a', 'b'], lambda prompt: '1. only one answer')
+
+def make_offline_registry():
+    # Deterministic stand-ins for every model backend
+    models = ModelRegistry()
+    for name in ('nlp_model', 'trend_analyzer', 'image_generator', 'community_analyzer', 'symbol_mixer'):
+        models.register(name, Mock)
+    return models
+
+def make_offline_engine(engine_class=EvolutionEngine, **options):
+    return engine_class(models=make_offline_registry(), **options)
+
+class TestModelRegistry(unittest.TestCase):
+    def setUp(self):
+        self.loads = []
+        self.models = ModelRegistry()
+        self.models.register('nlp_model', lambda: self._load('nlp_model', delay=0.05))
+        self.models.register('image_generator', lambda: self._load('image_generator'))
+
+    def _load(self, name, delay=0):
+        time.sleep(delay)
+        self.loads.append(name)
+        return Mock(name=name)
+
+    def test_construction_loads_nothing(self):
+        engine = EvolutionEngine(models=self.models)
+        self.assertEqual(self.loads, [])
+
+        sentiment = {'market_trend': 0.8, 'community_engagement': 0.7, 'meme_virality': 0.9, 'environmental_pressure': 0.5}
+        self.assertAlmostEqual(engine.calculate_adaptive_burn_rate(sentiment, 'balanced'), 3.75)
+        self.assertEqual(self.loads, [])
+
+    def test_models_shared_across_engines(self):
+        first = EvolutionEngine(models=self.models)
+        second = MultimodalEvolutionEngine(models=self.models)
+
+        self.assertIs(first.image_generator, second.image_generator)
+        self.assertEqual(self.loads, ['image_generator'])
+
+    def test_concurrent_first_access_loads_once(self):
+        engine = EvolutionEngine(models=self.models)
+        seen = []
+        threads = [threading.Thread(target=lambda: seen.append(engine.nlp_model)) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(self.loads, ['nlp_model'])
+        self.assertEqual(len({id(model) for model in seen}), 1)
+
+    def test_background_warm_up(self):
+        EvolutionEngine(models=self.models, warm_up=True)
+        deadline = time.monotonic() + 2
+        while len(self.loads) < 2 and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+        self.assertEqual(sorted(self.loads), ['image_generator', 'nlp_model'])
+
+    def test_instance_override_and_unknown_model(self):
+        engine = EvolutionEngine(models=self.models)
+        engine.nlp_model = 'local stub'
+        self.assertEqual(engine.nlp_model, 'local stub')
+        self.assertEqual(self.loads, [])
+        with self.assertRaises(KeyError):
+            self.models.get('missing')
+
+class TestParallelMutationGeneration(unittest.TestCase):
+    def setUp(self):
+        self.engine = make_offline_engine()
+        self.sentiment = {
+            'basic_sentiment': 'positive',
+            'market_trend': 0.8,
+            'community_engagement': 0.7,
+            'meme_virality': 0.9,
+            'environmental_pressure': 0.5
+        }
+        self.engine.fetch_social_data = Mock(return_value={'text': [], 'media': []})
+        self.engine.analyze_market_sentiment = Mock(return_value=self.sentiment)
+        self.active = {'llm': 0, 'diffusion': 0}
+        self.peak = {'llm': 0, 'diffusion': 0}
+        self._lock = threading.Lock()
+
+    def _slow_stage(self, backend, result, delay=0.1):
+        def stage(sentiment, trend):
+            with self._lock:
+                self.active[backend] += 1
+                self.peak[backend] = max(self.peak[backend], self.active[backend])
+            time.sleep(delay)
+            with self._lock:
+                self.active[backend] -= 1
+            return f"{result}-{trend}"
+        return stage
+
+    def test_parallel_matches_sequential(self):
+        self.engine.generate_evolved_symbol = self._slow_stage('llm', 'EvoV2', delay=0)
+        self.engine.generate_visual_mutation = self._slow_stage('diffusion', 'dna', delay=0)
+
+        self.assertEqual(
+            self.engine.generate_mutations(parallel=True),
+            self.engine.generate_mutations(parallel=False)
+        )
+
+    def test_cycle_takes_about_as_long_as_slowest_stage(self):
+        self.engine = make_offline_engine(backend_concurrency={'diffusion': 3})
+        self.engine.fetch_social_data = Mock(return_value={'text': [], 'media': []})
+        self.engine.analyze_market_sentiment = Mock(return_value=self.sentiment)
+        self.engine.generate_evolved_symbol = self._slow_stage('llm', 'EvoV2')
+        self.engine.generate_visual_mutation = self._slow_stage('diffusion', 'dna', delay=0.2)
+
+        started = time.monotonic()
+        mutations = self.engine.generate_mutations()
+        elapsed = time.monotonic() - started
+
+        self.assertEqual([m['mutation_type'] for m in mutations], ['aggressive', 'balanced', 'defensive'])
+        self.assertEqual(mutations[1]['visual_dna'], 'dna-balanced')
+        self.assertLess(elapsed, 0.45)
+
+    def test_backend_concurrency_limits(self):
+        self.engine.generate_evolved_symbol = self._slow_stage('llm', 'EvoV2', delay=0.05)
+        self.engine.generate_visual_mutation = self._slow_stage('diffusion', 'dna', delay=0.05)
+
+        self.engine.generate_mutations()
+
+        self.assertEqual(self.peak['diffusion'], EvolutionEngine.BACKEND_CONCURRENCY['diffusion'])
+        self.assertLessEqual(self.peak['llm'], EvolutionEngine.BACKEND_CONCURRENCY['llm'])
+
+    def test_configurable_backend_concurrency(self):
+        engine = make_offline_engine(backend_concurrency={'diffusion': 1})
+        engine.generate_evolved_symbol = self._slow_stage('llm', 'EvoV2', delay=0.05)
+        engine.generate_visual_mutation = self._slow_stage('diffusion', 'dna', delay=0.05)
+        engine.generate_mutations_parallel(self.sentiment, ['aggressive', 'balanced', 'defensive'])
+
+        self.assertEqual(self.peak['diffusion'], 1)
+        self.assertEqual(engine.backend_limits['llm']._initial_value, EvolutionEngine.BACKEND_CONCURRENCY['llm'])
+
+    def test_stage_timeout(self):
+        self.engine.STAGE_TIMEOUT = 0.05
+        self.engine.generate_evolved_symbol = self._slow_stage('llm', 'EvoV2')
+        self.engine.generate_visual_mutation = self._slow_stage('diffusion', 'dna', delay=0.3)
+
+        with self.assertRaises(TimeoutError):
+            self.engine.generate_mutations()
+
+class FakeDiffusion:
+    def __init__(self, delay=0):
+        self.delay = delay
+        self.calls = []
+        self.active = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    def generate(self, prompt, negative_prompt, steps, guidance_scale=None):
+        with self._lock:
+            self.calls.append(steps)
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        time.sleep(self.delay)
+        with self._lock:
+            self.active -= 1
+        return f"dna-{steps}-{len(prompt)}"
+
+class TestVisualDNACache(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.cache = VisualDNACache(self.tmpdir.name)
+        self.diffusion = FakeDiffusion()
+        self.engine = make_offline_engine()
+        self.engine.visual_cache = self.cache
+        self.engine.image_generator = self.diffusion
+        self.sentiment = {'basic_sentiment': 0.61, 'environmental_pressure': 0.42}
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_small_context_moves_hit_cache(self):
+        first = self.engine.generate_visual_mutation(self.sentiment, 'balanced')
+        nudged = {'basic_sentiment': 0.605, 'environmental_pressure': 0.41}
+        second = self.engine.generate_visual_mutation(nudged, 'balanced')
+
+        self.assertEqual(first, second)
+        self.assertEqual(self.diffusion.calls, [50])
+
+        self.engine.generate_visual_mutation({'basic_sentiment': 0.9, 'environmental_pressure': 0.42}, 'balanced')
+        self.engine.generate_visual_mutation(self.sentiment, 'aggressive')
+        self.assertEqual(self.diffusion.calls, [50, 50, 50])
+
+    def test_multimodal_previous_dna_fingerprint(self):
+        engine = make_offline_engine(MultimodalEvolutionEngine)
+        engine.visual_cache = self.cache
+        engine.image_generator = self.diffusion
+        dna = {'current_description': 'glowing fox', 'mutation_trend': 'aggressive', 'pressure_level': 0.3}
+
+        engine.generate_visual_mutation(dna)
+        engine.generate_visual_mutation(dict(dna, pressure_level=0.31))
+        self.assertEqual(self.diffusion.calls, [30])
+
+    def test_cache_survives_restart(self):
+        self.engine.generate_visual_mutation(self.sentiment, 'balanced')
+        self.engine.visual_cache = VisualDNACache(self.tmpdir.name)
+
+        self.engine.generate_visual_mutation(self.sentiment, 'balanced')
+        self.assertEqual(self.diffusion.calls, [50])
+
+    def test_size_based_eviction(self):
+        cache = VisualDNACache(os.path.join(self.tmpdir.name, 'small'), max_bytes=350)
+        for i in range(5):
+            cache.put(f"key{i}", bytes(100))
+        cache.get('key2')
+        cache.put('key5', bytes(100))
+
+        self.assertLessEqual(cache.size, 350)
+        self.assertEqual(cache.get('key2'), bytes(100))
+        self.assertIsNone(cache.get('key3'))
+        self.assertEqual(len(os.listdir(cache.cache_dir)), 3)
+
+    def test_preview_then_background_upgrade(self):
+        self.diffusion.delay = 0.05
+        upgraded = threading.Event()
+        results = []
+
+        draft = self.engine.generate_visual_mutation(
+            self.sentiment, 'defensive', preview=True,
+            on_upgrade=lambda dna: (results.append(dna), upgraded.set())
+        )
+
+        self.assertTrue(draft.startswith(f"dna-{EvolutionEngine.PREVIEW_STEPS}-"))
+        self.assertTrue(upgraded.wait(2))
+        self.assertTrue(results[0].startswith('dna-50-'))
+        # The upgraded render now serves the non-preview path from cache
+        self.assertEqual(self.engine.generate_visual_mutation(self.sentiment, 'defensive'), results[0])
+        self.assertEqual(self.diffusion.calls, [EvolutionEngine.PREVIEW_STEPS, 50])
+
+    def test_previews_respect_diffusion_limit(self):
+        self.diffusion.delay = 0.03
+        engine = make_offline_engine(backend_concurrency={'diffusion': 1})
+        engine.image_generator = self.diffusion
+        upgraded = []
+        threads = [
+            threading.Thread(
+                target=engine.generate_visual_mutation,
+                args=(dict(self.sentiment, basic_sentiment=i / 10), 'balanced'),
+                kwargs={'preview': True, 'on_upgrade': upgraded.append}
+            )
+            for i in range(4)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        deadline = time.monotonic() + 2
+        while len(upgraded) < 4 and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+        self.assertEqual(len(upgraded), 4)
+        self.assertEqual(self.diffusion.peak, 1)
+
+class FakeLSTM:
+    """Deterministic sequence model: averages each feature over the window"""
+    def __init__(self):
+        self.batches = []
+
+    def predict(self, sequences):
+        self.batches.append(sequences.shape)
+        means = sequences.mean(axis=1)
+        return np.stack([means[:, 0], means[:, 1], sequences[:, -1, 2]], axis=1)
+
+def make_mutation(block):
+    return {'block': block, 'burn_rate': block % 10 + 1, 'survival_rate': 0.5, 'pressure': (block % 10) / 10}
+
+class TestStreamingPredictor(unittest.TestCase):
+    def setUp(self):
+        self.chain = Mock()
+        self.chain.get_mutation_history.return_value = [make_mutation(b) for b in range(1, 11)]
+        self.model = FakeLSTM()
+        self.predictor = StreamingPredictor(self.chain, lstm_model=self.model)
+
+    def test_matches_full_refetch(self):
+        # Seeds from the chain once, then slides the window locally
+        self.predictor.predict_next_mutation()
+        self.predictor.observe(make_mutation(11))
+
+        self.chain.get_mutation_history.return_value = [make_mutation(b) for b in range(2, 12)]
+        reference = EvolutionaryPredictor(self.chain, lstm_model=FakeLSTM())
+        self.assertEqual(self.predictor.predict_next_mutation(), reference.predict_next_mutation())
+
+    def test_prediction_cached_per_head(self):
+        for _ in range(100):
+            self.predictor.predict_next_mutation()
+        self.assertEqual(self.chain.get_mutation_history.call_count, 1)
+        self.assertEqual(len(self.model.batches), 1)
+
+        self.predictor.observe(make_mutation(11))
+        self.predictor.predict_next_mutation()
+        self.predictor.predict_next_mutation()
+        self.assertEqual(self.predictor.head, 11)
+        self.assertEqual(len(self.model.batches), 2)
+        self.assertEqual(self.chain.get_mutation_history.call_count, 1)
+
+    def test_what_if_burn_rates_single_model_call(self):
+        self.predictor.predict_next_mutation()
+        results = self.predictor.what_if_burn_rates(np.linspace(1, 10, 500))
+
+        self.assertEqual(len(results), 500)
+        self.assertEqual(self.model.batches[-1], (500, 10, 3))
+        self.assertLess(results[0]['predicted_burn_rate'], results[-1]['predicted_burn_rate'])
+
+    def test_batch_shape_validation(self):
+        with self.assertRaises(ValueError):
+            self.predictor.predict_batch(np.zeros((4, 10)))
+        self.chain.get_mutation_history.return_value = []
+        with self.assertRaises(ValueError):
+            StreamingPredictor(self.chain, lstm_model=self.model).what_if_burn_rates([1, 2])
+
+    def test_observe_before_first_prediction_seeds_window(self):
+        # Block 10 is both on chain and observed; 11 only observed
+        self.predictor.observe(make_mutation(10))
+        self.predictor.observe(make_mutation(11))
+        result = self.predictor.predict_next_mutation()
+
+        self.chain.get_mutation_history.return_value = [make_mutation(b) for b in range(2, 12)]
+        reference = EvolutionaryPredictor(self.chain, lstm_model=FakeLSTM())
+        self.assertEqual(result, reference.predict_next_mutation())
+        self.assertEqual(self.model.batches, [(1, 10, 3)])
+        self.assertEqual(self.predictor.head, 11)
+
+    def test_what_if_seeds_window(self):
+        results = self.predictor.what_if_burn_rates([1, 5])
+        self.assertEqual(len(results), 2)
+        self.assertEqual(self.model.batches, [(2, 10, 3)])
+        self.assertEqual(self.chain.get_mutation_history.call_count, 1)
+
+SOCIAL_FIXTURES = {
+    'twitter': [
+        {'text': 'Bullish on $EVOLVE', 'media': ['moon.jpg']},
+        {'text': 'RT @whale: Bullish on $EVOLVE', 'media': []},
+        {'text': 'Dump incoming https://t.co/x', 'media': []}
+    ],
+    'telegram': [
+        {'text': 'bullish on   $evolve', 'media': []},
+        {'text': 'Great project', 'media': ['meme.png']}
+    ],
+    'reddit': [
+        {'text': 'Dump incoming https://reddit.com/r/evolve', 'media': []},
+        {'text': 'To the moon', 'media': []}
+    ]
+}
+
+def replay(items, delay=0):
+    def source():
+        for item in items:
+            time.sleep(delay)
+            yield item
+    return source
+
+def keyword_scorer(texts):
+    return [1.0 if 'bull' in t.lower() or 'moon' in t.lower() or 'great' in t.lower() else -1.0 for t in texts]
+
+class TestSocialStream(unittest.TestCase):
+    def test_normalization(self):
+        self.assertEqual(normalize_text('RT @a: RT @b:  Hello   World https://x.y/z'), 'hello world')
+
+    def test_cross_posts_deduplicated(self):
+        stream = SocialStream({name: replay(items) for name, items in SOCIAL_FIXTURES.items()})
+        texts = sorted(normalize_text(item['text']) for item in stream)
+
+        self.assertEqual(texts, ['bullish on $evolve', 'dump incoming', 'great project', 'to the moon'])
+        self.assertEqual(stream.stats, {'received': 7, 'duplicates': 3})
+
+    def test_bounded_queue_backpressure(self):
+        flood = [{'text': f"post {i}", 'media': []} for i in range(500)]
+        stream = SocialStream({'twitter': replay(flood)}, queue_size=8)
+        depths = []
+        for _ in stream:
+            depths.append(stream.queue.qsize())
+            time.sleep(0.0005)
+
+        self.assertEqual(len(depths), 500)
+        self.assertLessEqual(max(depths), 8)
+
+    def test_incremental_aggregate(self):
+        aggregate = SentimentAggregate(keyword_scorer, batch_size=2, media_window=1)
+        stream = SocialStream({name: replay(items) for name, items in SOCIAL_FIXTURES.items()})
+        aggregate.consume(stream)
+
+        snapshot = aggregate.snapshot()
+        self.assertEqual(snapshot['count'], 4)
+        self.assertAlmostEqual(snapshot['mean_sentiment'], 0.5)
+        self.assertEqual(sum(snapshot['source_counts'].values()), 4)
+        self.assertEqual(len(snapshot['media']), 1)
+
+    def test_slow_feed_flushes_within_max_latency(self):
+        release = threading.Event()
+
+        def trickle():
+            yield {'text': 'Bullish', 'media': []}
+            yield {'text': 'To the moon', 'media': []}
+            release.wait(5)
+
+        aggregate = SentimentAggregate(keyword_scorer, batch_size=64, max_latency=0.1)
+        stream = SocialStream({'twitter': trickle})
+        aggregate.consume_in_background(stream)
+        deadline = time.monotonic() + 2
+        while aggregate.snapshot()['count'] < 2 and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+        self.assertEqual(aggregate.snapshot()['count'], 2)
+        self.assertLess(time.monotonic() - (deadline - 2), 1)
+        release.set()
+
+    def test_stop_unblocks_saturated_producers(self):
+        def endless():
+            i = 0
+            while True:
+                i += 1
+                yield {'text': f"post {i}", 'media': []}
+
+        stream = SocialStream({'twitter': endless}, queue_size=1)
+        items = iter(stream)
+        next(items)
+        time.sleep(0.05)
+        stream.stop()
+        for producer in stream.producers:
+            producer.join(1)
+            self.assertFalse(producer.is_alive())
+        # The consumer side ends too once the queue is drained
+        self.assertLess(len(list(items)), 3)
+
+    def test_engine_reads_live_snapshot(self):
+        engine = make_offline_engine()
+        engine.nlp_model.analyze.side_effect = keyword_scorer
+        engine.analyze_meme_potential = Mock(return_value=0.4)
+        engine.calculate_pressure = Mock(return_value=0.2)
+        engine.trend_analyzer.analyze_market_data.return_value = 0.1
+        engine.community_analyzer.get_engagement_metrics.return_value = 0.3
+        engine.generate_evolved_symbol = Mock(return_value='EvoV3Lynx')
+        engine.generate_visual_mutation = Mock(return_value='dna')
+        engine.fetch_social_data = Mock()
+
+        engine.start_social_stream({'telegram': replay(SOCIAL_FIXTURES['telegram'] * 3, delay=0.01)})
+        time.sleep(0.2)
+        mutations = engine.generate_mutations()
+
+        engine.fetch_social_data.assert_not_called()
+        self.assertEqual(len(mutations), 3)
+        self.assertEqual(mutations[0]['market_context']['basic_sentiment'], 1.0)
+        self.assertEqual(engine.social_aggregate.snapshot()['count'], 2)
+
+class CountingSentimentModel:
+    def __init__(self):
+        self.batches = []
+
+    def analyze(self, texts):
+        self.batches.append(list(texts))
+        return keyword_scorer(texts)
+
+class TestSentimentInference(unittest.TestCase):
+    def setUp(self):
+        self.model = CountingSentimentModel()
+        self.inference = SentimentInference(self.model.analyze, max_batch_size=4)
+
+    def test_each_unique_text_scored_once(self):
+        texts = ['Bullish on $EVOLVE'] * 50 + ['RT @a: bullish on $evolve'] * 30 + ['Dump it'] * 20
+        scores = self.inference.score(texts)
+
+        self.assertEqual(scores, keyword_scorer(texts))
+        self.assertEqual(self.model.batches, [['Bullish on $EVOLVE', 'Dump it']])
+        self.assertAlmostEqual(self.inference.mean_score(texts), 0.6)
+
+    def test_batches_bounded_and_cached_across_cycles(self):
+        texts = [f"post {i}" for i in range(10)]
+        self.inference.score(texts)
+        self.assertEqual([len(batch) for batch in self.model.batches], [4, 4, 2])
+
+        self.inference.score(texts + ['post 10'])
+        self.assertEqual(self.model.batches[-1], ['post 10'])
+        self.assertEqual(self.inference.stats['cache_hits'], 10)
+
+    def test_cache_is_bounded(self):
+        inference = SentimentInference(self.model.analyze, cache_size=3)
+        inference.score(['a', 'b', 'c', 'd'])
+        inference.score(['a'])
+        self.assertEqual(self.model.batches[-1], ['a'])
+
+    def test_submit_micro_batches_by_latency(self):
+        inference = SentimentInference(self.model.analyze, max_batch_size=100, max_latency=0.05)
+        futures = [inference.submit(text) for text in ('to the moon', 'rug pull', 'to the moon')]
+
+        self.assertEqual([f.result(timeout=2) for f in futures], [1.0, -1.0, 1.0])
+        self.assertEqual(self.model.batches, [['to the moon', 'rug pull']])
+
+    def test_engine_uses_deduplicated_inference(self):
+        engine = make_offline_engine()
+        engine.nlp_model = self.model
+        engine.analyze_meme_potential = Mock(return_value=0.4)
+        engine.calculate_pressure = Mock(return_value=0.2)
+        texts = ['Bullish on $EVOLVE', 'RT @x: Bullish on $EVOLVE', 'Great project', 'meh']
+
+        sentiment = engine.analyze_market_sentiment({'text': texts, 'media': []})
+
+        self.assertEqual(sentiment['basic_sentiment'], 0.5)
+        self.assertEqual(self.model.batches, [['Bullish on $EVOLVE', 'Great project', 'meh']])
+
+class TestSuccessRateStore(unittest.TestCase):
+    def test_lru_eviction(self):
+        store = SuccessRateStore(capacity=3)
+        for mutation_id, score in ((1, 0.9), (2, 0.1), (3, 0.5)):
+            store[mutation_id] = score
+        store.get(1)
+        store[4] = 0.7
+
+        self.assertNotIn(2, store)
+        self.assertEqual(len(store), 3)
+        self.assertEqual(store.stats['evictions'], 1)
+
+    def test_lowest_score_eviction(self):
+        store = SuccessRateStore(capacity=3, policy='lowest')
+        for mutation_id, score in ((1, 0.9), (2, 0.1), (3, 0.5), (4, 0.7)):
+            store[mutation_id] = score
+
+        self.assertEqual(sorted(id for id, _ in store.items()), [1, 3, 4])
+
+    def test_top_k_tracks_updates(self):
+        store = SuccessRateStore()
+        for mutation_id in range(100):
+            store[mutation_id] = mutation_id / 100
+        store[3] = 2.0
+        del store[99]
+
+        self.assertEqual(store.top_k(3), [(3, 2.0), (98, 0.98), (97, 0.97)])
+        self.assertEqual(store.top_k(0), [])
+
+    def test_persists_across_restarts(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'success.bin')
+            store = SuccessRateStore(path, capacity=4)
+            for mutation_id, score in ((10, 0.2), (11, 0.8), (12, 0.5)):
+                store[mutation_id] = score
+            store.discard(10)
+            store.get(11)
+            store.close()
+            self.assertEqual(os.path.getsize(path), 4 * 48)
+
+            reopened = SuccessRateStore(path, capacity=4)
+            self.assertEqual(reopened.top_k(5), [(11, 0.8), (12, 0.5)])
+            # Recency survives the restart: 12 is now the least recently used
+            reopened[13] = 0.1
+            reopened[14] = 0.3
+            reopened[15] = 0.4
+            self.assertNotIn(12, reopened)
+            self.assertEqual(len(reopened), 4)
+            reopened.close()
+
+            with self.assertRaises(ValueError):
+                SuccessRateStore(path, capacity=8)
+
+    def test_arbitrary_and_wide_ids(self):
+        scorer = DarwinianScorer()
+        scorer.update_success_rate('EvoV2Phoenix', 0.5)
+        scorer.update_success_rate(2 ** 70, 0.7)
+        scorer.update_success_rate(3, 0.5)
+        self.assertEqual(scorer.best_ancestors(3), [(2 ** 70, 0.7), (3, 0.5), ('EvoV2Phoenix', 0.5)])
+        np.testing.assert_array_equal(scorer.stored_success_rates(['EvoV2Phoenix', 4]), [0.5, np.nan])
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'success.bin')
+            store = SuccessRateStore(path, capacity=4)
+            store[2 ** 255] = 0.9
+            with self.assertRaises(ValueError):
+                store['EvoV2Phoenix'] = 0.5
+            with self.assertRaises(ValueError):
+                store[2 ** 256] = 0.5
+            store.close()
+            reopened = SuccessRateStore(path, capacity=4)
+            self.assertEqual(reopened.items(), [(2 ** 255, 0.9)])
+            reopened.close()
+
+    def test_closed_store_rejects_use(self):
+        store = SuccessRateStore()
+        store[1] = 0.5
+        store.close()
+        store.close()
+
+        self.assertEqual(len(store), 0)
+        with self.assertRaises(ValueError):
+            store.top_k(1)
+        with self.assertRaises(ValueError):
+            store.get(1)
+        with self.assertRaises(ValueError):
+            store[2] = 0.1
+
+    def test_scorer_uses_store(self):
+        scorer = DarwinianScorer(SuccessRateStore(capacity=2, policy='lowest'))
+        for mutation_id, score in ((1, 0.3), (2, 0.6), (3, 0.9)):
+            scorer.update_success_rate(mutation_id, score)
+
+        self.assertEqual(scorer.best_ancestors(1), [(3, 0.9)])
+        np.testing.assert_array_equal(scorer.stored_success_rates([3, 1, 2]), [0.9, np.nan, 0.6])
+
+class FakeMutationStore:
+    def __init__(self, count):
+        self.mutations = {
+            i: Mock(id=i, symbol=f"SYM{i}", burn_rate=1 + i % 9) for i in range(count)
+        }
+        self.bulk_calls = []
+
+    def get_mutations(self, mutation_ids):
+        self.bulk_calls.append(list(mutation_ids))
+        return [self.mutations[i] for i in mutation_ids]
+
+class ColumnScorer:
+    # Fitness read straight from a 'fitness' column, with call counting
+    def __init__(self):
+        self.batches = []
+
+    def calculate_fitness_batch(self, mutation_ids, market_data):
+        self.batches.append(list(mutation_ids))
+        return np.asarray(market_data['fitness'], dtype=np.float64) * np.ones(len(mutation_ids))
+
+class TestParentSelection(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(3)
+        self.ids = list(range(2000))
+        self.market = {
+            'holder_growth': rng.uniform(0, 10, 2000),
+            'trade_velocity': rng.uniform(0, 10, 2000),
+            'sentiment': rng.uniform(0, 10, 2000),
+            'meme_shares': rng.uniform(0, 10, 2000),
+            'market_cap': rng.choice([5e8, 2e9], 2000),
+            'eth_price': 3000.0
+        }
+        self.store = FakeMutationStore(2000)
+
+    def make_recombiner(self, **kwargs):
+        recombiner = EnhancedGeneRecombiner(**kwargs)
+        recombiner.get_mutations = self.store.get_mutations
+        return recombiner
+
+    def test_top_k_matches_full_sort(self):
+        recombiner = self.make_recombiner()
+        rows = [
+            {name: (column[i] if np.ndim(column) else column) for name, column in self.market.items()}
+            for i in self.ids
+        ]
+        expected = sorted(self.ids, key=lambda i: recombiner.scorer.calculate_fitness(i, rows[i]), reverse=True)[:3]
+
+        parents = recombiner._select_parents(self.ids, self.market)
+
+        self.assertEqual([p.id for p in parents], expected)
+        # Only the winners are fetched, in a single bulk lookup
+        self.assertEqual(self.store.bulk_calls, [expected])
+
+    def test_fitness_memoized_per_snapshot_generation(self):
+        scorer = ColumnScorer()
+        snapshot = MarketSnapshot(CountingMarketFeed())
+        recombiner = self.make_recombiner(scorer=scorer, market_snapshot=snapshot)
+        fitness = np.linspace(0, 1, 2000)
+        subset = self.ids[:10] + [1999]
+
+        snapshot.current_state()
+        recombiner._select_parents(self.ids, {'fitness': fitness})
+        recombiner._select_parents(subset, {'fitness': fitness[subset]})
+        self.assertEqual(len(scorer.batches), 1)
+
+        # A new generation invalidates the memo
+        snapshot.invalidate()
+        parents = recombiner._select_parents(self.ids, {'fitness': fitness[::-1]})
+        self.assertEqual(len(scorer.batches), 2)
+        self.assertEqual([p.id for p in parents], [0, 1, 2])
+
+    def test_partial_memo_scores_only_new_candidates(self):
+        scorer = ColumnScorer()
+        recombiner = self.make_recombiner(scorer=scorer, market_snapshot=MarketSnapshot(CountingMarketFeed()))
+
+        recombiner._select_parents([5, 6, 7], {'fitness': 0.5})
+        recombiner._select_parents([5, 6, 7, 8], {'fitness': 0.5})
+        self.assertEqual(scorer.batches, [[5, 6, 7], [8]])
+
+    def test_no_memo_without_snapshot(self):
+        scorer = ColumnScorer()
+        recombiner = self.make_recombiner(scorer=scorer)
+
+        recombiner._select_parents([5, 6, 7], {'fitness': 0.5})
+        parents = recombiner._select_parents([5, 6, 7], {'fitness': [0.1, 0.9, 0.5]})
+        self.assertEqual(scorer.batches, [[5, 6, 7], [5, 6, 7]])
+        self.assertEqual([p.id for p in parents], [6, 7, 5])
+
+    def test_tournament_and_roulette_are_seeded(self):
+        market = {'fitness': np.r_[np.full(1900, 0.01), np.full(100, 100.0)]}
+        for selection in ('tournament', 'roulette'):
+            picks = [
+                [p.id for p in self.make_recombiner(scorer=ColumnScorer(), selection=selection,
+                                                    tournament_size=500, seed=7)._select_parents(self.ids, market)]
+                for _ in range(2)
+            ]
+            self.assertEqual(picks[0], picks[1])
+            self.assertEqual(len(picks[0]), 3)
+            # Overwhelmingly fit candidates dominate either strategy
+            self.assertTrue(all(i >= 1900 for i in picks[0]), (selection, picks[0]))
+
+    def test_tournament_picks_distinct_parents(self):
+        for seed in range(20):
+            recombiner = self.make_recombiner(scorer=ColumnScorer(), selection='tournament', tournament_size=4, seed=seed)
+            parents = [p.id for p in recombiner._select_parents(self.ids[:10], {'fitness': np.linspace(0, 1, 10)})]
+            self.assertEqual(len(set(parents)), 3, (seed, parents))
+        recombiner = self.make_recombiner(scorer=ColumnScorer(), selection='tournament', seed=1)
+        self.assertEqual(sorted(p.id for p in recombiner._select_parents(self.ids[:3], {'fitness': 0.5})), [0, 1, 2])
+
+    def test_roulette_with_few_positive_candidates(self):
+        recombiner = self.make_recombiner(scorer=ColumnScorer(), selection='roulette', seed=1)
+        fitness = np.array([0.0, 0.9, -0.5, 0.0, -0.1, 0.0])
+        parents = [p.id for p in recombiner._select_parents(self.ids[:6], {'fitness': fitness})]
+        # The only positive candidate leads, the fittest zero-weight ones fill up
+        self.assertEqual(parents, [1, 0, 3])
+
+    def test_roulette_picks_distinct_parents(self):
+        recombiner = self.make_recombiner(scorer=ColumnScorer(), selection='roulette', seed=1)
+        parents = recombiner._select_parents(self.ids[:3], {'fitness': 0.0})
+        self.assertEqual(sorted(p.id for p in parents), [0, 1, 2])
+
+    def test_stored_success_rates_inform_selection(self):
+        recombiner = self.make_recombiner(inheritance_weight=0.5)
+        fitness = recombiner.scorer.calculate_fitness_batch(self.ids, self.market)
+        best = sorted(self.ids, key=lambda i: fitness[i], reverse=True)[:3]
+        # A proven ancestor outranks today's leaders, a failed one drops out
+        proven = int(np.argsort(fitness)[1000])
+        recombiner.scorer.update_success_rate(proven, 2.0)
+        recombiner.scorer.update_success_rate(best[0], 0.0)
+
+        parents = [p.id for p in recombiner._select_parents(self.ids, self.market)]
+        self.assertEqual(parents[0], proven)
+        self.assertNotIn(best[0], parents)
+        self.assertEqual(parents[1:], best[1:])
+
+    def test_unknown_strategy_rejected(self):
+        with self.assertRaises(ValueError):
+            EnhancedGeneRecombiner(selection='elitist')
+
+class TestRecombinationWeights(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(11)
+        self.optimizer = GeneticOptimizer()
+        self.volatility = rng.uniform(0, 2, 500)
+        self.holders = rng.integers(1, 10 ** 6, 500).astype(float)
+        self.success = rng.uniform(0, 1, (500, 3))
+
+    def test_batch_matches_scalar(self):
+        weights = self.optimizer.optimize_recombination_batch(self.volatility, self.holders, self.success)
+
+        self.assertEqual(weights.shape, (500, 3))
+        for i in range(0, 500, 37):
+            parents = [Mock(success_rate=rate) for rate in self.success[i]]
+            conditions = {'volatility': self.volatility[i], 'holder_count': self.holders[i]}
+            np.testing.assert_allclose(weights[i], self.optimizer.optimize_recombination(parents, conditions))
+
+    def test_success_sums_and_scalar_broadcast(self):
+        np.testing.assert_allclose(
+            self.optimizer.optimize_recombination_batch(0.5, self.holders, self.success.sum(axis=1)),
+            self.optimizer.optimize_recombination_batch(np.full(500, 0.5), self.holders, self.success)
+        )
+
+    def test_non_positive_totals_fall_back(self):
+        weights = self.optimizer.optimize_recombination_batch([0.1, 0.1, 0.1], [0, 1e-6, 100], [0.5, 0.5, 0.5])
+
+        np.testing.assert_array_equal(weights[:2], [GeneticOptimizer.DEFAULT_WEIGHTS] * 2)
+        self.assertAlmostEqual(weights[2].sum(), 1.0)
+        self.assertTrue(np.isfinite(weights).all())
+
+    def test_crossover_uses_weights(self):
+        recombiner = EnhancedGeneRecombiner()
+        rates = np.array([[2.0, 4.0, 6.0], [1.0, 1.0, 10.0]])
+        weights = self.optimizer.optimize_recombination_batch([0.2, 1.5], [1000, 50], [[0.1, 0.2, 0.3], [0.9, 0.9, 0.9]])
+
+        batch = recombiner.crossover_burn_rates_batch(rates, weights)
+        for row, rate_row, weight_row in zip(batch, rates, weights):
+            self.assertAlmostEqual(row, recombiner._crossover_burn_rates(list(rate_row), weight_row))
+        self.assertAlmostEqual(recombiner._crossover_burn_rates([2.0, 4.0, 6.0]), 3.8)
+        np.testing.assert_allclose(recombiner.crossover_burn_rates_batch(rates), [3.8, 3.7])
+
+class TestPackedDNA(unittest.TestCase):
+    LENGTH = 101
+
+    def setUp(self):
+        self.rng = np.random.default_rng(5)
+        self.parents_a = dna.random_population(400, self.LENGTH, self.rng)
+        self.parents_b = dna.random_population(400, self.LENGTH, self.rng)
+        self.codes_a = dna.unpack(self.parents_a, self.LENGTH)
+        self.codes_b = dna.unpack(self.parents_b, self.LENGTH)
+
+    def test_round_trip(self):
+        sequence = 'GATTACA' * 15
+        packed = dna.pack(dna.encode(sequence))
+
+        self.assertEqual(packed.nbytes, 27)
+        self.assertEqual(dna.decode(dna.unpack(packed, len(sequence))), sequence)
+        with self.assertRaises(ValueError):
+            dna.encode('GATTAXA')
+
+    def test_single_point_is_prefix_and_suffix(self):
+        children = dna.unpack(dna.crossover(self.parents_a, self.parents_b, self.LENGTH, 'single_point', self.rng), self.LENGTH)
+
+        for child, a, b in zip(children, self.codes_a, self.codes_b):
+            from_a = child == a
+            from_b = child == b
+            # Some cut in [1, length) explains every base
+            self.assertTrue(any(
+                from_a[:cut].all() and from_b[cut:].all() for cut in range(1, self.LENGTH)
+            ))
+
+    def test_two_point_and_uniform_take_each_base_from_a_parent(self):
+        for method in ('two_point', 'uniform'):
+            children = dna.unpack(dna.crossover(self.parents_a, self.parents_b, self.LENGTH, method, self.rng), self.LENGTH)
+            self.assertTrue(((children == self.codes_a) | (children == self.codes_b)).all(), method)
+
+        uniform = dna.unpack(dna.crossover(self.parents_a, self.parents_b, self.LENGTH, 'uniform', self.rng), self.LENGTH)
+        differs = self.codes_a != self.codes_b
+        self.assertAlmostEqual((uniform == self.codes_b)[differs].mean(), 0.5, delta=0.02)
+
+    def test_point_mutation_rate(self):
+        mutated = dna.unpack(dna.point_mutation(self.parents_a, self.LENGTH, 0.1, self.rng), self.LENGTH)
+
+        self.assertAlmostEqual((mutated != self.codes_a).mean(), 0.1, delta=0.01)
+        # Padding bits of the last byte stay clear
+        self.assertTrue((dna.pack(mutated) == dna.point_mutation(dna.pack(mutated), self.LENGTH, 0.0)).all())
+
+    def test_seeded_generations_are_reproducible(self):
+        runs = [
+            dna.recombine_population(self.parents_a, self.parents_b, self.LENGTH, 'two_point', 0.05, np.random.default_rng(9))
+            for _ in range(2)
+        ]
+        np.testing.assert_array_equal(runs[0], runs[1])
+
+    def test_mismatched_parents_rejected(self):
+        with self.assertRaises(ValueError):
+            dna.crossover(self.parents_a, self.parents_b[:10], self.LENGTH)
+        with self.assertRaises(ValueError):
+            dna.crossover(self.parents_a, self.parents_b, 200)
+        with self.assertRaises(ValueError):
+            dna.crossover(self.parents_a, self.parents_b, self.LENGTH, 'three_point')
+
+    def test_recombine_genes(self):
+        child = recombine_genes('A' * 40, 'T' * 40, method='single_point', mutation_rate=0, rng=np.random.default_rng(1))
+        self.assertRegex(child, r'^A+T+$')
+
+        generator_a, generator_b = DNAGenerator(rng=self.rng), DNAGenerator(rng=self.rng)
+        child = recombine_genes(generator_a.sequence, generator_b.sequence, method='uniform')
+        self.assertIsInstance(child, list)
+        self.assertEqual(len(child), 100)
+
+        with self.assertRaises(ValueError):
+            recombine_genes('ACGT', 'ACG')
+
+    def test_dna_generator_is_packed(self):
+        generator = DNAGenerator(rng=self.rng)
+
+        self.assertEqual(generator.packed.nbytes, 25)
+        self.assertEqual(len(generator.sequence), 100)
+        self.assertTrue(set(generator.sequence) <= set('ACGT'))
+        child = generator.recombine(DNAGenerator(rng=self.rng), method='uniform', rng=self.rng)
+        self.assertEqual(len(child.sequence), 100)
+
+    def test_dna_generator_sequence_assignment(self):
+        generator = DNAGenerator(rng=self.rng)
+        sequence = generator.sequence
+        sequence[0] = 'T' if sequence[0] != 'T' else 'A'
+        generator.sequence = sequence
+        self.assertEqual(generator.sequence, sequence)
+
+        generator.sequence = 'acgta'
+        self.assertEqual((generator.length, generator.packed.nbytes), (5, 2))
+        self.assertEqual(''.join(generator.sequence), 'ACGTA')
+        with self.assertRaises(ValueError):
+            generator.sequence = 'ACGU'
+
+class TestSimilarityIndex(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(21)
+        self.sequences = rng.integers(0, 4, size=(500, 100), dtype=np.uint8)
+        self.index = SimilarityIndex()
+        for key, sequence in enumerate(self.sequences):
+            self.index.insert(key, dna_shingles(sequence))
+
+    def test_finds_point_mutants_only(self):
+        mutant = self.sequences[42].copy()
+        mutant[60] = (mutant[60] + 1) % 4
+
+        matches = self.index.query(dna_shingles(mutant), 0.3)
+        self.assertEqual([key for key, _ in matches], [42])
+        self.assertFalse(self.index.has_near(dna_shingles(np.roll(self.sequences[42], 50) ^ 1), 0.3))
+
+    def test_insert_and_remove_are_incremental(self):
+        shingles = dna_shingles(self.sequences[7])
+        self.assertTrue(self.index.remove(7))
+        self.assertFalse(self.index.remove(7))
+        self.assertFalse(self.index.has_near(shingles, 0.1))
+
+        self.index.insert('again', shingles)
+        self.assertEqual(self.index.query(shingles, 0.0), [('again', 0.0)])
+        self.assertEqual(len(self.index), 500)
+
+    def test_symbol_ngrams(self):
+        index = SimilarityIndex()
+        index.insert('EVOLVE', symbol_shingles('EVOLVE'))
+
+        self.assertTrue(index.has_near(symbol_shingles('evolve '), 0.1))
+        self.assertTrue(index.has_near(symbol_shingles('EVOLVER'), 0.5))
+        self.assertFalse(index.has_near(symbol_shingles('PEPE'), 0.5))
+        # Symbol n-grams never collide with DNA k-mers
+        self.assertTrue(np.all(symbol_shingles('ACGTACGT') >= np.uint64(1 << 63)))
+        self.assertEqual(len(mutation_shingles('ACGTACGTA', 'EVO')), 2 + 3)
+
+    def test_engine_rejects_near_duplicate_proposals(self):
+        engine = make_offline_engine()
+        engine.similarity_index = SimilarityIndex()
+        engine.fetch_social_data = Mock(return_value={'text': [], 'media': []})
+        engine.analyze_market_sentiment = Mock(return_value={})
+        engine.calculate_adaptive_burn_rate = Mock(return_value=3)
+        symbols = {'aggressive': 'MOONAPE', 'balanced': 'MOONAPE', 'defensive': 'SHIELDCAT'}
+        # The cached answer repeats; only a refresh reaches the model, which stays stuck on MOONAPE
+        fresh = dict(symbols, defensive='GECKOBYTE')
+        engine.generate_evolved_symbol = lambda sentiment, trend, refresh=False: (fresh if refresh else symbols)[trend]
+        engine.generate_visual_mutation = Mock(return_value='dna')
+
+        for parallel in (True, False):
+            engine.similarity_index = SimilarityIndex()
+            engine.generate_visual_mutation.reset_mock()
+            mutations = engine.generate_mutations(parallel=parallel)
+
+            self.assertEqual(sorted(m['symbol'] for m in mutations), ['MOONAPE', 'SHIELDCAT'])
+            self.assertEqual(engine.generate_visual_mutation.call_count, 2)
+
+        # Next cycle: the cached symbols are taken, a re-prompt finds a new one for defensive
+        engine.generate_visual_mutation.reset_mock()
+        self.assertEqual([m['symbol'] for m in engine.generate_mutations()], ['GECKOBYTE'])
+        engine.generate_visual_mutation.assert_called_once()
+
+    def test_engine_cycles_with_cached_symbols_keep_proposing(self):
+        engine = make_offline_engine(similarity_index=SimilarityIndex())
+        engine.fetch_social_data = Mock(return_value={'text': [], 'media': []})
+        engine.analyze_market_sentiment = Mock(return_value={})
+        engine.calculate_adaptive_burn_rate = Mock(return_value=3)
+        engine.generate_visual_mutation = Mock(return_value='dna')
+        names = iter(f"{a}{b}" for a in ('APE', 'OWL', 'ELK', 'YAK') for b in ('MOON', 'STAR', 'WAVE', 'FIRE', 'LEAF'))
+        backend = Mock(side_effect=lambda prompt: next(names))
+
+        def generate_evolved_symbol(sentiment, trend, refresh=False):
+            return engine.prompt_cache.query(f"symbol for {trend}", backend, refresh=refresh)
+
+        engine.generate_evolved_symbol = generate_evolved_symbol
+        # Unchanged sentiment every cycle, so the first prompt is always a cache hit
+        counts = [len(engine.generate_mutations(parallel=False)) for _ in range(3)]
+        self.assertEqual(counts, [3, 3, 3])
+
+    def test_novelty_index_keeps_only_recent_symbols(self):
+        engine = make_offline_engine(similarity_index=SimilarityIndex())
+        engine.NOVELTY_WINDOW = 3
+        for symbol in ('ALPHA', 'BRAVO', 'CHARLIE', 'DELTA'):
+            self.assertTrue(engine.claim_symbol(symbol))
+
+        self.assertEqual(len(engine.similarity_index), 3)
+        self.assertNotIn('ALPHA', engine.similarity_index)
+        # Old enough to be proposed again
+        self.assertTrue(engine.claim_symbol('ALPHA'))
+        self.assertFalse(engine.claim_symbol('DELTA'))
+
+    def test_pool_manager_duplicate_signal(self):
+        genes = [
+            {'id': i, 'dominant_trait': f"trait{i}", 'dna': ''.join('ACGT'[c] for c in self.sequences[i % 5])}
+            for i in range(10)
+        ]
+        manager = GenePoolManager(FakeGeneticDB(genes), similarity_index=SimilarityIndex())
+        manager.introduce_mutations = Mock()
+
+        self.assertEqual(manager.near_duplicate_share(), 1.0)
+        self.assertTrue(manager.is_near_duplicate({'dna': genes[0]['dna']}))
+        manager.maintain_pool_diversity()
+        manager.introduce_mutations.assert_called_once()
+
+        manager.remove_oldest(5)
+        self.assertEqual(manager.near_duplicate_share(), 0.0)
+        self.assertFalse(manager.is_near_duplicate(genes[6]))
+
+    def test_pool_manager_readded_gene_stays_indexed(self):
+        dna = lambda i: ''.join('ACGT'[c] for c in self.sequences[i])
+        genes = [{'id': i, 'dominant_trait': 'trait', 'dna': dna(i)} for i in range(3)]
+        manager = GenePoolManager(FakeGeneticDB(genes), similarity_index=SimilarityIndex())
+        manager.add_gene({'id': 1, 'dominant_trait': 'trait', 'dna': dna(1)})
+
+        manager.remove_oldest(2)
+        self.assertIn(1, manager.similarity_index)
+        self.assertNotIn(0, manager.similarity_index)
+        self.assertTrue(manager.is_near_duplicate({'dna': dna(1)}))
+        # Genes 2 and 1 remain, neither duplicates the other
+        self.assertEqual(manager.near_duplicate_share(), 0.0)
+        manager.add_gene({'id': 5, 'dominant_trait': 'trait', 'dna': dna(1)})
+        self.assertEqual(manager.near_duplicate_share(), 2 / 3)
+
+        manager.remove_oldest(2)
+        self.assertEqual(manager.near_duplicate_share(), 0.0)
+        self.assertEqual(len(manager.similarity_index), 1)
+
+    def test_pool_manager_duplicate_count_is_incremental(self):
+        manager = GenePoolManager(FakeGeneticDB([]), similarity_index=SimilarityIndex())
+        index = manager.similarity_index
+        index.neighbors = Mock(wraps=index.neighbors)
+        dna = lambda i: ''.join('ACGT'[c] for c in self.sequences[i % 7])
+
+        for i in range(30):
+            manager.add_gene({'id': i, 'dominant_trait': 'trait', 'dna': dna(i)})
+            manager.near_duplicate_share()
+        # One query per inserted gene, none per share check
+        self.assertEqual(index.neighbors.call_count, 30)
+
+        self.assertEqual(manager.near_duplicate_share(), 1.0)
+
+        # Matches a full scan as genes age out; the last 8 leave one pair of copies
+        for removed in (4, 10, 8):
+            manager.remove_oldest(removed)
+            expected = manager.near_duplicate_share(max_distance=0.19999)
+            self.assertEqual(manager.near_duplicate_share(), expected)
+        self.assertEqual(manager.near_duplicate_share(), 2 / 8)
+
+class TestBenchmarkSuite(unittest.TestCase):
+    def test_compare_uses_per_benchmark_thresholds(self):
+        from tests.ai_benchmark import compare
+
+        baseline = {'results': {
+            'fast': {'min_s': 1.0, 'threshold': 0.5},
+            'slow': {'min_s': 1.0, 'threshold': 0.1},
+            'dropped': {'min_s': 1.0}
+        }}
+        report = {'results': {'fast': {'min_s': 1.4}, 'slow': {'min_s': 1.2}, 'new': {'min_s': 9.0}}}
+
+        self.assertEqual([r['name'] for r in compare(report, baseline)], ['slow'])
+        self.assertEqual([r['name'] for r in compare(report, baseline, threshold=0.3)], ['fast'])
+
+    def test_runs_offline_and_writes_json(self):
+        from tests.ai_benchmark import main
+
+        with tempfile.TemporaryDirectory() as tmp:
+            output = os.path.join(tmp, 'bench.json')
+            baseline = os.path.join(tmp, 'baseline.json')
+            args = ['--only', 'darwinian_fitness_batch', 'governance_watch_changes', '--repeat', '1',
+                    '--rpc-latency', '0', '--output', output, '--baseline', baseline]
+
+            self.assertEqual(main(args + ['--update-baseline']), 0)
+            with open(output) as handle:
+                report = json.load(handle)
+            self.assertEqual(sorted(report['results']), ['darwinian_fitness_batch', 'governance_watch_changes'])
+            self.assertGreater(report['results']['governance_watch_changes']['items_per_s'], 0)
+            # A huge threshold tolerates any noise against our own baseline
+            self.assertEqual(main(args + ['--threshold', '100']), 0)
+
+def _series_value(text, series):
+    prefix = f"evolve_{series} "
+    return next((float(line[len(prefix):]) for line in text.splitlines() if line.startswith(prefix)), 0.0)
+
+class TestInstrumentation(unittest.TestCase):
+    def setUp(self):
+        self.metrics = Metrics()
+        self.was_enabled = METRICS.enabled
+
+    def tearDown(self):
+        METRICS.enabled = self.was_enabled
+
+    def test_disabled_records_nothing(self):
+        calls = []
+        traced = self.metrics.timed('work_seconds')(lambda x: calls.append(x) or x)
+
+        self.assertEqual(traced(3), 3)
+        with self.metrics.timer('block_seconds'):
+            pass
+        self.metrics.count('events')
+
+        self.assertEqual(calls, [3])
+        self.assertEqual(self.metrics.render(), '\n')
+
+    def test_prometheus_text(self):
+        self.metrics.enable()
+        traced = self.metrics.timed('rpc_seconds', method='call')(lambda fail: 1 / 0 if fail else None)
+        traced(False)
+        with self.assertRaises(ZeroDivisionError):
+            traced(True)
+        self.metrics.observe('rpc_seconds', 7.0, method='call')
+        self.metrics.register_stats('cache', {'hits': 5, 'misses': 2})
+        self.metrics.register_gauge('queue_depth', lambda: 4, channel='sms')
+        self.metrics.register_gauge('broken', lambda: 1 / 0)
+
+        lines = self.metrics.render().splitlines()
+
+        self.assertIn('# TYPE evolve_rpc_seconds histogram', lines)
+        self.assertIn('evolve_rpc_seconds_bucket{method="call",le="5.0"} 2', lines)
+        self.assertIn('evolve_rpc_seconds_bucket{method="call",le="+Inf"} 3', lines)
+        self.assertIn('evolve_rpc_seconds_count{method="call"} 3', lines)
+        self.assertIn('evolve_rpc_seconds_errors_total{method="call"} 1', lines)
+        self.assertIn('evolve_cache_hits_total 5', lines)
+        self.assertIn('evolve_queue_depth{channel="sms"} 4', lines)
+        self.assertFalse([line for line in lines if line.startswith('evolve_broken')])
+
+    def test_components_report_to_shared_registry(self):
+        METRICS.enable()
+        contract = FakeGovernanceContract(make_governance_changes(20))
+        GovernanceWatcher(contract, batch_size=8).watch_changes()
+        dispatcher = NotificationDispatcher({'sms': Mock()}, workers_per_channel=1)
+        dispatcher.submit('sms', {'text': 'hi'})
+        dispatcher.join()
+
+        text = METRICS.render()
+        self.assertRegex(text, r'evolve_rpc_seconds_count\{method="governanceHistory"\} [1-9]\d*')
+        self.assertIn('evolve_notification_queue_depth{channel="sms"} 0', text)
+        self.assertRegex(text, r'evolve_notifications_sent_total [1-9]')
+
+        # A closed dispatcher no longer reports
+        dispatcher.close()
+        self.assertNotIn('evolve_notification_queue_depth{channel="sms"}', METRICS.render())
+
+    def test_live_instances_are_summed_and_held_weakly(self):
+        class Component:
+            def __init__(component, metrics, stats, depth):
+                component.stats, component.depth = stats, depth
+                metrics.register_stats('cache', stats, owner=component)
+                metrics.register_gauge('cache_depth', attrgetter('depth'), owner=component)
+
+        first = Component(self.metrics, {'hits': 2, 'misses': 1}, 3)
+        second = Component(self.metrics, {'hits': 5}, 4)
+
+        lines = self.metrics.render().splitlines()
+        self.assertIn('evolve_cache_hits_total 7', lines)
+        self.assertIn('evolve_cache_misses_total 1', lines)
+        self.assertIn('evolve_cache_depth 7', lines)
+
+        self.metrics.unregister(first)
+        self.assertIn('evolve_cache_hits_total 5', self.metrics.render().splitlines())
+        reference = weakref.ref(second)
+        del second
+        gc.collect()
+        self.assertIsNone(reference())
+        self.assertNotIn('evolve_cache', self.metrics.render())
+
+    def test_sequential_stages_are_timed(self):
+        METRICS.enable()
+        engine = make_offline_engine()
+        engine.fetch_social_data = Mock(return_value={'text': [], 'media': []})
+        engine.sentiment_inference.mean_score = Mock(return_value=0.5)
+        engine._market_context = Mock(return_value={})
+        engine.calculate_adaptive_burn_rate = Mock(return_value=3)
+        engine.generate_evolved_symbol = Mock(return_value='EVO')
+        engine.generate_visual_mutation = Mock(return_value='dna')
+        before = METRICS.render()
+
+        engine.generate_mutations(parallel=False)
+        DarwinianScorer().calculate_fitness_batch([1], {
+            'holder_growth': 1.0, 'trade_velocity': 1.0, 'sentiment': 1.0, 'meme_shares': 1.0
+        })
+
+        text = METRICS.render()
+        for series in ('stage_seconds_count{stage="fetch_social_data"}',
+                       'stage_seconds_count{stage="analyze_market_sentiment"}',
+                       'backend_seconds_count{backend="llm"}',
+                       'backend_seconds_count{backend="diffusion"}',
+                       'fitness_batch_seconds_count{scorer="darwinian"}'):
+            self.assertGreater(_series_value(text, series), _series_value(before, series), series)
+
+    def test_endpoint_and_profiler(self):
+        self.metrics.enable()
+        self.metrics.profiler.interval = 0.001
+        self.metrics.register_stats('cache', {'hits': 1})
+        server = self.metrics.serve(port=0)
+        base = f"http://127.0.0.1:{server.server_address[1]}"
+        stop = threading.Event()
+
+        def busy_loop_for_profile():
+            while not stop.is_set():
+                sum(range(1000))
+
+        worker = threading.Thread(target=busy_loop_for_profile)
+        worker.start()
+        try:
+            with urllib.request.urlopen(f"{base}/metrics") as response:
+                self.assertIn(b'evolve_cache_hits_total 1', response.read())
+            urllib.request.urlopen(f"{base}/profile/start").read()
+            time.sleep(0.1)
+            with urllib.request.urlopen(f"{base}/profile/stop") as response:
+                profile = response.read().decode('utf-8')
+        finally:
+            stop.set()
+            worker.join()
+            server.shutdown()
+            server.server_close()
+
+        self.assertIn('busy_loop_for_profile', profile)
+        self.assertFalse(self.metrics.profiler.running)
+
 class TestIntegration(unittest.TestCase):
     def setUp(self):
         self.engine = EvolutionEngine()